@@ -0,0 +1,178 @@
+import asyncio
+import itertools
+import json
+import math
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Favorite
+from .nasa_data import MARS_ROVERS
+
+ENDPOINTS = ('index', 'mars_rover', 'api_data', 'api_data_batch', 'favorites', 'favorites_toggle')
+PERCENTILES = (50, 95, 99)
+
+
+def request_for(endpoint, i, keys):
+    # The i-th request of a phase as (method, path, json body). Requests
+    # cycle through `keys` dates or sols, so a phase mixes hits and misses.
+    key = i % keys
+    if endpoint == 'index':
+        return 'GET', f"{reverse('main:index')}?date={date.today() - timedelta(days=key + 1)}", None
+    if endpoint == 'mars_rover':
+        return 'GET', f"{reverse('main:mars_rover')}?rover=curiosity&sol={1000 + key}", None
+    if endpoint == 'api_data':
+        if i % 2:
+            return 'GET', f"{reverse('main:api_data_ajax')}?type=apod&date={date.today() - timedelta(days=key + 1)}", None
+        return 'GET', f"{reverse('main:api_data_ajax')}?type=mars_rover&rover=curiosity&sol={1000 + key}", None
+    if endpoint == 'api_data_batch':
+        # One sol on every rover, the comparison the batch endpoint is for.
+        queries = [{'type': 'mars_rover', 'rover': rover, 'sol': 1000 + key} for rover in MARS_ROVERS]
+        return 'POST', reverse('main:api_data_batch'), {'queries': queries}
+    if endpoint == 'favorites':
+        return 'GET', reverse('main:favorites'), None
+    if endpoint == 'favorites_toggle':
+        # Adds then removes the same photo, so the table size stays put.
+        img_src = f'https://mars.nasa.gov/msl-raw-images/bench/{key}.jpg'
+        if (i // keys) % 2 == 0:
+            body = {'type': 'mars_rover', 'data': {'img_src': img_src, 'sol': 1000, 'earth_date': '2015-05-30'}}
+            return 'POST', reverse('main:add_to_favorites'), body
+        return 'POST', reverse('main:remove_from_favorites'), {'type': 'mars_rover', 'image_url': img_src}
+    raise ValueError(f'Unknown endpoint {endpoint}')
+
+
+def seed_favorites(user, count):
+    Favorite.objects.bulk_create([
+        Favorite(
+            user=user,
+            favorite_type='apod',
+            title=f'Seeded favorite {i}',
+            description='Seeded for benchmarks. ' * 10,
+            image_url=f'https://apod.nasa.gov/apod/image/bench/{i}.jpg',
+            api_data={'date': (date(2020, 1, 1) + timedelta(days=i)).isoformat(), 'title': f'Seeded favorite {i}'},
+        )
+        for i in range(count)
+    ], ignore_conflicts=True)
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile.
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def count_queries(user, endpoint, keys):
+    # Queries per request, measured one request at a time after warm-up, when
+    # the connection is not shared with concurrent requests.
+    client = Client()
+    client.force_login(user)
+    counts = []
+    for i in range(2):
+        method, path, body = request_for(endpoint, i, keys)
+        with CaptureQueriesContext(connection) as queries:
+            _send(client, method, path, body)
+        counts.append(len(queries))
+    return max(counts)
+
+
+def _send(client, method, path, body):
+    if method == 'GET':
+        return client.get(path)
+    return client.post(path, json.dumps(body), content_type='application/json')
+
+
+async def _run_phase(user, endpoint, concurrency, total, keys):
+    counter = itertools.count()
+    latencies = []
+    statuses = Counter()
+
+    async def worker():
+        client = AsyncClient()
+        await client.aforce_login(user)
+        while (i := next(counter)) < total:
+            method, path, body = request_for(endpoint, i, keys)
+            started = time.perf_counter()
+            response = await _send(client, method, path, body)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def run_phase(user, endpoint, concurrency, total, keys, stub=None):
+    upstream_before = stub.requests_served() if stub else 0
+    latencies, statuses, elapsed = asyncio.run(_run_phase(user, endpoint, concurrency, total, keys))
+    latencies.sort()
+
+    result = {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status >= 500),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency_ms': {f'p{p}': round(percentile(latencies, p) * 1000, 2) for p in PERCENTILES},
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+    result['latency_ms']['mean'] = round(sum(latencies) / len(latencies) * 1000, 2)
+    result['latency_ms']['max'] = round(latencies[-1] * 1000, 2)
+    if stub:
+        result['upstream_calls'] = stub.requests_served() - upstream_before
+    return result
+
+
+def run_benchmark(user, endpoints, concurrency_levels, total, keys, stub=None, log=None):
+    # Warms each endpoint's keys once, counts its queries, then measures it at
+    # every concurrency level.
+    results = []
+    for endpoint in endpoints:
+        warm = run_phase(user, endpoint, 1, keys, keys, stub)
+        queries = count_queries(user, endpoint, keys)
+        if log:
+            log(f'{endpoint}: warmed {keys} keys in {warm["latency_ms"]["max"]} ms max, {queries} queries per request')
+
+        for concurrency in concurrency_levels:
+            result = run_phase(user, endpoint, concurrency, total, keys, stub)
+            result['db_queries_per_request'] = queries
+            results.append(result)
+            if log:
+                log(format_result(result))
+    return results
+
+
+def format_result(result):
+    latency = result['latency_ms']
+    return (
+        f"{result['endpoint']:<17} c={result['concurrency']:<4} {result['throughput_rps']:>8} req/s  "
+        f"p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms  "
+        f"errors {result['errors']}  queries {result.get('db_queries_per_request')}"
+    )
+
+
+def compare(baseline, current, tolerance):
+    # Regressions of `current` against `baseline` run results: p95 latency or
+    # throughput worse by more than `tolerance`, or more queries per request.
+    previous = {(r['endpoint'], r['concurrency']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['endpoint'], result['concurrency']))
+        if before is None:
+            continue
+        name = f"{result['endpoint']} c={result['concurrency']}"
+        if result['latency_ms']['p95'] > before['latency_ms']['p95'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['latency_ms']['p95']} -> {result['latency_ms']['p95']} ms")
+        if result['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if result.get('db_queries_per_request', 0) > before.get('db_queries_per_request', 0):
+            regressions.append(
+                f"{name}: queries {before.get('db_queries_per_request')} -> {result['db_queries_per_request']}"
+            )
+    return regressions
@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+
+from . import lookup_stats, metrics, nasa_client, quota
+
+logger = logging.getLogger(__name__)
+
+# Extra seconds the lock outlives the slowest fetch, for the cache writes.
+LOCK_MARGIN = 5
+POLL_INTERVAL = 0.1
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+_ainflight = {}
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_refresh_executor = None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def get_cached(cache_key):
+    # Returns (data, is_stale); (None, False) when there is no usable entry.
+    return _unpack(cache.get(cache_key))
+
+
+async def aget_cached(cache_key):
+    return _unpack(await cache.aget(cache_key))
+
+
+def _valid_entry(entry):
+    if not isinstance(entry, dict) or 'data' not in entry:
+        return None
+    return entry
+
+
+def _unpack(entry):
+    entry = _valid_entry(entry)
+    if entry is None:
+        return None, False
+    return entry['data'], time.time() >= entry['fresh_until']
+
+
+def content_hash(*parts):
+    serialized = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode()).hexdigest()[:32]
+
+
+def make_entry(data, soft_ttl):
+    # The content hash is computed once per write and reused as the ETag of
+    # every response built from the entry.
+    now = time.time()
+    return {
+        'data': data,
+        'fetched_at': now,
+        'fresh_until': now + soft_ttl,
+        'etag': content_hash(data),
+    }
+
+
+def derive_entry(entry, data, *variant):
+    # An entry for data computed from a cached entry, e.g. with manifest totals applied.
+    return {**entry, 'data': data, 'etag': content_hash(entry.get('etag'), *variant)}
+
+
+def cache_payload(cache_key, data, soft_ttl):
+    cache.set(cache_key, make_entry(data, soft_ttl), soft_ttl * settings.NASA_CACHE_STALE_FACTOR)
+    return data
+
+
+def cache_failure(cache_key, data, soft_ttl):
+    # A failed refresh keeps serving the last good payload and retries after
+    # soft_ttl instead of replacing it with the error.
+    previous, _ = get_cached(cache_key)
+    if previous and not previous.get('error'):
+        logger.warning(f"Keeping last good payload for {cache_key} after failed refresh")
+        return cache_payload(cache_key, previous, soft_ttl)
+    return cache_payload(cache_key, data, soft_ttl)
+
+
+async def aget_or_fetch_entry(cache_key, fetch, afetch, target=None):
+    # Stale entries are still refreshed by the sync fetch on the thread pool.
+    # Misses are fetched on the event loop under ASGI; under WSGI each request
+    # has its own loop, so they coalesce on threads with the sync fetch.
+    entry = _valid_entry(await cache.aget(cache_key))
+    if entry is not None:
+        is_stale = time.time() >= entry['fresh_until']
+        if is_stale:
+            refresh_in_background(cache_key, fetch)
+        _record(target, 'stale' if is_stale else 'hit')
+        return entry
+
+    _record(target, 'miss')
+    if nasa_client.uses_event_loop():
+        data = await asingle_flight(cache_key, afetch)
+    else:
+        # On a worker thread, so concurrent misses (the api_data batch) are
+        # fetched in parallel rather than in turn on the request's thread.
+        data = await sync_to_async(_single_flight_on_worker, thread_sensitive=False)(cache_key, fetch)
+    entry = _valid_entry(await cache.aget(cache_key))
+    return entry if entry is not None else make_entry(data, 0)
+
+
+def _single_flight_on_worker(cache_key, fetch):
+    # Catalog reads open a DB connection on the worker thread. Under WSGI the
+    # thread belongs to the request's throwaway event loop, so the connection
+    # is closed here rather than left to CONN_MAX_AGE.
+    try:
+        return single_flight(cache_key, fetch)
+    finally:
+        connections.close_all()
+
+
+def _record(target, outcome):
+    if target is not None:
+        metrics.inc('spaceeye_cache_lookups_total', type=target[0], outcome=outcome)
+        lookup_stats.record(target, outcome)
+
+
+def refresh_in_background(cache_key, fetch):
+    global _refresh_executor
+
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=settings.NASA_REFRESH_WORKERS,
+                thread_name_prefix='nasa-refresh'
+            )
+
+    _refresh_executor.submit(_refresh, cache_key, fetch)
+
+
+def _refresh(cache_key, fetch):
+    # Nobody is waiting on a background refresh, so it yields the NASA quota
+    # to interactive misses.
+    try:
+        with quota.priority(quota.BACKGROUND):
+            single_flight(cache_key, fetch)
+    except Exception as e:
+        logger.error(f"Background refresh of {cache_key} failed: {str(e)}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(cache_key)
+        close_old_connections()
+
+
+def lock_timeout():
+    # Outlives the slowest fetch with every retry, so a slow NASA does not
+    # release the lock to other processes mid-fetch.
+    return math.ceil(nasa_client.worst_case_duration()) + LOCK_MARGIN
+
+
+def wait_timeout():
+    # Waiters stop early once the lock is released, so they can afford to wait
+    # as long as it may be held.
+    return lock_timeout()
+
+
+def single_flight(cache_key, fetch, ready=None):
+    # One fetch per cache key: threads in this process share the leader's
+    # result, other processes wait on a cache-backed lock until ready()
+    # returns a result (by default, a fresh entry under cache_key).
+    with _inflight_lock:
+        call = _inflight.get(cache_key)
+        leader = call is None
+        if leader:
+            call = _Call()
+            _inflight[cache_key] = call
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _fetch_with_cache_lock(cache_key, fetch, ready or (lambda: _fresh(cache_key)))
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(cache_key, None)
+        call.done.set()
+
+
+def _fresh(cache_key):
+    cached_data, is_stale = get_cached(cache_key)
+    if cached_data is not None and not is_stale:
+        return cached_data
+    return None
+
+
+def _fetch_with_cache_lock(cache_key, fetch, ready):
+    lock_key = f'{cache_key}_lock'
+    token = uuid.uuid4().hex
+
+    if cache.add(lock_key, token, lock_timeout()):
+        try:
+            result = ready()
+            if result is not None:
+                return result
+            return fetch()
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    deadline = time.monotonic() + wait_timeout()
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        result = ready()
+        if result is not None:
+            return result
+        if cache.get(lock_key) is None:
+            break
+
+    logger.warning(f"Single-flight wait for {cache_key} ended without a result, fetching directly")
+    return fetch()
+
+
+async def asingle_flight(cache_key, afetch):
+    loop = asyncio.get_running_loop()
+    inflight_key = (loop, cache_key)
+    task = _ainflight.get(inflight_key)
+    if task is None:
+        task = loop.create_task(_afetch_with_cache_lock(cache_key, afetch))
+        _ainflight[inflight_key] = task
+        task.add_done_callback(lambda _: _ainflight.pop(inflight_key, None))
+    return await asyncio.shield(task)
+
+
+async def _afetch_with_cache_lock(cache_key, afetch):
+    lock_key = f'{cache_key}_lock'
+    token = uuid.uuid4().hex
+
+    if await cache.aadd(lock_key, token, lock_timeout()):
+        try:
+            cached_data, is_stale = await aget_cached(cache_key)
+            if cached_data is not None and not is_stale:
+                return cached_data
+            return await afetch()
+        finally:
+            if await cache.aget(lock_key) == token:
+                await cache.adelete(lock_key)
+
+    deadline = time.monotonic() + wait_timeout()
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        cached_data, is_stale = await aget_cached(cache_key)
+        if cached_data is not None and not is_stale:
+            return cached_data
+        if await cache.aget(lock_key) is None:
+            break
+
+    logger.warning(f"Single-flight wait for {cache_key} ended without a result, fetching directly")
+    return await afetch()
@@ -0,0 +1,143 @@
+import logging
+
+from django.conf import settings
+
+from . import nasa_client
+from .models import MarsRover, MarsCamera, MarsPhoto, MarsCatalogSol
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_PAGE_SIZE = 25
+BULK_BATCH_SIZE = 500
+
+
+def mars_photos_url(rover):
+    return f'{settings.NASA_API_BASE_URL}/mars-photos/api/v1/rovers/{rover}/photos'
+
+
+def get_catalog_page(rover, sol, page, page_size):
+    # Returns a Mars Photos API shaped payload, or None when the sol has not
+    # been fully ingested.
+    ingested = MarsCatalogSol.objects.filter(rover__name=rover, sol=sol).select_related('rover').first()
+    if ingested is None:
+        return None
+
+    offset = (page - 1) * page_size
+    photos = (
+        MarsPhoto.objects
+        .filter(rover=ingested.rover, sol=sol)
+        .select_related('camera')
+        .order_by('nasa_id')[offset:offset + page_size]
+    )
+    rover_data = _rover_dict(ingested.rover)
+
+    return {
+        'photos': [_photo_dict(photo, rover_data) for photo in photos],
+        'total_photos': ingested.photo_count,
+    }
+
+
+def ingest_sol(rover_name, sol, batch_size=BULK_BATCH_SIZE):
+    # Streams every upstream page of the sol and writes photos in bulk batches.
+    # Already ingested photos are skipped through the nasa_id unique constraint.
+    rover = None
+    cameras = {}
+    pending = []
+    count = 0
+    page = 1
+
+    while True:
+        response = nasa_client.get(
+            mars_photos_url(rover_name),
+            params={'api_key': settings.NASA_API_KEY, 'sol': sol, 'page': page},
+            timeout=15
+        )
+        response.raise_for_status()
+        photos = response.json().get('photos', [])
+
+        for photo in photos:
+            if rover is None:
+                rover = _upsert_rover(rover_name, photo['rover'])
+
+            camera = cameras.get(photo['camera']['name'])
+            if camera is None:
+                camera = _get_camera(rover, photo['camera'])
+                cameras[camera.name] = camera
+
+            pending.append(MarsPhoto(
+                nasa_id=photo['id'],
+                rover=rover,
+                camera=camera,
+                sol=photo['sol'],
+                earth_date=photo['earth_date'],
+                img_src=photo['img_src'],
+            ))
+
+        if len(pending) >= batch_size:
+            MarsPhoto.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+            pending = []
+
+        count += len(photos)
+        if len(photos) < UPSTREAM_PAGE_SIZE:
+            break
+        page += 1
+
+    if pending:
+        MarsPhoto.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+
+    if rover is None:
+        rover, _ = MarsRover.objects.get_or_create(name=rover_name)
+
+    MarsCatalogSol.objects.update_or_create(rover=rover, sol=sol, defaults={'photo_count': count})
+    return count
+
+
+def _upsert_rover(rover_name, data):
+    rover, _ = MarsRover.objects.update_or_create(
+        name=rover_name,
+        defaults={
+            'nasa_id': data.get('id'),
+            'landing_date': data.get('landing_date'),
+            'launch_date': data.get('launch_date'),
+            'status': data.get('status', ''),
+        }
+    )
+    return rover
+
+
+def _get_camera(rover, data):
+    camera, _ = MarsCamera.objects.get_or_create(
+        rover=rover,
+        name=data['name'],
+        defaults={
+            'nasa_id': data.get('id'),
+            'full_name': data.get('full_name', ''),
+        }
+    )
+    return camera
+
+
+def _rover_dict(rover):
+    return {
+        'id': rover.nasa_id,
+        'name': rover.name.title(),
+        'landing_date': rover.landing_date.isoformat() if rover.landing_date else None,
+        'launch_date': rover.launch_date.isoformat() if rover.launch_date else None,
+        'status': rover.status,
+    }
+
+
+def _photo_dict(photo, rover_data):
+    return {
+        'id': photo.nasa_id,
+        'sol': photo.sol,
+        'img_src': photo.img_src,
+        'earth_date': photo.earth_date.isoformat(),
+        'camera': {
+            'id': photo.camera.nasa_id,
+            'name': photo.camera.name,
+            'rover_id': rover_data['id'],
+            'full_name': photo.camera.full_name,
+        },
+        'rover': rover_data,
+    }
@@ -0,0 +1,105 @@
+import logging
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# How long a half-open probe may take before another worker may probe instead.
+PROBE_TIMEOUT = 60
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    # A requests exception, so fetchers fall back to the last good payload
+    # exactly as they do for a real connection failure.
+    pass
+
+
+class CircuitBreaker:
+    # Per upstream host, shared by every worker through the cache:
+    # - closed: requests go through; consecutive failures are counted.
+    # - open: after NASA_CIRCUIT_FAILURE_THRESHOLD failures in a row, requests
+    #   fail immediately for NASA_CIRCUIT_RESET_TIMEOUT seconds.
+    # - half-open: once that has passed, one worker at a time sends a probe;
+    #   success closes the circuit, failure opens it again.
+    # The keys end in _circuit/_lock so the tiered cache never serves them
+    # from a worker's local tier.
+
+    def __init__(self, host):
+        self.host = host
+        self.state_key = f'nasa_{host}_circuit'
+        self.failures_key = f'nasa_{host}_failures_circuit'
+        self.probe_key = f'nasa_{host}_probe_lock'
+
+    def before_request(self):
+        # Returns a ticket for record_success/record_failure, or raises
+        # CircuitOpenError.
+        cached = cache.get_many([self.state_key, self.failures_key])
+        opened = cached.get(self.state_key)
+        if opened is not None:
+            self._check_retry(opened)
+            if not cache.add(self.probe_key, True, PROBE_TIMEOUT):
+                raise self._open_error(opened)
+            return {'probe': True, 'failures': cached.get(self.failures_key, 0)}
+        return {'probe': False, 'failures': cached.get(self.failures_key, 0)}
+
+    async def abefore_request(self):
+        cached = await cache.aget_many([self.state_key, self.failures_key])
+        opened = cached.get(self.state_key)
+        if opened is not None:
+            self._check_retry(opened)
+            if not await cache.aadd(self.probe_key, True, PROBE_TIMEOUT):
+                raise self._open_error(opened)
+            return {'probe': True, 'failures': cached.get(self.failures_key, 0)}
+        return {'probe': False, 'failures': cached.get(self.failures_key, 0)}
+
+    def record_success(self, ticket):
+        # Only writes when there is something to reset.
+        if ticket['probe']:
+            cache.delete(self.state_key)
+            cache.delete(self.probe_key)
+            logger.warning(f"NASA circuit for {self.host} closed after a successful probe")
+        if ticket['probe'] or ticket['failures']:
+            cache.set(self.failures_key, 0, None)
+
+    def record_failure(self, ticket):
+        if ticket['probe']:
+            self._open(settings.NASA_CIRCUIT_FAILURE_THRESHOLD, reopen=True)
+            cache.delete(self.probe_key)
+            return
+
+        cache.add(self.failures_key, 0, None)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:
+            return
+        if failures >= settings.NASA_CIRCUIT_FAILURE_THRESHOLD:
+            self._open(failures)
+
+    def describe(self):
+        cached = cache.get_many([self.state_key, self.failures_key])
+        opened = cached.get(self.state_key)
+        state = {'state': 'closed', 'failures': cached.get(self.failures_key, 0)}
+        if opened is not None:
+            state['state'] = 'open' if time.time() < opened['retry_at'] else 'half_open'
+            state['opened_at'] = opened['opened_at']
+            state['retry_at'] = opened['retry_at']
+        return state
+
+    def _check_retry(self, opened):
+        if time.time() < opened['retry_at']:
+            raise self._open_error(opened)
+
+    def _open(self, failures, reopen=False):
+        now = time.time()
+        opened = {'opened_at': now, 'retry_at': now + settings.NASA_CIRCUIT_RESET_TIMEOUT}
+        if reopen:
+            cache.set(self.state_key, opened, None)
+            logger.warning(f"NASA circuit for {self.host} reopened after a failed probe")
+        elif cache.add(self.state_key, opened, None):
+            logger.warning(f"NASA circuit for {self.host} opened after {failures} consecutive failures")
+
+    def _open_error(self, opened):
+        return CircuitOpenError(f"Circuit for {self.host} is open until {time.ctime(opened['retry_at'])}")
@@ -0,0 +1,57 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.messages import get_messages
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+def freshness(entry):
+    # Seconds the cached entry has left before its soft TTL, i.e. how long a
+    # client may reuse the response under the existing TTL policy.
+    return max(int(entry['fresh_until'] - time.time()), 0)
+
+
+def is_not_modified(request, etag, last_modified, strong_only=False):
+    # With strong_only, only an exact ETag match counts: Last-Modified tracks
+    # the shared payload, not the user's favorites, and a weak or * match says
+    # nothing about which stars the client holds.
+    if_none_match = request.headers.get('If-None-Match')
+    if strong_only:
+        return bool(if_none_match) and etag in parse_etags(if_none_match)
+    if if_none_match:
+        return etag in parse_etags(if_none_match) or '*' in parse_etags(if_none_match)
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+
+async def aconditional_response(request, etag, last_modified, build, max_age=0, per_user=False):
+    # Answers 304 when the client already holds this representation, otherwise
+    # awaits build() for the full response. Per-user pages are private and
+    # always revalidated, since favorite stars change without a new payload.
+    etag = f'"{etag}"'
+
+    if per_user and await sync_to_async(_has_pending_messages)(request):
+        # Flash messages are rendered once and must not be replaced by a 304.
+        return await build()
+
+    if is_not_modified(request, etag, last_modified, strong_only=per_user):
+        response = HttpResponseNotModified()
+    else:
+        response = await build()
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if per_user:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def _has_pending_messages(request):
+    # len() does not mark the messages as seen.
+    return len(get_messages(request)) > 0
@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import OperationalError, close_old_connections, connection, connections
+
+from .benchmark import percentile, seed_favorites
+from .models import Favorite
+
+
+def profiles():
+    # baseline is what settings used to be: rollback journal, default
+    # pragmas, a connection per request. production is the current settings.
+    default = settings.DATABASES['default']
+    return {
+        'baseline': {
+            'journal_mode': 'delete',
+            'settings': {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+        },
+        'production': {
+            'journal_mode': 'wal',
+            'settings': {
+                'OPTIONS': default.get('OPTIONS', {}),
+                'CONN_MAX_AGE': default.get('CONN_MAX_AGE', 0),
+                'CONN_HEALTH_CHECKS': default.get('CONN_HEALTH_CHECKS', False),
+            },
+        },
+        'production_read_only': {
+            'journal_mode': 'wal',
+            'settings': {
+                'OPTIONS': default.get('OPTIONS', {}),
+                'CONN_MAX_AGE': default.get('CONN_MAX_AGE', 0),
+                'CONN_HEALTH_CHECKS': default.get('CONN_HEALTH_CHECKS', False),
+            },
+            # Readers use what the favorites_read alias would.
+            'read_settings': {
+                'OPTIONS': settings.SQLITE_READ_ONLY_OPTIONS,
+                'CONN_MAX_AGE': default.get('CONN_MAX_AGE', 0),
+                'CONN_HEALTH_CHECKS': default.get('CONN_HEALTH_CHECKS', False),
+            },
+        },
+    }
+
+
+def seed(users, favorites_per_user):
+    user_ids = []
+    for i in range(users):
+        user = User.objects.create_user(username=f'db-benchmark-{i}', password='benchmark')
+        seed_favorites(user, favorites_per_user)
+        user_ids.append(user.pk)
+    return user_ids
+
+
+def run_profile(template_path, workdir, name, profile, writers, readers, duration, user_ids):
+    # Runs writer and reader processes against a fresh copy of the template
+    # database for `duration` seconds.
+    path = os.path.join(workdir, f'{name}.sqlite3')
+    shutil.copyfile(template_path, path)
+    with sqlite3.connect(path) as db:
+        db.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+
+    # Forked workers must not share the parent's connections.
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    start_at = time.time() + 0.5
+    processes = []
+    for i, role in enumerate(['write'] * writers + ['read'] * readers):
+        process = context.Process(
+            target=_worker,
+            args=(role, path, profile, user_ids, start_at, duration, i, queue)
+        )
+        process.start()
+        processes.append(process)
+
+    outcomes = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    result = {'profile': name, 'writers': writers, 'readers': readers, 'duration_s': duration}
+    for role in ('write', 'read'):
+        latencies = sorted(latency for r, worker_latencies, _ in outcomes if r == role for latency in worker_latencies)
+        errors = sum(worker_errors for r, _, worker_errors in outcomes if r == role)
+        result[role] = {
+            'ops': len(latencies),
+            'ops_per_s': round(len(latencies) / duration, 1),
+            'locked_errors': errors,
+            'p50_ms': _ms(percentile(latencies, 50)),
+            'p95_ms': _ms(percentile(latencies, 95)),
+            'p99_ms': _ms(percentile(latencies, 99)),
+        }
+    return result
+
+
+def _ms(value):
+    return None if value is None else round(value * 1000, 2)
+
+
+def _worker(role, path, profile, user_ids, start_at, duration, worker_id, queue):
+    db_settings = profile.get('read_settings', profile['settings']) if role == 'read' else profile['settings']
+    name = f'file:{path}?mode=ro' if role == 'read' and 'read_settings' in profile else path
+    connection.settings_dict.update(db_settings, NAME=name)
+    connection.close()
+
+    rng = random.Random(worker_id)
+    latencies = []
+    errors = 0
+    time.sleep(max(start_at - time.time(), 0))
+    end = start_at + duration
+    i = 0
+    while time.time() < end:
+        user_id = rng.choice(user_ids)
+        started = time.perf_counter()
+        try:
+            if role == 'write':
+                _toggle_favorite(user_id, f'{worker_id}-{i // 2}', add=i % 2 == 0)
+            else:
+                _read_favorites(user_id)
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+        # Ends the "request": closes the connection unless it is persistent.
+        close_old_connections()
+        i += 1
+
+    connection.close()
+    queue.put((role, latencies, errors))
+
+
+def _toggle_favorite(user_id, token, add):
+    # The queries add_to_favorites and remove_from_favorites make.
+    image_url = f'https://mars.nasa.gov/msl-raw-images/db-benchmark/{token}.jpg'
+    if add:
+        Favorite.objects.get_or_create(
+            user_id=user_id,
+            favorite_type='mars_rover',
+            image_url=image_url,
+            defaults={'title': 'Benchmark', 'description': 'Sol: 1000', 'api_data': {'img_src': image_url}},
+        )
+    else:
+        Favorite.objects.filter(user_id=user_id, favorite_type='mars_rover', image_url=image_url).delete()
+
+
+def _read_favorites(user_id):
+    # The first page of favorites_list.
+    list(
+        Favorite.objects.filter(user_id=user_id)
+        .defer('api_data', 'description')
+        .order_by('-created_at', '-id')[:24]
+    )
@@ -0,0 +1,79 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .models import Favorite
+
+# The version counter keeps sets current for writes made through the app.
+# Writes that skip record_favorite_changes() (the shell, bulk ORM updates,
+# deleting a user) leave a set stale for up to this long, so it is kept short;
+# a rebuild is a single query. No signal receivers cover them: a post_delete
+# receiver would cost the favorites batch endpoint a SELECT and a cache update
+# per removed row.
+FAVORITE_SET_TTL = 60 * 10
+
+
+def url_hash(url):
+    return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+
+def _cache_keys(user_id, favorite_type):
+    return f'favorite_urls_{user_id}_{favorite_type}', f'favorite_urls_version_{user_id}_{favorite_type}'
+
+
+def get_favorite_hashes(user_id, favorite_type):
+    # Hashes of every image URL the user has favorited with this type. Served
+    # from the cache while its version matches the user's mutation counter,
+    # otherwise rebuilt with a single query.
+    set_key, version_key = _cache_keys(user_id, favorite_type)
+    cached = cache.get_many([set_key, version_key])
+    hashes = _current_hashes(cached, set_key, version_key)
+    if hashes is not None:
+        return hashes
+
+    version = cached.get(version_key)
+    if version is None:
+        cache.add(version_key, 0, timeout=None)
+        version = cache.get(version_key, 0)
+
+    urls = Favorite.objects.filter(user_id=user_id, favorite_type=favorite_type).values_list('image_url', flat=True)
+    return _store(set_key, version, {url_hash(url) for url in urls})
+
+
+async def aget_favorite_hashes(user_id, favorite_type):
+    return await sync_to_async(get_favorite_hashes)(user_id, favorite_type)
+
+
+def _current_hashes(cached, set_key, version_key):
+    entry = cached.get(set_key)
+    if entry is None or cached.get(version_key) is None or entry['version'] != cached[version_key]:
+        return None
+    return entry['hashes']
+
+
+def _store(set_key, version, hashes):
+    cache.set(set_key, {'version': version, 'hashes': hashes}, FAVORITE_SET_TTL)
+    return hashes
+
+
+def record_favorite_changes(user_id, favorite_type, added=(), removed=()):
+    # Call after the database change has committed. Bumping the version first
+    # means a concurrent update that interleaves with this one leaves the set
+    # tagged with an old version, so the next read rebuilds it from the
+    # database instead of serving a lost update.
+    set_key, version_key = _cache_keys(user_id, favorite_type)
+    cache.add(version_key, 0, timeout=None)
+    try:
+        version = cache.incr(version_key)
+    except ValueError:
+        # Evicted between add and incr; readers will rebuild.
+        return
+
+    entry = cache.get(set_key)
+    if entry is None or entry['version'] != version - 1:
+        return
+
+    hashes = (entry['hashes'] | {url_hash(url) for url in added}) - {url_hash(url) for url in removed}
+    _store(set_key, version, hashes)
+
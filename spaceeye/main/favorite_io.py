@@ -0,0 +1,221 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .favorite_cache import record_favorite_changes
+from .models import Favorite
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_FIELDS = ['favorite_type', 'title', 'description', 'image_url', 'api_data', 'created_at']
+# Rows fetched per cursor round trip and written per streamed chunk.
+EXPORT_CHUNK_SIZE = 500
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 20
+
+
+def export_chunks(user_id, export_format):
+    # Yields the user's favorites, oldest first, a chunk of rows at a time.
+    # values_list skips model instances, and iterator() keeps only one chunk
+    # of rows in memory however many favorites the user has.
+    rows = (
+        Favorite.objects
+        .filter(user_id=user_id)
+        .order_by('id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    if export_format == 'csv':
+        writer = csv.writer(_LineBuffer())
+        yield writer.writerow(EXPORT_FIELDS)
+
+        def encode(row):
+            return writer.writerow([*row[:4], json.dumps(row[4]), row[5].isoformat()])
+    else:
+        def encode(row):
+            return json.dumps({**dict(zip(EXPORT_FIELDS, row)), 'created_at': row[5].isoformat()}) + '\n'
+
+    lines = []
+    for row in rows:
+        lines.append(encode(row))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+class _LineBuffer:
+    # csv.writer writes into this and writerow() returns the line.
+    def write(self, value):
+        return value
+
+
+async def aiterate(chunks):
+    # ASGI reads a sync iterator into memory before sending it, so an async
+    # response pulls each chunk on the request's sync thread instead.
+    chunks = iter(chunks)
+    while True:
+        chunk = await sync_to_async(next)(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def import_format(name, explicit=None):
+    if explicit in EXPORT_FORMATS:
+        return explicit
+    return 'csv' if (name or '').lower().endswith('.csv') else 'ndjson'
+
+
+def import_favorites(user, binary_file, import_format, batch_size=IMPORT_BATCH_SIZE, max_rows=None):
+    # Reads the file one line at a time and inserts it in batches, each in its
+    # own transaction, so memory stays flat and an error late in a large file
+    # keeps the batches before it. Rows matching an existing favorite by
+    # (favorite_type, image_url) are skipped, as are repeats within the file.
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        # Line numbers count the header, like a spreadsheet's rows.
+        records = ((reader.line_num, row) for row in reader)
+        parse = _parse_csv_row
+    else:
+        records = ((line_number, line) for line_number, line in enumerate(text, 1) if line.strip())
+        parse = _parse_ndjson_line
+
+    report = {'created': 0, 'skipped': 0, 'invalid': 0, 'truncated': False, 'errors': []}
+    batch = {}
+    rows = 0
+    try:
+        for line_number, record in records:
+            rows += 1
+            if max_rows is not None and rows > max_rows:
+                report['truncated'] = True
+                break
+            try:
+                favorite = _favorite_from_record(user, parse(record))
+            except ValueError as e:
+                report['invalid'] += 1
+                _report_error(report, line_number, str(e))
+                continue
+
+            key = (favorite.favorite_type, favorite.image_url)
+            if key in batch:
+                report['skipped'] += 1
+                continue
+            batch[key] = favorite
+            if len(batch) >= batch_size:
+                _write_batch(user, batch, report)
+                batch = {}
+    finally:
+        text.detach()
+
+    if batch:
+        _write_batch(user, batch, report)
+    return report
+
+
+def _parse_ndjson_line(line):
+    return _parse_json(line, 'Invalid JSON')
+
+
+def _parse_csv_row(row):
+    return {**row, 'api_data': _parse_json(row.get('api_data') or '{}', 'Invalid api_data JSON')}
+
+
+def _parse_json(value, error):
+    try:
+        return json.loads(value)
+    except ValueError:
+        raise ValueError(error)
+
+
+def _favorite_from_record(user, record):
+    if not isinstance(record, dict):
+        raise ValueError('Expected an object')
+
+    favorite_type = record.get('favorite_type')
+    if favorite_type not in dict(Favorite.FAVORITE_TYPES):
+        raise ValueError('Invalid type')
+
+    # No stricter than the favorites views, so any export imports back.
+    image_url = record.get('image_url')
+    if (
+        not isinstance(image_url, str)
+        or len(image_url) > Favorite._meta.get_field('image_url').max_length
+        or urlparse(image_url).scheme not in ('http', 'https')
+        or not urlparse(image_url).netloc
+    ):
+        raise ValueError('Invalid image URL')
+
+    api_data = record.get('api_data')
+    if not isinstance(api_data, dict):
+        raise ValueError('api_data must be an object')
+
+    return Favorite(
+        user=user,
+        favorite_type=favorite_type,
+        image_url=image_url,
+        title=str(record.get('title') or 'Untitled')[:255],
+        description=str(record.get('description') or ''),
+        api_data=api_data,
+        created_at=_parse_created_at(record.get('created_at')),
+    )
+
+
+def _parse_created_at(value):
+    # Restores keep the exported date; rows without one are stamped now.
+    if not value:
+        return timezone.now()
+    try:
+        created_at = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError('Invalid created_at')
+    if timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at, dt_timezone.utc)
+    return created_at
+
+
+def _write_batch(user, batch, report):
+    # One query finds which rows already exist, one inserts the rest.
+    # ignore_conflicts covers a favorite added between the two. Matching on
+    # the type as well lets the lookup use the unique index.
+    condition = Q()
+    for favorite_type in {favorite_type for favorite_type, _ in batch}:
+        condition |= Q(
+            favorite_type=favorite_type,
+            image_url__in=[image_url for key_type, image_url in batch if key_type == favorite_type],
+        )
+    with transaction.atomic():
+        existing = set(
+            Favorite.objects
+            .filter(condition, user=user)
+            .order_by()
+            .values_list('favorite_type', 'image_url')
+        )
+        new = [favorite for key, favorite in batch.items() if key not in existing]
+        Favorite.objects.bulk_create(new, ignore_conflicts=True)
+
+    report['created'] += len(new)
+    report['skipped'] += len(batch) - len(new)
+    for favorite_type in {favorite.favorite_type for favorite in new}:
+        record_favorite_changes(
+            user.pk,
+            favorite_type,
+            added=[favorite.image_url for favorite in new if favorite.favorite_type == favorite_type],
+        )
+
+
+def _report_error(report, line_number, error):
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line_number, 'error': error})
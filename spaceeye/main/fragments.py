@@ -0,0 +1,26 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .caching import content_hash
+
+# Fragments are keyed by the payload's ETag, so a refreshed payload renders
+# a new fragment and the old one simply expires.
+FRAGMENT_TTL = 60 * 60
+
+
+def fragment_key(template_name, *parts):
+    return f'fragment_{content_hash(template_name, *parts)}'
+
+
+async def arender_fragment(template_name, parts, get_context):
+    # Renders a user-independent part of a page once per parts and shares it
+    # across users and workers. get_context is only called on a miss. The
+    # template is rendered without a request, so it must not depend on the user.
+    key = fragment_key(template_name, *parts)
+    html = await cache.aget(key)
+    if html is None:
+        html = await sync_to_async(render_to_string, thread_sensitive=False)(template_name, get_context())
+        await cache.aset(key, html, FRAGMENT_TTL)
+    return mark_safe(html)
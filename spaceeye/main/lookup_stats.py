@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'nasa_lookup_stats'
+# Counts are merged into the shared cache at most this often per process.
+FLUSH_INTERVAL = 30
+# Older lookups count for half as much every HALF_LIFE seconds.
+HALF_LIFE = 60 * 60 * 6
+MAX_TARGETS = 500
+
+_pending = defaultdict(lambda: {'hit': 0, 'stale': 0, 'miss': 0})
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flushing = False
+
+
+def record(target, outcome):
+    # target names what was looked up, e.g. ('apod', '2024-01-01') or
+    # ('mars_rover', 'curiosity', 1000, 1); outcome is hit, stale or miss.
+    global _last_flush, _flushing
+
+    with _pending_lock:
+        _pending[target][outcome] += 1
+        if _flushing or time.monotonic() - _last_flush < FLUSH_INTERVAL:
+            return
+        _flushing = True
+        _last_flush = time.monotonic()
+
+    threading.Thread(target=_flush_in_background, daemon=True).start()
+
+
+def _flush_in_background():
+    global _flushing
+
+    try:
+        flush()
+    except Exception as e:
+        logger.error(f"Flushing lookup stats failed: {str(e)}")
+    finally:
+        with _pending_lock:
+            _flushing = False
+
+
+def flush():
+    # Merges this process's counts into the shared, decayed totals. Counts go
+    # back to pending if another worker holds the merge lock.
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+
+    lock_key = f'{STATS_KEY}_lock'
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, 10):
+        with _pending_lock:
+            for target, counts in pending.items():
+                for outcome, count in counts.items():
+                    _pending[target][outcome] += count
+        return
+
+    try:
+        now = time.time()
+        stats = cache.get(STATS_KEY) or {'updated': now, 'targets': {}}
+        decay = 0.5 ** ((now - stats['updated']) / HALF_LIFE)
+
+        targets = {}
+        for target, counts in stats['targets'].items():
+            targets[target] = {outcome: count * decay for outcome, count in counts.items()}
+        for target, counts in pending.items():
+            merged = targets.setdefault(target, {'hit': 0, 'stale': 0, 'miss': 0})
+            for outcome, count in counts.items():
+                merged[outcome] += count
+
+        ranked = sorted(targets.items(), key=lambda item: _score(item[1]), reverse=True)[:MAX_TARGETS]
+        cache.set(STATS_KEY, {'updated': now, 'targets': dict(ranked)}, None)
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def hot_targets(limit):
+    # The targets users most often found cold or stale, busiest first.
+    stats = cache.get(STATS_KEY)
+    if not stats:
+        return []
+    ranked = sorted(stats['targets'].items(), key=lambda item: _score(item[1]), reverse=True)
+    return [target for target, counts in ranked[:limit] if counts['miss'] + counts['stale'] > 0]
+
+
+def _score(counts):
+    # Cold and stale lookups are what warming saves; hits break ties.
+    return (counts['miss'] + counts['stale'], counts['hit'])
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from main.benchmark import ENDPOINTS, compare, run_benchmark, seed_favorites
+from main.stub_nasa import StubNasaServer
+
+
+class Command(BaseCommand):
+    help = 'Load-test the main pages against a local stub of the NASA API and save the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32],
+                            help='Concurrent clients per measured phase')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per phase')
+        parser.add_argument('--keys', type=int, default=10,
+                            help='Distinct dates or sols each phase cycles through')
+        parser.add_argument('--favorites', type=int, default=200, help='Favorites seeded for the benchmark user')
+        parser.add_argument('--latency', type=float, default=0.05, help='Stub upstream latency in seconds')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random upstream latency in seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of upstream calls answered with 500')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of upstream calls answered with 429')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--compare', help='Earlier results file to check for regressions')
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help='Allowed relative p95/throughput change before --compare fails')
+
+    def handle(self, *args, **options):
+        if min(options['concurrency']) < 1 or options['requests'] < 1 or options['keys'] < 1:
+            raise CommandError('--concurrency, --requests and --keys must be at least 1')
+        if options['error_rate'] + options['throttle_rate'] > 1:
+            raise CommandError('--error-rate and --throttle-rate must add up to at most 1')
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        stub = StubNasaServer(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            throttle_rate=options['throttle_rate'],
+            seed=options['seed'],
+        )
+        started_at = datetime.now()
+
+        # A throwaway database and cache, so runs neither see nor touch real data.
+        with tempfile.TemporaryDirectory() as workdir, stub:
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'db.sqlite3')
+            caches = {'default': {**settings.CACHES['default'], 'LOCATION': os.path.join(workdir, 'cache.sqlite3')}}
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                with override_settings(
+                    NASA_API_BASE_URL=stub.base_url,
+                    CACHES=caches,
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                ):
+                    user = User.objects.create_user(username='benchmark', password='benchmark')
+                    seed_favorites(user, options['favorites'])
+                    results = run_benchmark(
+                        user,
+                        options['endpoints'],
+                        options['concurrency'],
+                        options['requests'],
+                        options['keys'],
+                        stub=stub,
+                        log=self.stdout.write,
+                    )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'config': {
+                key: options[key] for key in (
+                    'endpoints', 'concurrency', 'requests', 'keys', 'favorites',
+                    'latency', 'jitter', 'error_rate', 'throttle_rate', 'seed',
+                )
+            },
+            'upstream_statuses': {str(status): count for status, count in sorted(stub.statuses.items())},
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Saved {len(results)} results to {options['output']}"))
+
+        if baseline is not None:
+            regressions = compare(baseline, report, options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from main.db_benchmark import profiles, run_profile, seed
+
+
+class Command(BaseCommand):
+    help = 'Compare SQLite profiles under concurrent favorite reads and writes from several processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Writer processes')
+        parser.add_argument('--readers', type=int, default=4, help='Reader processes')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds each profile runs')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--favorites', type=int, default=200, help='Favorites seeded per user')
+        parser.add_argument('--profiles', nargs='+', choices=list(profiles()), default=list(profiles()))
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['writers'] < 0 or options['readers'] < 0 or options['writers'] + options['readers'] < 1:
+            raise CommandError('Run at least one writer or reader')
+        if options['duration'] <= 0:
+            raise CommandError('--duration must be positive')
+
+        results = []
+        # Every profile starts from a copy of one seeded, migrated database.
+        with tempfile.TemporaryDirectory() as workdir:
+            template_path = os.path.join(workdir, 'template.sqlite3')
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = template_path
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                user_ids = seed(options['users'], options['favorites'])
+                connections.close_all()
+
+                for name in options['profiles']:
+                    result = run_profile(
+                        template_path, workdir, name, profiles()[name],
+                        options['writers'], options['readers'], options['duration'], user_ids
+                    )
+                    results.append(result)
+                    self.stdout.write(self._format(result))
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'config': {k: options[k] for k in ('writers', 'readers', 'duration', 'users', 'favorites')},
+                           'results': results}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['output']}"))
+
+    def _format(self, result):
+        lines = [result['profile']]
+        for role in ('write', 'read'):
+            stats = result[role]
+            lines.append(
+                f"  {role:<5} {stats['ops_per_s']:>8} ops/s  p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  "
+                f"p99 {stats['p99_ms']} ms  locked errors {stats['locked_errors']}"
+            )
+        return '\n'.join(lines)
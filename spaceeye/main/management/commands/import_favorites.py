@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main.favorite_io import EXPORT_FORMATS, IMPORT_BATCH_SIZE, import_favorites, import_format
+
+
+class Command(BaseCommand):
+    help = "Import a favorites export (NDJSON or CSV) into a user's favorites, skipping ones they already have"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help='File written by the favorites export')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), help='Default: csv for *.csv, else ndjson')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Favorites per bulk insert')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']}")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        try:
+            with open(options['path'], 'rb') as f:
+                report = import_favorites(
+                    user, f, import_format(options['path'], options['format']), batch_size=options['batch_size']
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} favorites, skipped {report['skipped']} duplicates "
+            f"and {report['invalid']} invalid rows"
+        ))
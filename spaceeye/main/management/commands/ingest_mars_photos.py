@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from main.catalog import ingest_sol
+from main.models import MarsCatalogSol
+from main.quota import BACKGROUND, priority
+
+
+class Command(BaseCommand):
+    help = 'Ingest Mars rover photos into the local catalog, continuing after the last ingested sol'
+
+    def add_arguments(self, parser):
+        parser.add_argument('rover', help='Rover name, e.g. curiosity')
+        parser.add_argument('--start-sol', type=int, help='First sol to ingest (default: after the last ingested sol)')
+        parser.add_argument('--end-sol', type=int, help='Last sol to ingest (default: start sol + 99)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Photos per bulk insert')
+        parser.add_argument('--force', action='store_true', help='Re-ingest sols that are already in the catalog')
+
+    def handle(self, *args, **options):
+        rover = options['rover'].lower()
+        start_sol = options['start_sol']
+        if start_sol is None:
+            last_sol = MarsCatalogSol.objects.filter(rover__name=rover).aggregate(last=Max('sol'))['last']
+            start_sol = 0 if last_sol is None else last_sol + 1
+        end_sol = options['end_sol'] if options['end_sol'] is not None else start_sol + 99
+
+        if start_sol > end_sol:
+            raise CommandError('--start-sol must not be after --end-sol')
+
+        done = set()
+        if not options['force']:
+            done = set(
+                MarsCatalogSol.objects.filter(rover__name=rover, sol__range=(start_sol, end_sol))
+                .values_list('sol', flat=True)
+            )
+
+        total = 0
+        for sol in range(start_sol, end_sol + 1):
+            if sol in done:
+                continue
+            try:
+                # A crawl waits for quota rather than starving interactive requests.
+                with priority(BACKGROUND, wait=True):
+                    count = ingest_sol(rover, sol, batch_size=options['batch_size'])
+            except Exception as e:
+                raise CommandError(f'Ingest of {rover} sol {sol} failed: {e}')
+            total += count
+            self.stdout.write(f'{rover} sol {sol}: {count} photos')
+
+        self.stdout.write(self.style.SUCCESS(f'Ingested {total} {rover} photos for sols {start_sol}..{end_sol}'))
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.quota import BACKGROUND, priority
+from main.nasa_data import prefetch_apod_range, APOD_PICKER_DAYS
+
+
+class Command(BaseCommand):
+    help = 'Backfill the APOD cache for a date range, one upstream request per chunk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to cache (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last date to cache (YYYY-MM-DD), defaults to today')
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=APOD_PICKER_DAYS,
+            help='Number of days fetched per upstream request'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            end_date = self._parse_date(options['end']) if options['end'] else datetime.now().date()
+            start_date = (
+                self._parse_date(options['start']) if options['start']
+                else end_date - timedelta(days=APOD_PICKER_DAYS - 1)
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if start_date > end_date:
+            raise CommandError('--start must not be after --end')
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        total = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end_date)
+            with priority(BACKGROUND, wait=True):
+                cached = prefetch_apod_range(chunk_start, chunk_end)
+            total += cached
+            self.stdout.write(f'{chunk_start} .. {chunk_end}: cached {cached} entries')
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Cached {total} APOD entries'))
+
+    def _parse_date(self, value):
+        return datetime.strptime(value, '%Y-%m-%d').date()
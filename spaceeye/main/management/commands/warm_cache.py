@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.nasa_data import target_key
+from main.warmer import Scheduler
+
+
+class Command(BaseCommand):
+    help = 'Keep the most requested APOD and Mars rover pages refreshed ahead of expiry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+        parser.add_argument('--top', type=int, help='Number of learned hot keys to keep warm')
+        parser.add_argument('--interval', type=int, help='Seconds between replanning passes')
+
+    def handle(self, *args, **options):
+        for option in ('top', 'interval'):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(f'--{option} must be at least 1')
+
+        scheduler = Scheduler(top=options['top'], interval=options['interval'])
+
+        if options['once']:
+            refreshed, _ = scheduler.run_once()
+            self._report(refreshed)
+            return
+
+        self.stdout.write(f'Warming the top {scheduler.top} keys, replanning every {scheduler.interval}s')
+        try:
+            scheduler.run_forever(on_pass=self._report)
+        except KeyboardInterrupt:
+            scheduler.stop.set()
+
+    def _report(self, refreshed):
+        for target in refreshed:
+            self.stdout.write(f'Refreshed {target_key(target)}')
+        self.stdout.write(self.style.SUCCESS(f'Warmed {len(refreshed)} keys'))
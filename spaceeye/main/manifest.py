@@ -0,0 +1,135 @@
+import bisect
+import logging
+
+from django.conf import settings
+
+from . import metrics, nasa_client
+from .caching import get_cached, aget_cached, cache_payload, cache_failure, refresh_in_background
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_TTL = 60 * 60 * 12
+
+
+def _manifest_cache_key(rover):
+    return f'mars_manifest_{rover}'
+
+
+def get_mission_manifest(rover):
+    # Never blocks on NASA: a missing or stale manifest is refreshed in the
+    # background and callers carry on without it.
+    cache_key = _manifest_cache_key(rover)
+    manifest, is_stale = get_cached(cache_key)
+    return _usable_manifest(cache_key, rover, manifest, is_stale)
+
+
+async def aget_mission_manifest(rover):
+    cache_key = _manifest_cache_key(rover)
+    manifest, is_stale = await aget_cached(cache_key)
+    return _usable_manifest(cache_key, rover, manifest, is_stale)
+
+
+def _usable_manifest(cache_key, rover, manifest, is_stale):
+    outcome = 'miss' if manifest is None else 'stale' if is_stale else 'hit'
+    metrics.inc('spaceeye_cache_lookups_total', type='mars_manifest', outcome=outcome)
+    if manifest is None or is_stale:
+        refresh_mission_manifest(rover)
+    if manifest is None or manifest.get('error'):
+        return None
+    return manifest
+
+
+def refresh_mission_manifest(rover):
+    refresh_in_background(_manifest_cache_key(rover), lambda: fetch_mission_manifest(rover))
+
+
+def fetch_mission_manifest(rover):
+    cache_key = _manifest_cache_key(rover)
+    url = f'{settings.NASA_API_BASE_URL}/mars-photos/api/v1/manifests/{rover}'
+
+    try:
+        response = nasa_client.get(url, params={'api_key': settings.NASA_API_KEY}, timeout=30)
+        response.raise_for_status()
+        manifest = _compact_manifest(response.json()['photo_manifest'])
+        return cache_payload(cache_key, manifest, MANIFEST_TTL)
+    except Exception as e:
+        logger.error(f"Mission manifest request for {rover} failed: {str(e)}")
+        return cache_failure(cache_key, {'error': f'Failed to load {rover} mission manifest'}, 60 * 5)
+
+
+def _compact_manifest(data):
+    sols = {}
+    for entry in data.get('photos', []):
+        if entry.get('total_photos'):
+            sols[entry['sol']] = {
+                'total_photos': entry['total_photos'],
+                'cameras': entry.get('cameras', []),
+                'earth_date': entry.get('earth_date'),
+            }
+
+    return {
+        'max_sol': data.get('max_sol', 0),
+        'max_date': data.get('max_date'),
+        'status': data.get('status', ''),
+        'total_photos': data.get('total_photos', 0),
+        'sols': sols,
+        'populated_sols': sorted(sols),
+    }
+
+
+def nearest_populated_sol(manifest, sol):
+    populated = manifest['populated_sols']
+    if not populated:
+        return None
+
+    index = bisect.bisect_left(populated, sol)
+    candidates = populated[max(index - 1, 0):index + 1]
+    return min(candidates, key=lambda candidate: (abs(candidate - sol), candidate))
+
+
+def empty_sol_payload(manifest, rover, sol, page):
+    # The payload aget_mars_rover_entry serves for a sol without photos,
+    # answered from the manifest instead of NASA. None when the sol has photos,
+    # or lies past max_sol: the rover may have sent photos since the manifest
+    # was fetched.
+    if manifest is None or sol in manifest['sols'] or sol > manifest['max_sol']:
+        return None
+
+    return {
+        'photos': [],
+        'source': 'mars_rover',
+        'rover_name': rover.title(),
+        'sol': sol,
+        'page': page,
+        'next_page': None,
+        'total_photos': 0,
+        'max_sol': manifest['max_sol'],
+        'out_of_range': False,
+        'suggested_sol': nearest_populated_sol(manifest, sol),
+    }
+
+
+def apply_manifest(manifest, data, page, page_size):
+    # The manifest knows the exact photo count of a sol, which the photos
+    # endpoint does not report, and the nearest sol to suggest when NASA has
+    # nothing past the end of the record.
+    if manifest is None or data.get('error'):
+        return data
+
+    if data.get('sol', 0) > manifest['max_sol'] and not data.get('total_photos'):
+        return {
+            **data,
+            'max_sol': manifest['max_sol'],
+            'out_of_range': True,
+            'suggested_sol': nearest_populated_sol(manifest, data['sol']),
+        }
+
+    if data.get('sol') not in manifest['sols']:
+        return data
+
+    total_photos = manifest['sols'][data['sol']]['total_photos']
+    return {
+        **data,
+        'total_photos': total_photos,
+        'next_page': page + 1 if page * page_size < total_photos else None,
+    }
@@ -0,0 +1,81 @@
+PHOTO_COLUMNS = ('id', 'sol', 'earth_date', 'img_src')
+ROVER_FIELDS = ('id', 'name', 'landing_date', 'launch_date', 'status')
+CAMERA_FIELDS = ('id', 'name', 'full_name')
+
+
+def compact_payload(data):
+    # Cached form of a Mars photos page: one column list per photo field, with
+    # the rover and camera records every photo repeats stored once and
+    # referenced by index. Fields the pages never render (the rover's camera
+    # list, max_sol, ...) are dropped.
+    photos = data.get('photos')
+    if not photos:
+        return data
+
+    strings = {}
+    rovers = {}
+    cameras = {}
+    table = {column: [] for column in PHOTO_COLUMNS}
+    table['rover'] = []
+    table['camera'] = []
+
+    for photo in photos:
+        for column in PHOTO_COLUMNS:
+            value = photo.get(column)
+            if isinstance(value, str):
+                # Equal strings become one object, which pickle writes once.
+                value = strings.setdefault(value, value)
+            table[column].append(value)
+
+        rover = tuple(_intern(strings, (photo.get('rover') or {}).get(field)) for field in ROVER_FIELDS)
+        camera = tuple(_intern(strings, (photo.get('camera') or {}).get(field)) for field in CAMERA_FIELDS)
+        table['rover'].append(rovers.setdefault(rover, len(rovers)))
+        table['camera'].append(cameras.setdefault(camera, len(cameras)))
+
+    table['rovers'] = list(rovers)
+    table['cameras'] = list(cameras)
+
+    compact = {key: value for key, value in data.items() if key != 'photos'}
+    compact['photo_table'] = table
+    return compact
+
+
+def inflate_payload(data):
+    # The Mars Photos API shape the templates and JSON clients expect.
+    if 'photo_table' not in data:
+        return data
+
+    inflated = {key: value for key, value in data.items() if key != 'photo_table'}
+    inflated['photos'] = inflate_photos(data['photo_table'])
+    return inflated
+
+
+def inflate_photos(table):
+    rovers = [dict(zip(ROVER_FIELDS, rover)) for rover in table['rovers']]
+    cameras = [dict(zip(CAMERA_FIELDS, camera)) for camera in table['cameras']]
+
+    photos = []
+    for i, photo_id in enumerate(table['id']):
+        rover = rovers[table['rover'][i]]
+        photos.append({
+            'id': photo_id,
+            'sol': table['sol'][i],
+            'earth_date': table['earth_date'][i],
+            'img_src': table['img_src'][i],
+            'camera': {**cameras[table['camera'][i]], 'rover_id': rover['id']},
+            'rover': rover,
+        })
+    return photos
+
+
+def photo_urls(data):
+    # Image URLs of a compact or inflated payload, without inflating it.
+    if 'photo_table' in data:
+        return data['photo_table']['img_src']
+    return [photo['img_src'] for photo in data.get('photos', [])]
+
+
+def _intern(strings, value):
+    if isinstance(value, str):
+        return strings.setdefault(value, value)
+    return value
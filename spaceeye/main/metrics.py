@@ -0,0 +1,199 @@
+import bisect
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Every worker counts in memory and merges its increments into one shared
+# total at most every FLUSH_INTERVAL seconds, so recording costs a dict update
+# and /metrics reports the whole host. The key ends in _stats so the tiered
+# cache never merges into a worker's stale local copy.
+TOTALS_KEY = 'metrics_stats'
+FLUSH_INTERVAL = 15
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'spaceeye_request_duration_seconds': ('histogram', 'Time spent producing a response, per view', LATENCY_BUCKETS),
+    'spaceeye_request_db_queries': ('histogram', 'Database queries per request, per view', QUERY_BUCKETS),
+    'spaceeye_upstream_duration_seconds': ('histogram', 'NASA API call latency including retries', LATENCY_BUCKETS),
+    'spaceeye_upstream_responses_total': ('counter', 'NASA API calls by endpoint and status', None),
+    'spaceeye_cache_lookups_total': ('counter', 'NASA payload cache lookups by data type and outcome', None),
+}
+
+_pending = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flushing = False
+
+_query_counter = contextvars.ContextVar('metrics_query_counter', default=None)
+
+
+def inc(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _pending_lock:
+        _pending[key] = _pending.get(key, 0) + value
+    _maybe_flush()
+
+
+def observe(name, value, **labels):
+    buckets = METRICS[name][2]
+    key = (name, tuple(sorted(labels.items())))
+    index = bisect.bisect_left(buckets, value)
+    with _pending_lock:
+        histogram = _pending.get(key)
+        if histogram is None:
+            histogram = _pending[key] = {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+        histogram['buckets'][index] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+    _maybe_flush()
+
+
+def observe_upstream(url, status, duration):
+    endpoint = upstream_endpoint(url)
+    inc('spaceeye_upstream_responses_total', endpoint=endpoint, status=str(status))
+    observe('spaceeye_upstream_duration_seconds', duration, endpoint=endpoint)
+
+
+def upstream_endpoint(url):
+    path = urlparse(url).path
+    if path.endswith('/planetary/apod'):
+        return 'apod'
+    if '/manifests/' in path:
+        return 'mars_manifest'
+    if '/rovers/' in path and path.endswith('/photos'):
+        return 'mars_photos'
+    return 'image'
+
+
+def _maybe_flush():
+    global _last_flush, _flushing
+
+    with _pending_lock:
+        if _flushing or time.monotonic() - _last_flush < FLUSH_INTERVAL:
+            return
+        _flushing = True
+        _last_flush = time.monotonic()
+
+    threading.Thread(target=_flush_in_background, daemon=True).start()
+
+
+def _flush_in_background():
+    global _flushing
+
+    try:
+        flush()
+    except Exception as e:
+        logger.error(f"Flushing metrics failed: {str(e)}")
+    finally:
+        with _pending_lock:
+            _flushing = False
+
+
+def flush():
+    # Returns whether this process's increments made it into the shared totals.
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return True
+
+    lock_key = f'{TOTALS_KEY}_lock'
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, 10):
+        with _pending_lock:
+            for key, value in pending.items():
+                _pending[key] = _merge(_pending.get(key), value)
+        return False
+
+    try:
+        totals = cache.get(TOTALS_KEY) or {}
+        for key, value in pending.items():
+            totals[key] = _merge(totals.get(key), value)
+        cache.set(TOTALS_KEY, totals, None)
+        return True
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _merge(total, value):
+    if total is None:
+        return value if not isinstance(value, dict) else {**value, 'buckets': list(value['buckets'])}
+    if not isinstance(value, dict):
+        return total + value
+    return {
+        'buckets': [a + b for a, b in zip(total['buckets'], value['buckets'])],
+        'sum': total['sum'] + value['sum'],
+        'count': total['count'] + value['count'],
+    }
+
+
+def render():
+    # The shared totals in the Prometheus text exposition format.
+    flush()
+    totals = cache.get(TOTALS_KEY) or {}
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (metric, labels), value in totals.items() if metric == name)
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip([*buckets, '+Inf'], value['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f"{name}_sum{_labels(labels)} {round(value['sum'], 6)}")
+            lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def start_query_count():
+    # Queries run while the returned counter is current are added to it,
+    # including those run on sync_to_async threads, which copy the context.
+    counter = [0]
+    return counter, _query_counter.set(counter)
+
+
+def stop_query_count(token):
+    _query_counter.reset(token)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    # First in the list: connection.execute_wrapper() pops the last wrapper
+    # when its block ends.
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+connection_created.connect(_install_query_counter)
@@ -0,0 +1,50 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    # Times every request and counts its database queries, labelled by the
+    # view's URL name. Works in both modes, so async views stay async.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        counter, token = metrics.start_query_count()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.stop_query_count(token)
+        self._record(request, response, time.perf_counter() - started, counter[0])
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        counter, token = metrics.start_query_count()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.stop_query_count(token)
+        self._record(request, response, time.perf_counter() - started, counter[0])
+        return response
+
+    def _record(self, request, response, duration, queries):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        metrics.observe(
+            'spaceeye_request_duration_seconds', duration,
+            view=view, method=request.method, status=str(response.status_code)
+        )
+        metrics.observe('spaceeye_request_db_queries', queries, view=view)
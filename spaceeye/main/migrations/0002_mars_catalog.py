@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarsRover',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('nasa_id', models.IntegerField(blank=True, null=True)),
+                ('landing_date', models.DateField(blank=True, null=True)),
+                ('launch_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(blank=True, max_length=20)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MarsCamera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nasa_id', models.IntegerField(blank=True, null=True)),
+                ('name', models.CharField(max_length=20)),
+                ('full_name', models.CharField(blank=True, max_length=255)),
+                ('rover', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cameras', to='main.marsrover')),
+            ],
+            options={
+                'unique_together': {('rover', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MarsPhoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nasa_id', models.BigIntegerField(unique=True)),
+                ('sol', models.IntegerField()),
+                ('earth_date', models.DateField()),
+                ('img_src', models.URLField(max_length=500)),
+                ('camera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photos', to='main.marscamera')),
+                ('rover', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photos', to='main.marsrover')),
+            ],
+            options={
+                'ordering': ['nasa_id'],
+                'indexes': [models.Index(fields=['rover', 'sol'], name='marsphoto_rover_sol_idx'), models.Index(fields=['rover', 'earth_date'], name='marsphoto_rover_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MarsCatalogSol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sol', models.IntegerField()),
+                ('photo_count', models.IntegerField(default=0)),
+                ('ingested_at', models.DateTimeField(auto_now=True)),
+                ('rover', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingested_sols', to='main.marsrover')),
+            ],
+            options={
+                'unique_together': {('rover', 'sol')},
+            },
+        ),
+    ]
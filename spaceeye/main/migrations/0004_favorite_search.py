@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# Rover, camera and date live in api_data, so the triggers pull them out with
+# json_extract. The owner and kind columns only filter, so each holds a single
+# token (u42, marsrover) that FTS5 can intersect without reading positions;
+# bm25 gives them no weight, and title matches count most.
+COLUMNS = 'rowid, owner, kind, title, description, rover, camera, earth_date'
+
+
+def _values(row):
+    return f"""
+        {row}.id,
+        'u' || {row}.user_id,
+        replace({row}.favorite_type, '_', ''),
+        {row}.title,
+        {row}.description,
+        json_extract({row}.api_data, '$.rover.name'),
+        trim(coalesce(json_extract({row}.api_data, '$.camera.name'), '') || ' ' ||
+             coalesce(json_extract({row}.api_data, '$.camera.full_name'), '')),
+        coalesce(json_extract({row}.api_data, '$.earth_date'), json_extract({row}.api_data, '$.date'))
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_favorite_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE VIRTUAL TABLE main_favorite_search USING fts5(
+                    owner, kind, title, description, rover, camera, earth_date,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                )
+                """,
+                """
+                INSERT INTO main_favorite_search(main_favorite_search, rank)
+                VALUES ('rank', 'bm25(0.0, 0.0, 10.0, 1.0, 4.0, 4.0, 2.0)')
+                """,
+                f"""
+                CREATE TRIGGER main_favorite_search_insert AFTER INSERT ON main_favorite BEGIN
+                    INSERT INTO main_favorite_search({COLUMNS}) VALUES ({_values('new')});
+                END
+                """,
+                f"""
+                CREATE TRIGGER main_favorite_search_update AFTER UPDATE ON main_favorite BEGIN
+                    DELETE FROM main_favorite_search WHERE rowid = old.id;
+                    INSERT INTO main_favorite_search({COLUMNS}) VALUES ({_values('new')});
+                END
+                """,
+                """
+                CREATE TRIGGER main_favorite_search_delete AFTER DELETE ON main_favorite BEGIN
+                    DELETE FROM main_favorite_search WHERE rowid = old.id;
+                END
+                """,
+                f"INSERT INTO main_favorite_search({COLUMNS}) SELECT {_values('main_favorite')} FROM main_favorite",
+            ],
+            reverse_sql=[
+                'DROP TRIGGER main_favorite_search_insert',
+                'DROP TRIGGER main_favorite_search_update',
+                'DROP TRIGGER main_favorite_search_delete',
+                'DROP TABLE main_favorite_search',
+            ],
+        ),
+    ]
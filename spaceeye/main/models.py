@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class Favorite(models.Model):
@@ -14,11 +15,77 @@ class Favorite(models.Model):
     description = models.TextField(blank=True)
     image_url = models.URLField()
     api_data = models.JSONField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so imports can keep the exported date.
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ['user', 'favorite_type', 'image_url']
         ordering = ['-created_at']
+        # Keyset pagination of the favorites page walks (created_at, id) per
+        # user, with or without a type filter.
+        indexes = [
+            models.Index(fields=['user', 'favorite_type', 'created_at', 'id'], name='favorite_user_type_created_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='favorite_user_created_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.title}"
\ No newline at end of file
+        return f"{self.user.username} - {self.title}"
+
+
+class MarsRover(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    nasa_id = models.IntegerField(null=True, blank=True)
+    landing_date = models.DateField(null=True, blank=True)
+    launch_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=20, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class MarsCamera(models.Model):
+    rover = models.ForeignKey(MarsRover, on_delete=models.CASCADE, related_name='cameras')
+    nasa_id = models.IntegerField(null=True, blank=True)
+    name = models.CharField(max_length=20)
+    full_name = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        unique_together = ['rover', 'name']
+
+    def __str__(self):
+        return f"{self.rover.name} - {self.name}"
+
+
+class MarsPhoto(models.Model):
+    nasa_id = models.BigIntegerField(unique=True)
+    rover = models.ForeignKey(MarsRover, on_delete=models.CASCADE, related_name='photos')
+    # The camera foreign key carries its own index.
+    camera = models.ForeignKey(MarsCamera, on_delete=models.CASCADE, related_name='photos')
+    sol = models.IntegerField()
+    earth_date = models.DateField()
+    img_src = models.URLField(max_length=500)
+
+    class Meta:
+        ordering = ['nasa_id']
+        indexes = [
+            models.Index(fields=['rover', 'sol'], name='marsphoto_rover_sol_idx'),
+            models.Index(fields=['rover', 'earth_date'], name='marsphoto_rover_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.rover.name} sol {self.sol} - {self.nasa_id}"
+
+
+class MarsCatalogSol(models.Model):
+    # Written once every upstream page of a sol has been ingested; until then
+    # the sol is served from the API.
+    rover = models.ForeignKey(MarsRover, on_delete=models.CASCADE, related_name='ingested_sols')
+    sol = models.IntegerField()
+    photo_count = models.IntegerField(default=0)
+    ingested_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['rover', 'sol']
+
+    def __str__(self):
+        return f"{self.rover.name} sol {self.sol} ({self.photo_count} photos)"
@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlparse
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from . import metrics, quota
+from .circuit import CircuitBreaker, CircuitOpenError
+from .quota import QuotaExceededError
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_MAX = 10
+# The longest per-attempt timeout any caller passes (APOD ranges, manifests,
+# image downloads).
+MAX_TIMEOUT = 30
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+# Set by spaceeye/asgi.py. Under WSGI every async view runs on a throwaway
+# event loop, so an httpx client per loop would never be reused.
+_long_lived_loop = False
+# Breakers hold no state of their own, only the cache keys of their host.
+_breakers = {}
+
+
+class _CountingRetry(Retry):
+    # urllib3 builds a fresh Retry for every attempt, so the counter lives on
+    # the client and is handed down through new().
+    def __init__(self, *args, counter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counter = counter
+
+    def new(self, **kwargs):
+        kwargs['counter'] = self.counter
+        return super().new(**kwargs)
+
+    def increment(self, *args, **kwargs):
+        if self.counter is not None:
+            self.counter()
+        return super().increment(*args, **kwargs)
+
+
+class NasaClient:
+    def __init__(self, pool_size, max_retries, backoff_factor):
+        self.pid = os.getpid()
+        self.pool_size = pool_size
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'throttled': 0}
+
+        retry = _CountingRetry(
+            total=max_retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({'GET'}),
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_factor,
+            backoff_max=BACKOFF_MAX,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+            counter=self._count_retry,
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+    def get(self, url, params=None, timeout=10):
+        metered = _uses_api_key(params)
+        if metered:
+            try:
+                quota_ticket = quota.acquire()
+            except QuotaExceededError:
+                self._count('throttled')
+                metrics.inc('spaceeye_upstream_responses_total', endpoint=metrics.upstream_endpoint(url), status='throttled')
+                raise
+
+        breaker = get_breaker(url)
+        try:
+            ticket = breaker.before_request()
+        except CircuitOpenError:
+            self._count('rejected')
+            metrics.inc('spaceeye_upstream_responses_total', endpoint=metrics.upstream_endpoint(url), status='circuit_open')
+            if metered:
+                quota.release(quota_ticket)
+            raise
+
+        self._count('requests')
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, timeout=timeout)
+        except requests.exceptions.RequestException:
+            self._count('errors')
+            metrics.observe_upstream(url, 'error', time.perf_counter() - started)
+            breaker.record_failure(ticket)
+            raise
+
+        metrics.observe_upstream(url, response.status_code, time.perf_counter() - started)
+        if metered:
+            quota.record_response(response.headers)
+        if response.status_code >= 500:
+            breaker.record_failure(ticket)
+        else:
+            breaker.record_success(ticket)
+        return response
+
+    def get_stats(self):
+        pools = []
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                'host': pool.host,
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle_connections': pool.pool.qsize() if pool.pool else 0,
+            })
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['pool_size'] = self.pool_size
+        stats['pools'] = pools
+        stats['circuits'] = {host: breaker.describe() for host, breaker in list(_breakers.items())}
+        stats['quota'] = quota.describe()
+        return stats
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _count_retry(self):
+        self._count('retries')
+
+
+class AsyncNasaClient:
+    # httpx counterpart of NasaClient. Responses are converted to
+    # requests.Response and errors to requests exceptions so the fetchers
+    # handle both clients the same way.
+    def __init__(self, pool_size, max_retries, backoff_factor, counter):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.counter = counter
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+
+    async def get(self, url, params=None, timeout=10):
+        metered = _uses_api_key(params)
+        if metered:
+            try:
+                quota_ticket = await quota.aacquire()
+            except QuotaExceededError:
+                self.counter('throttled')
+                metrics.inc('spaceeye_upstream_responses_total', endpoint=metrics.upstream_endpoint(url), status='throttled')
+                raise
+
+        breaker = get_breaker(url)
+        try:
+            ticket = await breaker.abefore_request()
+        except CircuitOpenError:
+            self.counter('rejected')
+            metrics.inc('spaceeye_upstream_responses_total', endpoint=metrics.upstream_endpoint(url), status='circuit_open')
+            if metered:
+                await sync_to_async(quota.release, thread_sensitive=False)(quota_ticket)
+            raise
+
+        self.counter('requests')
+        started = time.perf_counter()
+        try:
+            response = await self._get_with_retries(url, params, timeout)
+        except requests.exceptions.RequestException:
+            metrics.observe_upstream(url, 'error', time.perf_counter() - started)
+            await sync_to_async(breaker.record_failure, thread_sensitive=False)(ticket)
+            raise
+
+        metrics.observe_upstream(url, response.status_code, time.perf_counter() - started)
+        if metered:
+            await sync_to_async(quota.record_response, thread_sensitive=False)(response.headers)
+        if response.status_code >= 500:
+            await sync_to_async(breaker.record_failure, thread_sensitive=False)(ticket)
+        elif ticket['probe'] or ticket['failures']:
+            await sync_to_async(breaker.record_success, thread_sensitive=False)(ticket)
+        return response
+
+    async def _get_with_retries(self, url, params, timeout):
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(url, params=params, timeout=timeout)
+            except httpx.HTTPError as e:
+                if attempt < self.max_retries:
+                    attempt += 1
+                    await self._backoff(attempt)
+                    continue
+                self.counter('errors')
+                if isinstance(e, httpx.TimeoutException):
+                    raise requests.exceptions.Timeout(str(e)) from e
+                raise requests.exceptions.ConnectionError(str(e)) from e
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                attempt += 1
+                await self._backoff(attempt)
+                continue
+
+            return _to_requests_response(response)
+
+    async def _backoff(self, attempt):
+        self.counter('retries')
+        delay = self.backoff_factor * (2 ** (attempt - 1)) + random.uniform(0, self.backoff_factor)
+        await asyncio.sleep(min(delay, BACKOFF_MAX))
+
+
+def _to_requests_response(response):
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.url = str(response.url)
+    converted.encoding = response.encoding
+    converted._content = response.content
+    return converted
+
+
+def get_client():
+    # One client per process; a forked worker builds its own pool.
+    global _client
+
+    with _client_lock:
+        if _client is None or _client.pid != os.getpid():
+            _client = NasaClient(
+                pool_size=settings.NASA_HTTP_POOL_SIZE,
+                max_retries=settings.NASA_HTTP_MAX_RETRIES,
+                backoff_factor=settings.NASA_HTTP_BACKOFF_FACTOR,
+            )
+        return _client
+
+
+def _uses_api_key(params):
+    # Only calls made with our API key count against its hourly quota;
+    # image downloads do not.
+    return bool(params) and 'api_key' in params
+
+
+def get_breaker(url):
+    host = urlparse(url).netloc
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers.setdefault(host, CircuitBreaker(host))
+    return breaker
+
+
+def get(url, params=None, timeout=10):
+    return get_client().get(url, params=params, timeout=timeout)
+
+
+def worst_case_duration(timeout=MAX_TIMEOUT):
+    # Seconds a call can take when every attempt times out and each retry
+    # waits its longest backoff, jitter included.
+    retries = settings.NASA_HTTP_MAX_RETRIES
+    factor = settings.NASA_HTTP_BACKOFF_FACTOR
+    backoff = sum(min(factor * 2 ** (attempt - 1) + factor, BACKOFF_MAX) for attempt in range(1, retries + 1))
+    return (retries + 1) * timeout + backoff
+
+
+def get_stats():
+    return get_client().get_stats()
+
+
+def use_event_loop():
+    # Called once by the ASGI entry point, whose event loop lives as long as
+    # the worker.
+    global _long_lived_loop
+    _long_lived_loop = True
+
+
+def uses_event_loop():
+    return _long_lived_loop and httpx is not None
+
+
+def get_async_client():
+    # httpx clients are bound to the event loop that created them.
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncNasaClient(
+            pool_size=settings.NASA_HTTP_POOL_SIZE,
+            max_retries=settings.NASA_HTTP_MAX_RETRIES,
+            backoff_factor=settings.NASA_HTTP_BACKOFF_FACTOR,
+            counter=get_client()._count,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aget(url, params=None, timeout=10):
+    if not uses_event_loop():
+        return await sync_to_async(get, thread_sensitive=False)(url, params=params, timeout=timeout)
+    return await get_async_client().get(url, params=params, timeout=timeout)
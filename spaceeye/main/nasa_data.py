@@ -0,0 +1,213 @@
+import logging
+from datetime import timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import nasa_client
+from .caching import cache_payload, cache_failure
+from .catalog import get_catalog_page, mars_photos_url
+from .mars_payload import compact_payload
+
+# Fetching and caching of NASA payloads, shared by the views and the cache
+# warmer. Every fetch writes the cache key the views read.
+
+logger = logging.getLogger(__name__)
+
+APOD_PICKER_DAYS = 30
+MARS_ROVERS = ['curiosity', 'opportunity', 'spirit', 'perseverance']
+# The Mars Photos API serves 25 photos per page; one of our pages is one upstream page.
+MARS_PAGE_SIZE = 25
+
+
+def target_key(target):
+    # The cache key of a lookup target: ('apod', date) or
+    # ('mars_rover', rover, sol, page).
+    if target[0] == 'apod':
+        return apod_cache_key(target[1])
+    return mars_rover_cache_key(*target[1:])
+
+
+def apod_cache_key(date):
+    return f'nasa_apod_data_{date or "today"}'
+
+
+def _apod_request(date):
+    url = f'{settings.NASA_API_BASE_URL}/planetary/apod'
+    params = {'api_key': settings.NASA_API_KEY}
+
+    if date:
+        params['date'] = date
+
+    return url, params
+
+
+def fetch_apod_data(cache_key, date):
+    url, params = _apod_request(date)
+
+    try:
+        response = nasa_client.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        return _cache_apod_data(cache_key, date, response.json())
+    except Exception as e:
+        return _apod_failure(cache_key, e)
+
+
+async def afetch_apod_data(cache_key, date):
+    url, params = _apod_request(date)
+
+    try:
+        response = await nasa_client.aget(url, params=params, timeout=10)
+        response.raise_for_status()
+        return await sync_to_async(_cache_apod_data, thread_sensitive=False)(cache_key, date, response.json())
+    except Exception as e:
+        return await sync_to_async(_apod_failure, thread_sensitive=False)(cache_key, e)
+
+
+def _cache_apod_data(cache_key, date, data):
+    data['source'] = 'apod'
+
+    if data.get('media_type') != 'image':
+        data['error'] = 'Video available for this date instead of image'
+        return cache_payload(cache_key, data, 60 * 60)
+
+    cache_time = 60 * 60 * 24 if date else 60 * 60 * 2
+    return cache_payload(cache_key, data, cache_time)
+
+
+def _apod_failure(cache_key, e):
+    if isinstance(e, requests.exceptions.RequestException):
+        logger.error(f"NASA APOD API request failed: {str(e)}")
+        data = {'error': 'Failed to load APOD data', 'source': 'apod'}
+    else:
+        logger.error(f"Unexpected error in APOD: {str(e)}")
+        data = {'error': 'Internal server error', 'source': 'apod'}
+
+    return cache_failure(cache_key, data, 60 * 5)
+
+
+def prefetch_apod_range(start_date, end_date):
+    # One upstream call for the whole range, written into the per-date keys
+    # aget_apod_entry reads. Failures are logged and leave those keys alone.
+    url, params = _apod_request(None)
+    params['start_date'] = start_date.strftime('%Y-%m-%d')
+    params['end_date'] = end_date.strftime('%Y-%m-%d')
+
+    try:
+        response = nasa_client.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        items = response.json()
+    except Exception as e:
+        logger.error(f"NASA APOD range request {params['start_date']}..{params['end_date']} failed: {str(e)}")
+        return 0
+
+    for item in items:
+        if item.get('date'):
+            _cache_apod_data(apod_cache_key(item['date']), item['date'], item)
+
+    return len(items)
+
+
+def warm_apod_picker(today):
+    start_date = today - timedelta(days=APOD_PICKER_DAYS - 1)
+    cached = prefetch_apod_range(start_date, today)
+    if not cached:
+        # NASA rejects end dates past its own (US Eastern) "today".
+        cached = prefetch_apod_range(start_date, today - timedelta(days=1))
+
+    return cache_payload(apod_picker_key(today), {'cached': cached}, 60 * 60)
+
+
+def apod_picker_key(today):
+    return f'nasa_apod_picker_{today}'
+
+
+def mars_rover_cache_key(rover, sol, page):
+    if page == 1:
+        return f'mars_rover_{rover}_{sol}'
+    return f'mars_rover_{rover}_{sol}_p{page}'
+
+
+def _mars_rover_request(rover, sol, page):
+    url = mars_photos_url(rover)
+    params = {
+        'api_key': settings.NASA_API_KEY,
+        'sol': sol,
+        'page': page
+    }
+    return url, params
+
+
+def fetch_mars_rover_data(cache_key, rover, sol, page):
+    url, params = _mars_rover_request(rover, sol, page)
+
+    try:
+        data = get_catalog_page(rover, sol, page, MARS_PAGE_SIZE)
+        if data is not None:
+            return _cache_mars_rover_data(cache_key, rover, sol, page, data)
+
+        response = nasa_client.get(url, params=params, timeout=15)
+        response.raise_for_status()
+        return _cache_mars_rover_data(cache_key, rover, sol, page, response.json())
+    except Exception as e:
+        return _mars_rover_failure(cache_key, rover, sol, page, e)
+
+
+async def afetch_mars_rover_data(cache_key, rover, sol, page):
+    url, params = _mars_rover_request(rover, sol, page)
+
+    try:
+        data = await sync_to_async(get_catalog_page)(rover, sol, page, MARS_PAGE_SIZE)
+        if data is not None:
+            return await sync_to_async(_cache_mars_rover_data, thread_sensitive=False)(
+                cache_key, rover, sol, page, data
+            )
+
+        response = await nasa_client.aget(url, params=params, timeout=15)
+        response.raise_for_status()
+        return await sync_to_async(_cache_mars_rover_data, thread_sensitive=False)(
+            cache_key, rover, sol, page, response.json()
+        )
+    except Exception as e:
+        return await sync_to_async(_mars_rover_failure, thread_sensitive=False)(cache_key, rover, sol, page, e)
+
+
+def _cache_mars_rover_data(cache_key, rover, sol, page, data):
+    photos = data.setdefault('photos', [])
+
+    if 'total_photos' in data:
+        # Catalog pages know the exact total for the sol.
+        has_next = page * MARS_PAGE_SIZE < data['total_photos']
+    else:
+        # The API does not report a total; it is a lower bound until next_page is None.
+        has_next = len(photos) == MARS_PAGE_SIZE
+        data['total_photos'] = (page - 1) * MARS_PAGE_SIZE + len(photos)
+    data['page'] = page
+    data['next_page'] = page + 1 if has_next else None
+    data['source'] = 'mars_rover'
+    data['rover_name'] = rover.title()
+    data['sol'] = sol
+
+    return cache_payload(cache_key, compact_payload(data), 60 * 60 * 24 * 7)
+
+
+def _mars_rover_failure(cache_key, rover, sol, page, e):
+    if isinstance(e, requests.exceptions.RequestException):
+        logger.error(f"Mars Rover API request failed: {str(e)}")
+        data = {
+            'error': f'Failed to load {rover} photos for sol {sol}',
+            'source': 'mars_rover',
+            'photos': [],
+            'page': page
+        }
+    else:
+        logger.error(f"Unexpected error in Mars Rover: {str(e)}")
+        data = {
+            'error': 'Internal server error',
+            'source': 'mars_rover',
+            'photos': [],
+            'page': page
+        }
+
+    return cache_failure(cache_key, data, 60 * 5)
@@ -0,0 +1,166 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import math
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+# Tokens are counted per window; each window's budget is the remaining hourly
+# quota spread over the hour, times NASA_QUOTA_BURST.
+WINDOW = 60
+QUOTA_HORIZON = 60 * 60
+# Below this share of the hourly limit, only interactive calls go through.
+BACKGROUND_RESERVE = 0.1
+
+REMAINING_KEY = 'nasa_remaining_quota'
+
+_priority = contextvars.ContextVar('nasa_quota_priority', default=(INTERACTIVE, False))
+
+
+class QuotaExceededError(requests.exceptions.ConnectionError):
+    # A requests exception, so fetchers fall back to the last good payload.
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@contextlib.contextmanager
+def priority(level, wait=False):
+    # Upstream calls made inside the block draw from the bucket at this
+    # priority. With wait=True an empty bucket blocks until the next window
+    # instead of raising, for jobs that would rather be slow than skip work.
+    token = _priority.set((level, wait))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def acquire():
+    # Returns a ticket for release(), or raises QuotaExceededError.
+    level, wait = _priority.get()
+    while True:
+        remaining = cache.get(REMAINING_KEY)
+        ticket = _window_key(time.time())
+        used = _take(ticket)
+        allowed, retry_after = _check(used, remaining, level)
+        if allowed:
+            return ticket
+        release(ticket)
+        if not wait:
+            raise QuotaExceededError(f"NASA API quota budget exhausted for {level} calls", retry_after)
+        time.sleep(retry_after)
+
+
+async def aacquire():
+    level, wait = _priority.get()
+    while True:
+        remaining = await cache.aget(REMAINING_KEY)
+        ticket = _window_key(time.time())
+        used = await _atake(ticket)
+        allowed, retry_after = _check(used, remaining, level)
+        if allowed:
+            return ticket
+        try:
+            await cache.adecr(ticket)
+        except ValueError:
+            pass
+        if not wait:
+            raise QuotaExceededError(f"NASA API quota budget exhausted for {level} calls", retry_after)
+        await asyncio.sleep(retry_after)
+
+
+def release(ticket):
+    # Gives back a token for a call that was never sent.
+    try:
+        cache.decr(ticket)
+    except ValueError:
+        pass
+
+
+def record_response(headers):
+    # NASA reports what is left of the key's rolling hourly quota on every
+    # response; the bucket budgets from it instead of from a fixed rate.
+    remaining = headers.get('X-RateLimit-Remaining')
+    if remaining is None:
+        return
+    try:
+        remaining = int(remaining)
+        limit = int(headers.get('X-RateLimit-Limit', settings.NASA_API_HOURLY_LIMIT))
+    except ValueError:
+        return
+    cache.set(REMAINING_KEY, {'remaining': remaining, 'limit': limit, 'at': time.time()}, QUOTA_HORIZON)
+
+
+def describe():
+    now = time.time()
+    remaining = cache.get(REMAINING_KEY)
+    used = cache.get(_window_key(now), 0)
+    return {
+        'remaining_estimate': int(_estimate_remaining(remaining, now)),
+        'reported_remaining': remaining['remaining'] if remaining else None,
+        'window_budget': _budget(remaining, now),
+        'window_used': used,
+    }
+
+
+def _take(ticket):
+    cache.add(ticket, 0, WINDOW * 2)
+    try:
+        return cache.incr(ticket)
+    except ValueError:
+        # Evicted between add and incr; the window starts afresh.
+        if cache.add(ticket, 1, WINDOW * 2):
+            return 1
+        return cache.incr(ticket)
+
+
+async def _atake(ticket):
+    await cache.aadd(ticket, 0, WINDOW * 2)
+    try:
+        return await cache.aincr(ticket)
+    except ValueError:
+        if await cache.aadd(ticket, 1, WINDOW * 2):
+            return 1
+        return await cache.aincr(ticket)
+
+
+def _window_key(now):
+    return f'nasa_window_{int(now // WINDOW)}_quota'
+
+
+def _estimate_remaining(remaining, now):
+    # NASA's window rolls, so the quota refills at limit/hour after the
+    # last report.
+    if remaining is None:
+        return settings.NASA_API_HOURLY_LIMIT
+    refill = (now - remaining['at']) * remaining['limit'] / QUOTA_HORIZON
+    return min(remaining['remaining'] + refill, remaining['limit'])
+
+
+def _budget(remaining, now):
+    windows = QUOTA_HORIZON / WINDOW
+    return math.ceil(_estimate_remaining(remaining, now) / windows * settings.NASA_QUOTA_BURST)
+
+
+def _check(used, remaining, level):
+    now = time.time()
+    retry_after = WINDOW - now % WINDOW
+    budget = _budget(remaining, now)
+
+    if level == BACKGROUND:
+        limit = remaining['limit'] if remaining else settings.NASA_API_HOURLY_LIMIT
+        if _estimate_remaining(remaining, now) < limit * BACKGROUND_RESERVE:
+            return False, retry_after
+        budget = math.floor(budget * settings.NASA_QUOTA_BACKGROUND_SHARE)
+
+    return used <= budget, retry_after
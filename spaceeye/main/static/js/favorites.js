@@ -3,9 +3,26 @@
 class FavoritesManager {
     constructor() {
         this.setupEventListeners();
+        this.applyFavoriteState();
         console.log('FavoritesManager initialized');
     }
 
+    applyFavoriteState() {
+        // Gallery and APOD markup is shared by all users and rendered with every
+        // star empty; the page carries this user's favorites on it separately.
+        const stateElement = document.getElementById('favorite-state');
+        if (!stateElement) {
+            return;
+        }
+
+        const favorited = new Set(JSON.parse(stateElement.textContent));
+        document.querySelectorAll('.favorite-btn[data-image-url]').forEach(btn => {
+            if (favorited.has(btn.dataset.imageUrl)) {
+                this.updateButtonToRemove(btn, btn.dataset.imageUrl);
+            }
+        });
+    }
+
     setupEventListeners() {
         document.addEventListener('click', (e) => {
             if (e.target.classList.contains('favorite-btn') || e.target.closest('.favorite-btn')) {
@@ -14,10 +31,63 @@ class FavoritesManager {
                 const btn = e.target.classList.contains('favorite-btn') ? e.target : e.target.closest('.favorite-btn');
                 console.log('Favorite button clicked:', btn);
                 this.toggleFavorite(btn);
+            } else if (e.target.closest('.favorite-all-btn')) {
+                e.preventDefault();
+                this.favoriteAll(e.target.closest('.favorite-all-btn'));
             }
         });
     }
 
+    async batch(operations) {
+        const response = await fetch('/favorites/batch/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': this.getCsrfToken()
+            },
+            body: JSON.stringify({ operations })
+        });
+        return response.json();
+    }
+
+    async favoriteAll(button) {
+        // One request for every photo on the page that is not yet a favorite.
+        // The modal's button mirrors whichever photo is open, so it is skipped.
+        const buttons = Array.from(document.querySelectorAll(
+            '.favorite-btn[data-action="add"][data-photo-data]:not(#modalFavoriteBtn)'
+        ));
+        if (!buttons.length) {
+            this.showToast('Everything here is already in favorites', 'info');
+            return;
+        }
+
+        button.disabled = true;
+        try {
+            const result = await this.batch(buttons.map(btn => ({
+                op: 'add',
+                type: btn.dataset.type,
+                data: JSON.parse(btn.dataset.photoData)
+            })));
+
+            if (!result.success) {
+                this.showToast(result.error || 'An error occurred', 'error');
+                return;
+            }
+
+            result.results.forEach((item, i) => {
+                if (item.success || item.error === 'Already in favorites') {
+                    this.updateButtonToRemove(buttons[i], buttons[i].dataset.imageUrl);
+                }
+            });
+            this.showToast(`Added ${result.added} photos to favorites!`, 'success');
+        } catch (error) {
+            console.error('Error:', error);
+            this.showToast('An error occurred while performing the operation', 'error');
+        } finally {
+            button.disabled = false;
+        }
+    }
+
     async toggleFavorite(button) {
         const action = button.dataset.action;
         const type = button.dataset.type;
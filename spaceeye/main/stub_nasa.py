@@ -0,0 +1,208 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# A stand-in for api.nasa.gov for benchmarks: the APOD, Mars Photos and
+# mission manifest endpoints with deterministic payloads shaped like the real
+# ones, plus configurable latency, server errors and 429s.
+
+PAGE_SIZE = 25
+PHOTOS_PER_SOL = 60
+ROVERS = {
+    'curiosity': {'id': 5, 'landing_date': '2012-08-06', 'launch_date': '2011-11-26', 'status': 'active', 'max_sol': 4000},
+    'perseverance': {'id': 8, 'landing_date': '2021-02-18', 'launch_date': '2020-07-30', 'status': 'active', 'max_sol': 1200},
+    'opportunity': {'id': 6, 'landing_date': '2004-01-25', 'launch_date': '2003-07-07', 'status': 'complete', 'max_sol': 5111},
+    'spirit': {'id': 7, 'landing_date': '2004-01-04', 'launch_date': '2003-06-10', 'status': 'complete', 'max_sol': 2208},
+}
+CAMERAS = [
+    ('FHAZ', 'Front Hazard Avoidance Camera'),
+    ('RHAZ', 'Rear Hazard Avoidance Camera'),
+    ('MAST', 'Mast Camera'),
+    ('CHEMCAM', 'Chemistry and Camera Complex'),
+    ('NAVCAM', 'Navigation Camera'),
+]
+APOD_EXPLANATION = 'A stub explanation of the picture, about as long as a real one. ' * 12
+
+
+class StubNasaServer:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.statuses = Counter()
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+        # Returns the base URL to use as NASA_API_BASE_URL.
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.base_url = self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def requests_served(self):
+        with self.lock:
+            return sum(self.statuses.values())
+
+    def _outcome(self):
+        # Picks the status for the next request and how long to stall it.
+        with self.lock:
+            roll = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            if roll < self.error_rate:
+                status = 500
+            elif roll < self.error_rate + self.throttle_rate:
+                status = 429
+            else:
+                status = 200
+            self.statuses[status] += 1
+        return status, delay
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        status, delay = self.server.stub._outcome()
+        time.sleep(delay)
+
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = None
+        if status == 200:
+            body = _route(url.path, params)
+            if body is None:
+                status = 404
+        if body is None:
+            body = {'error': {'code': status}}
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        # Generous enough that the shared quota never throttles a benchmark.
+        self.send_header('X-RateLimit-Limit', '1000000')
+        self.send_header('X-RateLimit-Remaining', '1000000')
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _route(path, params):
+    parts = path.strip('/').split('/')
+    if path == '/planetary/apod':
+        if 'start_date' in params:
+            start = date.fromisoformat(params['start_date'])
+            end = date.fromisoformat(params.get('end_date') or date.today().isoformat())
+            return [apod_payload(start + timedelta(days=i)) for i in range((end - start).days + 1)]
+        return apod_payload(date.fromisoformat(params['date']) if 'date' in params else date.today())
+
+    if parts[:3] == ['mars-photos', 'api', 'v1'] and len(parts) == 6 and parts[3] == 'rovers' and parts[5] == 'photos':
+        if parts[4] not in ROVERS:
+            return None
+        return {'photos': mars_photos(parts[4], int(params.get('sol', 0)), int(params.get('page', 1)))}
+
+    if parts[:4] == ['mars-photos', 'api', 'v1', 'manifests'] and len(parts) == 5:
+        if parts[4] not in ROVERS:
+            return None
+        return {'photo_manifest': mission_manifest(parts[4])}
+
+    return None
+
+
+def apod_payload(day):
+    day = day.isoformat()
+    return {
+        'date': day,
+        'title': f'Stub picture of {day}',
+        'explanation': APOD_EXPLANATION,
+        'url': f'https://apod.nasa.gov/apod/image/stub/{day}.jpg',
+        'hdurl': f'https://apod.nasa.gov/apod/image/stub/{day}_hd.jpg',
+        'media_type': 'image',
+        'service_version': 'v1',
+    }
+
+
+def _rover_record(rover):
+    info = ROVERS[rover]
+    return {
+        'id': info['id'],
+        'name': rover.title(),
+        'landing_date': info['landing_date'],
+        'launch_date': info['launch_date'],
+        'status': info['status'],
+        'max_sol': info['max_sol'],
+        'total_photos': info['max_sol'] * PHOTOS_PER_SOL,
+        'cameras': [{'name': name, 'full_name': full_name} for name, full_name in CAMERAS],
+    }
+
+
+def _earth_date(rover, sol):
+    landing = date.fromisoformat(ROVERS[rover]['landing_date'])
+    return (landing + timedelta(days=int(sol * 1.0275))).isoformat()
+
+
+def mars_photos(rover, sol, page):
+    if not 0 <= sol <= ROVERS[rover]['max_sol']:
+        return []
+
+    rover_record = _rover_record(rover)
+    first = (page - 1) * PAGE_SIZE
+    photos = []
+    for index in range(first, min(first + PAGE_SIZE, PHOTOS_PER_SOL)):
+        photo_id = ROVERS[rover]['id'] * 10_000_000 + sol * 100 + index
+        name, full_name = CAMERAS[index % len(CAMERAS)]
+        photos.append({
+            'id': photo_id,
+            'sol': sol,
+            'camera': {'id': index % len(CAMERAS) + 20, 'name': name, 'rover_id': rover_record['id'], 'full_name': full_name},
+            'img_src': f'https://mars.nasa.gov/msl-raw-images/stub/{rover}/{sol}/{photo_id}.jpg',
+            'earth_date': _earth_date(rover, sol),
+            'rover': rover_record,
+        })
+    return photos
+
+
+def mission_manifest(rover):
+    max_sol = ROVERS[rover]['max_sol']
+    return {
+        'name': rover.title(),
+        'landing_date': ROVERS[rover]['landing_date'],
+        'launch_date': ROVERS[rover]['launch_date'],
+        'status': ROVERS[rover]['status'],
+        'max_sol': max_sol,
+        'max_date': _earth_date(rover, max_sol),
+        'total_photos': (max_sol + 1) * PHOTOS_PER_SOL,
+        'photos': [
+            {
+                'sol': sol,
+                'earth_date': _earth_date(rover, sol),
+                'total_photos': PHOTOS_PER_SOL,
+                'cameras': [name for name, _ in CAMERAS],
+            }
+            for sol in range(max_sol + 1)
+        ],
+    }
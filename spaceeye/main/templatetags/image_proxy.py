@@ -0,0 +1,16 @@
+from urllib.parse import urlencode
+
+from django import template
+from django.urls import reverse
+
+from ..thumbnails import is_allowed_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(url, size='grid'):
+    # Hosts the proxy will not fetch from are linked directly.
+    if not url or not is_allowed_url(url):
+        return url
+    return f"{reverse('main:image_proxy')}?{urlencode({'url': url, 'size': size})}"
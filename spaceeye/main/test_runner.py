@@ -0,0 +1,25 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    # Tests clear and fill the cache freely, so they run against a throwaway
+    # file instead of the one the running site shares under cache/.
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='spaceeye-test-cache-')
+        self.cache_settings = override_settings(CACHES={
+            alias: {**config, 'LOCATION': os.path.join(self.cache_dir, f'{alias}.sqlite3')}
+            for alias, config in settings.CACHES.items()
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,68 @@
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from ..benchmark import compare, percentile, run_benchmark
+from ..stub_nasa import PAGE_SIZE, StubNasaServer
+
+
+class StubNasaServerTest(SimpleTestCase):
+    def test_serves_apod_and_mars_payloads(self):
+        with StubNasaServer() as stub:
+            apod = requests.get(f'{stub.base_url}/planetary/apod', params={'date': '2024-01-01'}).json()
+            photos = requests.get(
+                f'{stub.base_url}/mars-photos/api/v1/rovers/curiosity/photos', params={'sol': 1000, 'page': 3}
+            ).json()['photos']
+
+        self.assertEqual(apod['date'], '2024-01-01')
+        self.assertEqual(apod['media_type'], 'image')
+        self.assertEqual(len(photos), 60 - 2 * PAGE_SIZE)
+        self.assertEqual(photos[0]['rover']['name'], 'Curiosity')
+
+    def test_injects_errors_and_throttling(self):
+        with StubNasaServer(error_rate=1.0) as stub:
+            self.assertEqual(requests.get(f'{stub.base_url}/planetary/apod').status_code, 500)
+        with StubNasaServer(throttle_rate=1.0) as stub:
+            response = requests.get(f'{stub.base_url}/planetary/apod')
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            self.assertEqual(stub.statuses[429], 1)
+
+
+class BenchmarkReportTest(SimpleTestCase):
+    def result(self, p95, throughput, queries):
+        return {
+            'endpoint': 'index', 'concurrency': 8, 'throughput_rps': throughput,
+            'latency_ms': {'p95': p95}, 'db_queries_per_request': queries,
+        }
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {'results': [self.result(100, 50, 3)]}
+
+        self.assertEqual(compare(baseline, {'results': [self.result(105, 48, 3)]}, 0.1), [])
+        self.assertEqual(len(compare(baseline, {'results': [self.result(120, 40, 4)]}, 0.1)), 3)
+
+
+class RunBenchmarkTest(TransactionTestCase):
+    databases = '__all__'
+
+    def test_measures_every_endpoint_against_the_stub(self):
+        cache.clear()
+        user = User.objects.create_user(username='bench', password='bench')
+
+        with StubNasaServer() as stub, override_settings(NASA_API_BASE_URL=stub.base_url):
+            results = run_benchmark(user, ['mars_rover', 'favorites_toggle'], [2], 6, 3, stub=stub)
+
+        self.assertEqual([r['endpoint'] for r in results], ['mars_rover', 'favorites_toggle'])
+        for result in results:
+            self.assertEqual(result['requests'], 6)
+            self.assertEqual(result['errors'], 0)
+            self.assertIn('p99', result['latency_ms'])
+        # Warm-up filled the cache, so the measured phase made no upstream calls.
+        self.assertEqual(results[0]['upstream_calls'], 0)
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache
+from ..caching import (
+    lock_timeout, wait_timeout, single_flight, asingle_flight, aget_or_fetch_entry, get_cached, cache_payload,
+    cache_failure
+)
+from ..views import aget_apod_entry
+
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_callers_share_one_fetch(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return cache_payload('shared_key', {'value': 42}, 60)
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight('shared_key', fetch)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 42}] * 8)
+
+    def test_waits_for_cache_lock_held_by_other_process(self):
+        cache.add('locked_key_lock', 'other-process', 30)
+
+        def release():
+            time.sleep(0.2)
+            cache_payload('locked_key', {'value': 'from other process'}, 60)
+            cache.delete('locked_key_lock')
+
+        threading.Thread(target=release).start()
+        fetch = MagicMock()
+
+        result = single_flight('locked_key', fetch)
+
+        self.assertEqual(result, {'value': 'from other process'})
+        fetch.assert_not_called()
+
+    def test_error_propagates_to_waiters(self):
+        def fetch():
+            raise RuntimeError('boom')
+
+        with self.assertRaises(RuntimeError):
+            single_flight('failing_key', fetch)
+        self.assertIsNone(cache.get('failing_key_lock'))
+
+    @override_settings(NASA_HTTP_MAX_RETRIES=2, NASA_HTTP_BACKOFF_FACTOR=0.5)
+    def test_lock_outlives_slowest_fetch(self):
+        # Three 30 s attempts plus backoff must not release the lock mid-fetch.
+        self.assertGreater(lock_timeout(), 3 * 30 + 0.5 + 1)
+        self.assertGreaterEqual(wait_timeout(), lock_timeout())
+
+    @patch("main.views.nasa_client.get")
+    def test_apod_entry_coalesces_upstream_calls_across_event_loops(self, mock_get):
+        # Each WSGI request runs the async view on its own event loop.
+        def slow_response(*args, **kwargs):
+            time.sleep(0.2)
+            mock_resp = MagicMock()
+            mock_resp.json.return_value = {"media_type": "image", "url": "http://test.jpg"}
+            mock_resp.raise_for_status = lambda: None
+            return mock_resp
+
+        mock_get.side_effect = slow_response
+        threads = [threading.Thread(target=async_to_sync(aget_apod_entry), args=("2024-01-01",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class AsyncSingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_concurrent_coroutines_share_one_fetch(self):
+        calls = []
+
+        async def afetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {'value': 42}
+
+        results = await asyncio.gather(*[asingle_flight('async_key', afetch) for _ in range(10)])
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 42}] * 10)
+        self.assertIsNone(await cache.aget('async_key_lock'))
+
+
+class StaleWhileRevalidateTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def cache_stale(self, cache_key, data):
+        cache.set(cache_key, {'data': data, 'fetched_at': 0, 'fresh_until': 0}, 60)
+
+    def get_or_fetch(self, cache_key, fetch):
+        async def afetch():
+            return fetch()
+
+        return async_to_sync(aget_or_fetch_entry)(cache_key, fetch, afetch)['data']
+
+    def test_fresh_entry_is_served_without_fetch(self):
+        cache_payload('swr_key', {'value': 'fresh'}, 60)
+        fetch = MagicMock()
+
+        self.assertEqual(self.get_or_fetch('swr_key', fetch), {'value': 'fresh'})
+        fetch.assert_not_called()
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        self.cache_stale('swr_key', {'value': 'old'})
+        refreshed = threading.Event()
+
+        def fetch():
+            cache_payload('swr_key', {'value': 'new'}, 60)
+            refreshed.set()
+            return {'value': 'new'}
+
+        self.assertEqual(self.get_or_fetch('swr_key', fetch), {'value': 'old'})
+        self.assertTrue(refreshed.wait(2))
+        self.assertEqual(get_cached('swr_key'), ({'value': 'new'}, False))
+
+    def test_failed_refresh_keeps_last_good_payload(self):
+        self.cache_stale('swr_key', {'value': 'good'})
+
+        data = cache_failure('swr_key', {'error': 'Failed'}, 60)
+
+        self.assertEqual(data, {'value': 'good'})
+        self.assertEqual(get_cached('swr_key'), ({'value': 'good'}, False))
+
+    def test_failure_without_previous_payload_caches_error(self):
+        data = cache_failure('swr_key', {'error': 'Failed'}, 60)
+
+        self.assertEqual(data, {'error': 'Failed'})
+        self.assertEqual(get_cached('swr_key'), ({'error': 'Failed'}, False))
@@ -0,0 +1,89 @@
+from unittest.mock import patch, MagicMock
+from asgiref.sync import async_to_sync
+from django.test import TestCase, TransactionTestCase
+from django.core.cache import cache
+from ..catalog import ingest_sol, get_catalog_page
+from ..mars_payload import inflate_payload
+from ..models import MarsPhoto, MarsCatalogSol
+from ..views import aget_mars_rover_entry
+
+
+def _photo(photo_id, camera='FHAZ'):
+    return {
+        'id': photo_id,
+        'sol': 1000,
+        'img_src': f'http://mars/{photo_id}.jpg',
+        'earth_date': '2015-05-30',
+        'camera': {'id': 20, 'name': camera, 'rover_id': 5, 'full_name': f'{camera} Camera'},
+        'rover': {
+            'id': 5,
+            'name': 'Curiosity',
+            'landing_date': '2012-08-06',
+            'launch_date': '2011-11-26',
+            'status': 'active',
+        },
+    }
+
+
+def _pages(*pages):
+    responses = []
+    for photos in pages:
+        response = MagicMock()
+        response.json.return_value = {'photos': photos}
+        response.raise_for_status = lambda: None
+        responses.append(response)
+    return responses
+
+
+class MarsCatalogTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch('main.catalog.nasa_client.get')
+    def test_ingest_streams_all_pages(self, mock_get):
+        mock_get.side_effect = _pages(
+            [_photo(i, 'FHAZ' if i % 2 else 'MAST') for i in range(25)],
+            [_photo(i) for i in range(25, 30)],
+        )
+
+        count = ingest_sol('curiosity', 1000, batch_size=10)
+
+        self.assertEqual(count, 30)
+        photo_calls = [call for call in mock_get.call_args_list if call.args[0].endswith('/photos')]
+        self.assertEqual(len(photo_calls), 2)
+        self.assertEqual(MarsPhoto.objects.filter(rover__name='curiosity', sol=1000).count(), 30)
+        self.assertEqual(MarsCatalogSol.objects.get(sol=1000).photo_count, 30)
+
+    @patch('main.catalog.nasa_client.get')
+    def test_reingest_skips_existing_photos(self, mock_get):
+        mock_get.side_effect = _pages([_photo(1), _photo(2)]) + _pages([_photo(1), _photo(2)])
+
+        ingest_sol('curiosity', 1000)
+        ingest_sol('curiosity', 1000)
+
+        self.assertEqual(MarsPhoto.objects.count(), 2)
+
+    def test_uningested_sol_returns_none(self):
+        self.assertIsNone(get_catalog_page('curiosity', 1000, 1, 25))
+
+
+class CatalogServingTest(TransactionTestCase):
+    # Misses are fetched on a worker thread with its own DB connection, which
+    # only sees committed rows.
+    def setUp(self):
+        cache.clear()
+
+    @patch('main.nasa_client.get')
+    def test_rover_data_is_served_from_catalog(self, mock_get):
+        mock_get.side_effect = _pages([_photo(i) for i in range(25)], [_photo(i) for i in range(25, 27)])
+        ingest_sol('curiosity', 1000)
+
+        data = inflate_payload(async_to_sync(aget_mars_rover_entry)('curiosity', 1000, page=2)['data'])
+
+        photo_calls = [call for call in mock_get.call_args_list if call.args[0].endswith('/photos')]
+        self.assertEqual(len(photo_calls), 2)
+        self.assertEqual([photo['id'] for photo in data['photos']], [25, 26])
+        self.assertEqual(data['total_photos'], 27)
+        self.assertIsNone(data['next_page'])
+        self.assertEqual(data['photos'][0]['rover']['name'], 'Curiosity')
+        self.assertEqual(data['photos'][0]['camera']['full_name'], 'FHAZ Camera')
@@ -0,0 +1,52 @@
+import time
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache
+from ..circuit import CircuitBreaker, CircuitOpenError
+
+
+@override_settings(NASA_CIRCUIT_FAILURE_THRESHOLD=3, NASA_CIRCUIT_RESET_TIMEOUT=30)
+class CircuitBreakerTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker('api.nasa.gov')
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.record_failure(self.breaker.before_request())
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.breaker.record_success(self.breaker.before_request())
+        self.fail(2)
+        self.assertEqual(self.breaker.describe()['state'], 'closed')
+
+        self.fail(1)
+
+        self.assertEqual(self.breaker.describe()['state'], 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_half_open_lets_one_probe_through(self):
+        self.fail(3)
+
+        with patch('main.circuit.time.time', return_value=time.time() + 31):
+            self.assertEqual(self.breaker.describe()['state'], 'half_open')
+            ticket = self.breaker.before_request()
+            self.assertTrue(ticket['probe'])
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.before_request()
+
+            self.breaker.record_success(ticket)
+
+        self.assertEqual(self.breaker.describe(), {'state': 'closed', 'failures': 0})
+        self.assertFalse(self.breaker.before_request()['probe'])
+
+    def test_failed_probe_reopens(self):
+        self.fail(3)
+
+        with patch('main.circuit.time.time', return_value=time.time() + 31):
+            self.breaker.record_failure(self.breaker.before_request())
+            self.assertEqual(self.breaker.describe()['state'], 'open')
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.before_request()
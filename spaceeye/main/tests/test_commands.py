@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from datetime import date
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth.models import User
+from ..models import Favorite, MarsRover, MarsCatalogSol
+
+
+class PrefetchApodCommandTest(SimpleTestCase):
+    @patch("main.management.commands.prefetch_apod.prefetch_apod_range")
+    def test_backfills_range_in_chunks(self, mock_prefetch):
+        mock_prefetch.return_value = 10
+        out = StringIO()
+
+        call_command("prefetch_apod", "--start", "2024-01-01", "--end", "2024-01-25", "--chunk-days", "10", stdout=out)
+
+        self.assertEqual(
+            [call.args for call in mock_prefetch.call_args_list],
+            [
+                (date(2024, 1, 1), date(2024, 1, 10)),
+                (date(2024, 1, 11), date(2024, 1, 20)),
+                (date(2024, 1, 21), date(2024, 1, 25)),
+            ]
+        )
+        self.assertIn("Cached 30 APOD entries", out.getvalue())
+
+    def test_rejects_inverted_range(self):
+        with self.assertRaises(CommandError):
+            call_command("prefetch_apod", "--start", "2024-02-01", "--end", "2024-01-01")
+
+
+class WarmCacheCommandTest(SimpleTestCase):
+    @patch("main.management.commands.warm_cache.Scheduler.run_once")
+    def test_once_runs_a_single_pass(self, mock_run_once):
+        mock_run_once.return_value = ([("apod", None)], 0)
+        out = StringIO()
+
+        call_command("warm_cache", "--once", stdout=out)
+
+        mock_run_once.assert_called_once_with()
+        self.assertIn("Refreshed nasa_apod_data_today", out.getvalue())
+        self.assertIn("Warmed 1 keys", out.getvalue())
+
+    def test_rejects_non_positive_top(self):
+        with self.assertRaises(CommandError):
+            call_command("warm_cache", "--once", "--top", "0")
+
+
+class IngestMarsPhotosCommandTest(TestCase):
+    @patch("main.management.commands.ingest_mars_photos.ingest_sol")
+    def test_continues_after_last_ingested_sol(self, mock_ingest):
+        rover = MarsRover.objects.create(name="curiosity")
+        MarsCatalogSol.objects.create(rover=rover, sol=41, photo_count=3)
+        mock_ingest.return_value = 5
+
+        call_command("ingest_mars_photos", "curiosity", "--end-sol", "44", stdout=StringIO())
+
+        self.assertEqual([call.args for call in mock_ingest.call_args_list], [("curiosity", sol) for sol in (42, 43, 44)])
+
+    @patch("main.management.commands.ingest_mars_photos.ingest_sol")
+    def test_skips_ingested_sols_unless_forced(self, mock_ingest):
+        rover = MarsRover.objects.create(name="curiosity")
+        MarsCatalogSol.objects.create(rover=rover, sol=11, photo_count=3)
+        mock_ingest.return_value = 0
+
+        call_command("ingest_mars_photos", "curiosity", "--start-sol", "10", "--end-sol", "12", stdout=StringIO())
+        self.assertEqual([call.args[1] for call in mock_ingest.call_args_list], [10, 12])
+
+        mock_ingest.reset_mock()
+        call_command("ingest_mars_photos", "curiosity", "--start-sol", "10", "--end-sol", "12", "--force", stdout=StringIO())
+        self.assertEqual([call.args[1] for call in mock_ingest.call_args_list], [10, 11, 12])
+
+
+class FavoritesExportImportCommandTest(TestCase):
+    def test_export_then_import_into_another_user(self):
+        source = User.objects.create_user(username="source")
+        User.objects.create_user(username="target")
+        for i in range(3):
+            Favorite.objects.create(
+                user=source, favorite_type="apod", image_url=f"https://apod.nasa.gov/{i}.jpg", title=f"Pic {i}",
+                api_data={"date": "2024-01-01"},
+            )
+
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "favorites.ndjson")
+            call_command("export_favorites", "source", "--output", path, stdout=StringIO())
+            with open(path) as f:
+                self.assertEqual(len([json.loads(line) for line in f]), 3)
+
+            out = StringIO()
+            call_command("import_favorites", "target", path, "--batch-size", "2", stdout=out)
+            call_command("import_favorites", "target", path, stdout=out)
+
+        self.assertEqual(Favorite.objects.filter(user__username="target").count(), 3)
+        self.assertIn("Imported 3 favorites, skipped 0 duplicates", out.getvalue())
+        self.assertIn("Imported 0 favorites, skipped 3 duplicates", out.getvalue())
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command("export_favorites", "nobody")
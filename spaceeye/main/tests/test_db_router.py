@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from ..db_router import READ_ALIAS, FavoritesReadRouter
+from ..models import Favorite
+
+
+class FavoritesReadRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = FavoritesReadRouter()
+
+    def test_favorite_reads_go_to_read_only_connection(self):
+        self.assertEqual(self.router.db_for_read(Favorite), READ_ALIAS)
+
+    def test_other_models_are_left_to_default_routing(self):
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_writes_always_go_to_default(self):
+        self.assertEqual(self.router.db_for_write(Favorite), 'default')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_migrations_skip_read_only_alias(self):
+        self.assertTrue(self.router.allow_migrate('default', 'main'))
+        self.assertFalse(self.router.allow_migrate(READ_ALIAS, 'main'))
+
+
+class FavoritesReadRouterTransactionTest(TransactionTestCase):
+    def test_reads_inside_transaction_stay_on_default(self):
+        with transaction.atomic():
+            self.assertEqual(FavoritesReadRouter().db_for_read(Favorite), 'default')
+
+
+class SqlitePragmaTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_applies_tuned_pragmas(self):
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('temp_store'), 2)
+        self.assertEqual(self.pragma('busy_timeout'), settings.SQLITE_OPTIONS['timeout'] * 1000)
+        self.assertLess(self.pragma('cache_size'), 0)
+        self.assertEqual(self.pragma('query_only'), 0)
+
+    def test_read_only_options_reject_writes(self):
+        self.assertIn('PRAGMA query_only=1', settings.SQLITE_READ_ONLY_OPTIONS['init_command'])
+        self.assertNotIn('transaction_mode', settings.SQLITE_READ_ONLY_OPTIONS)
@@ -0,0 +1,56 @@
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from ..favorite_cache import aget_favorite_hashes, get_favorite_hashes, record_favorite_changes, url_hash
+from ..models import Favorite
+
+
+class FavoriteCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='stars', password='pw')
+
+    def _favorite(self, url):
+        Favorite.objects.create(user=self.user, favorite_type='mars_rover', image_url=url, title='Pic', api_data={})
+
+    def test_rebuilds_once_then_serves_from_cache(self):
+        self._favorite('http://mars/1.jpg')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_favorite_hashes(self.user.pk, 'mars_rover'), {url_hash('http://mars/1.jpg')})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_favorite_hashes(self.user.pk, 'mars_rover'), {url_hash('http://mars/1.jpg')})
+        self.assertEqual(get_favorite_hashes(self.user.pk, 'apod'), set())
+
+    def test_changes_are_applied_incrementally(self):
+        self._favorite('http://mars/1.jpg')
+        get_favorite_hashes(self.user.pk, 'mars_rover')
+
+        self._favorite('http://mars/2.jpg')
+        record_favorite_changes(self.user.pk, 'mars_rover', added=['http://mars/2.jpg'], removed=['http://mars/1.jpg'])
+
+        with self.assertNumQueries(0):
+            hashes = get_favorite_hashes(self.user.pk, 'mars_rover')
+        self.assertEqual(hashes, {url_hash('http://mars/2.jpg')})
+
+    def test_missed_update_forces_rebuild(self):
+        self._favorite('http://mars/1.jpg')
+        get_favorite_hashes(self.user.pk, 'mars_rover')
+
+        # A concurrent writer bumped the version without updating the set.
+        cache.incr(f'favorite_urls_version_{self.user.pk}_mars_rover')
+        self._favorite('http://mars/2.jpg')
+        record_favorite_changes(self.user.pk, 'mars_rover', added=['http://mars/2.jpg'])
+
+        with self.assertNumQueries(1):
+            hashes = get_favorite_hashes(self.user.pk, 'mars_rover')
+        self.assertEqual(hashes, {url_hash('http://mars/1.jpg'), url_hash('http://mars/2.jpg')})
+
+    def test_async_reads_share_the_cached_set(self):
+        self._favorite('http://mars/1.jpg')
+        self.assertEqual(get_favorite_hashes(self.user.pk, 'mars_rover'), {url_hash('http://mars/1.jpg')})
+
+        with self.assertNumQueries(0):
+            hashes = async_to_sync(aget_favorite_hashes)(self.user.pk, 'mars_rover')
+        self.assertEqual(hashes, {url_hash('http://mars/1.jpg')})
@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.test import TestCase
+from ..favorite_io import export_chunks, import_favorites, import_format
+from ..models import Favorite
+
+
+def ndjson(*records):
+    return io.BytesIO(''.join(json.dumps(record) + '\n' for record in records).encode())
+
+
+def record(i, favorite_type='mars_rover'):
+    return {
+        'favorite_type': favorite_type,
+        'title': f'Photo {i}',
+        'description': 'Sol: 1000',
+        'image_url': f'https://mars.nasa.gov/{i}.jpg',
+        'api_data': {'img_src': f'https://mars.nasa.gov/{i}.jpg', 'rover': {'name': 'Curiosity'}},
+    }
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='pw')
+        for i in range(3):
+            Favorite.objects.create(user=self.user, **record(i))
+        Favorite.objects.create(user=User.objects.create_user(username='other'), **record(9))
+
+    def test_ndjson_streams_users_favorites_oldest_first(self):
+        with self.assertNumQueries(1):
+            lines = ''.join(export_chunks(self.user.pk, 'ndjson')).splitlines()
+
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['title'] for row in rows], ['Photo 0', 'Photo 1', 'Photo 2'])
+        self.assertEqual(rows[0]['api_data'], record(0)['api_data'])
+        self.assertIn('created_at', rows[0])
+
+    def test_csv_has_header_and_json_api_data(self):
+        rows = list(csv.DictReader(io.StringIO(''.join(export_chunks(self.user.pk, 'csv')))))
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(json.loads(rows[0]['api_data']), record(0)['api_data'])
+
+    @patch('main.favorite_io.EXPORT_CHUNK_SIZE', 2)
+    def test_rows_are_yielded_in_chunks(self):
+        chunks = list(export_chunks(self.user.pk, 'ndjson'))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [2, 1])
+
+
+class ImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='pw')
+
+    def test_round_trips_an_export(self):
+        source = User.objects.create_user(username='source')
+        for i in range(3):
+            Favorite.objects.create(user=source, created_at=datetime(2020, 1, 3 - i, tzinfo=timezone.utc), **record(i))
+        for export_format in ('ndjson', 'csv'):
+            exported = io.BytesIO(''.join(export_chunks(source.pk, export_format)).encode())
+            Favorite.objects.filter(user=self.user).delete()
+
+            report = import_favorites(self.user, exported, export_format)
+
+            self.assertEqual(report['created'], 3)
+            self.assertEqual(
+                list(Favorite.objects.filter(user=self.user).values_list('title', 'created_at')),
+                [(f'Photo {i}', datetime(2020, 1, 3 - i, tzinfo=timezone.utc)) for i in range(3)]
+            )
+
+    def test_skips_existing_and_repeated_favorites(self):
+        Favorite.objects.create(user=self.user, **record(0))
+
+        report = import_favorites(self.user, ndjson(record(0), record(1), record(1), record(1, 'apod')), 'ndjson')
+
+        self.assertEqual((report['created'], report['skipped']), (2, 2))
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 3)
+
+    def test_writes_in_batches(self):
+        # Per batch: a savepoint, the existing-rows lookup and the insert.
+        with self.assertNumQueries(8):
+            report = import_favorites(self.user, ndjson(*[record(i) for i in range(5)]), 'ndjson', batch_size=3)
+        self.assertEqual(report['created'], 5)
+
+    def test_reports_invalid_rows_and_keeps_going(self):
+        data = io.BytesIO(
+            b'{"favorite_type": "apod", "image_url": "https://apod.nasa.gov/a.jpg", "api_data": {}}\n'
+            b'not json\n'
+            b'\n'
+            b'{"favorite_type": "unknown", "image_url": "https://apod.nasa.gov/b.jpg", "api_data": {}}\n'
+            b'{"favorite_type": "apod", "image_url": "javascript:alert(1)", "api_data": {}}\n'
+            b'[1, 2]\n'
+            b'{"favorite_type": "apod", "image_url": "https://apod.nasa.gov/c.jpg", "api_data": {}, "created_at": "soon"}\n'
+        )
+
+        report = import_favorites(self.user, data, 'ndjson')
+
+        self.assertEqual((report['created'], report['invalid']), (1, 5))
+        self.assertEqual(
+            report['errors'],
+            [
+                {'line': 2, 'error': 'Invalid JSON'},
+                {'line': 4, 'error': 'Invalid type'},
+                {'line': 5, 'error': 'Invalid image URL'},
+                {'line': 6, 'error': 'Expected an object'},
+                {'line': 7, 'error': 'Invalid created_at'},
+            ]
+        )
+        self.assertEqual(Favorite.objects.get(user=self.user).title, 'Untitled')
+
+    def test_stops_at_max_rows(self):
+        report = import_favorites(self.user, ndjson(*[record(i) for i in range(5)]), 'ndjson', max_rows=3)
+
+        self.assertTrue(report['truncated'])
+        self.assertEqual(report['created'], 3)
+
+    def test_format_follows_extension_unless_given(self):
+        self.assertEqual(import_format('backup.CSV'), 'csv')
+        self.assertEqual(import_format('backup.ndjson'), 'ndjson')
+        self.assertEqual(import_format('backup.txt', 'csv'), 'csv')
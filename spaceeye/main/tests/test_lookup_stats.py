@@ -0,0 +1,55 @@
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+from django.core.cache import cache
+from .. import lookup_stats
+from ..caching import aget_or_fetch_entry, cache_payload
+
+
+@patch('main.lookup_stats.FLUSH_INTERVAL', 3600)
+class LookupStatsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        lookup_stats._pending.clear()
+
+    def test_misses_rank_targets(self):
+        for _ in range(3):
+            lookup_stats.record(('apod', '2024-01-01'), 'miss')
+        lookup_stats.record(('apod', '2024-01-02'), 'stale')
+        for _ in range(10):
+            lookup_stats.record(('apod', '2024-01-03'), 'hit')
+        lookup_stats.flush()
+
+        self.assertEqual(lookup_stats.hot_targets(5), [('apod', '2024-01-01'), ('apod', '2024-01-02')])
+
+    def test_flushes_merge_with_decay(self):
+        lookup_stats.record(('apod', None), 'miss')
+        with patch('main.lookup_stats.time.time', return_value=1_000_000.0):
+            lookup_stats.flush()
+        lookup_stats.record(('apod', None), 'miss')
+        with patch('main.lookup_stats.time.time', return_value=1_000_000.0 + lookup_stats.HALF_LIFE):
+            lookup_stats.flush()
+
+        self.assertEqual(cache.get(lookup_stats.STATS_KEY)['targets'][('apod', None)]['miss'], 1.5)
+
+    def test_counts_wait_while_another_worker_merges(self):
+        cache.add(f'{lookup_stats.STATS_KEY}_lock', 'other', 10)
+        lookup_stats.record(('apod', None), 'miss')
+        lookup_stats.flush()
+
+        self.assertEqual(lookup_stats.hot_targets(5), [])
+        self.assertEqual(lookup_stats._pending[('apod', None)]['miss'], 1)
+
+    def test_aget_or_fetch_entry_records_outcomes(self):
+        target = ('mars_rover', 'curiosity', 1000, 1)
+
+        def fetch():
+            return cache_payload('stats_key', {'photos': []}, 60)
+
+        async def afetch():
+            return fetch()
+
+        async_to_sync(aget_or_fetch_entry)('stats_key', fetch, afetch, target=target)
+        async_to_sync(aget_or_fetch_entry)('stats_key', fetch, afetch, target=target)
+
+        self.assertEqual(lookup_stats._pending[target], {'hit': 1, 'stale': 0, 'miss': 1})
@@ -0,0 +1,87 @@
+from unittest.mock import patch, MagicMock
+from django.test import TestCase
+from django.core.cache import cache
+from ..manifest import fetch_mission_manifest, get_mission_manifest, nearest_populated_sol
+from ..views import aget_mars_rover_entry
+
+
+def _manifest_response():
+    response = MagicMock()
+    response.json.return_value = {
+        'photo_manifest': {
+            'name': 'Spirit',
+            'status': 'complete',
+            'max_sol': 2208,
+            'max_date': '2010-03-21',
+            'total_photos': 124550,
+            'photos': [
+                {'sol': 1, 'earth_date': '2004-01-05', 'total_photos': 77, 'cameras': ['ENTRY', 'FHAZ']},
+                {'sol': 10, 'earth_date': '2004-01-14', 'total_photos': 30, 'cameras': ['PANCAM']},
+                {'sol': 2208, 'earth_date': '2010-03-21', 'total_photos': 2, 'cameras': ['NAVCAM']},
+            ],
+        }
+    }
+    response.raise_for_status = lambda: None
+    return response
+
+
+class MissionManifestTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch('main.manifest.nasa_client.get')
+    def test_manifest_is_compacted(self, mock_get):
+        mock_get.return_value = _manifest_response()
+
+        manifest = fetch_mission_manifest('spirit')
+
+        self.assertEqual(manifest['max_sol'], 2208)
+        self.assertEqual(manifest['populated_sols'], [1, 10, 2208])
+        self.assertEqual(manifest['sols'][10], {'total_photos': 30, 'cameras': ['PANCAM'], 'earth_date': '2004-01-14'})
+
+    @patch('main.manifest.nasa_client.get')
+    def test_nearest_populated_sol(self, mock_get):
+        mock_get.return_value = _manifest_response()
+        manifest = fetch_mission_manifest('spirit')
+
+        self.assertEqual(nearest_populated_sol(manifest, 4), 1)
+        self.assertEqual(nearest_populated_sol(manifest, 7), 10)
+        self.assertEqual(nearest_populated_sol(manifest, 5000), 2208)
+
+    @patch('main.nasa_client.get')
+    async def test_empty_sols_skip_upstream(self, mock_get):
+        mock_get.return_value = _manifest_response()
+        fetch_mission_manifest('spirit')
+        mock_get.reset_mock()
+
+        empty = (await aget_mars_rover_entry('spirit', 5))['data']
+
+        mock_get.assert_not_called()
+        self.assertEqual(empty['photos'], [])
+        self.assertFalse(empty['out_of_range'])
+        self.assertEqual(empty['suggested_sol'], 1)
+
+    @patch('main.views.refresh_mission_manifest')
+    @patch('main.nasa_client.get')
+    async def test_sols_past_the_manifest_are_fetched(self, mock_get, mock_refresh):
+        mock_get.return_value = _manifest_response()
+        fetch_mission_manifest('spirit')
+        mock_get.reset_mock()
+
+        mock_get.return_value.json.return_value = {'photos': []}
+        ended = (await aget_mars_rover_entry('spirit', 3000))['data']
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertTrue(ended['out_of_range'])
+        self.assertEqual(ended['suggested_sol'], 2208)
+        mock_refresh.assert_not_called()
+
+        mock_get.return_value.json.return_value = {'photos': [{'id': 1, 'sol': 3001, 'img_src': 'http://mars/1.jpg'}]}
+        newer = (await aget_mars_rover_entry('spirit', 3001))['data']
+        self.assertEqual(newer['total_photos'], 1)
+        self.assertNotIn('out_of_range', newer)
+        mock_refresh.assert_called_once_with('spirit')
+
+    @patch('main.manifest.refresh_in_background')
+    def test_missing_manifest_is_fetched_in_background(self, mock_refresh):
+        self.assertIsNone(get_mission_manifest('spirit'))
+        self.assertEqual(mock_refresh.call_args.args[0], 'mars_manifest_spirit')
@@ -0,0 +1,70 @@
+import json
+import pickle
+from unittest.mock import patch, MagicMock
+from django.test import TestCase
+from django.urls import reverse
+from django.core.cache import cache
+from ..mars_payload import compact_payload, inflate_payload, photo_urls
+
+ROVER = {
+    'id': 5,
+    'name': 'Curiosity',
+    'landing_date': '2012-08-06',
+    'launch_date': '2011-11-26',
+    'status': 'active',
+    'max_sol': 4102,
+    'cameras': [{'name': 'FHAZ', 'full_name': 'Front Hazard Avoidance Camera'}],
+}
+
+
+def _photo(photo_id, camera='FHAZ'):
+    return {
+        'id': photo_id,
+        'sol': 1000,
+        'camera': {'id': 20, 'name': camera, 'rover_id': 5, 'full_name': f'{camera} Camera'},
+        'img_src': f'http://mars/{photo_id}.jpg',
+        'earth_date': '2015-05-30',
+        'rover': dict(ROVER),
+    }
+
+
+class MarsPayloadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_round_trip_keeps_rendered_fields(self):
+        data = {'photos': [_photo(1), _photo(2, 'NAVCAM')], 'sol': 1000, 'page': 1}
+
+        compact = compact_payload(data)
+        photos = inflate_payload(compact)['photos']
+
+        self.assertEqual(len(compact['photo_table']['rovers']), 1)
+        self.assertEqual(len(compact['photo_table']['cameras']), 2)
+        self.assertEqual(photo_urls(compact), ['http://mars/1.jpg', 'http://mars/2.jpg'])
+        self.assertEqual(photos[1]['camera'], {'id': 20, 'name': 'NAVCAM', 'full_name': 'NAVCAM Camera', 'rover_id': 5})
+        self.assertEqual(photos[0]['rover']['name'], 'Curiosity')
+        self.assertNotIn('cameras', photos[0]['rover'])
+        self.assertEqual(inflate_payload(compact)['sol'], 1000)
+
+    def test_compact_payload_is_smaller(self):
+        # Decoded JSON repeats every string as a separate object, like the API response.
+        data = json.loads(json.dumps({'photos': [_photo(i) for i in range(25)]}))
+        self.assertLess(len(pickle.dumps(compact_payload(data))), len(pickle.dumps(data)) / 3)
+
+    def test_empty_and_error_payloads_pass_through(self):
+        data = {'error': 'Failed', 'photos': []}
+        self.assertIs(compact_payload(data), data)
+        self.assertIs(inflate_payload(data), data)
+
+    @patch('main.views.nasa_client.get')
+    def test_mars_rover_data_is_cached_compact_and_served_inflated(self, mock_get):
+        response = MagicMock()
+        response.json.return_value = {'photos': [_photo(i) for i in range(3)]}
+        response.raise_for_status = lambda: None
+        mock_get.return_value = response
+
+        data = self.client.get(reverse('main:api_data_ajax'), {'type': 'mars_rover', 'rover': 'curiosity'}).json()
+
+        self.assertEqual([photo['id'] for photo in data['photos']], [0, 1, 2])
+        self.assertIn('photo_table', cache.get('mars_rover_curiosity_1000')['data'])
+        self.assertEqual(data['photos'][0]['camera']['full_name'], 'FHAZ Camera')
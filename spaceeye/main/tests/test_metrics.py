@@ -0,0 +1,86 @@
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from .. import metrics
+
+
+@patch('main.metrics.FLUSH_INTERVAL', 3600)
+class MetricsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        metrics._pending.clear()
+
+    def test_renders_counters_and_cumulative_histograms(self):
+        metrics.inc('spaceeye_cache_lookups_total', type='apod', outcome='hit')
+        metrics.inc('spaceeye_cache_lookups_total', type='apod', outcome='hit')
+        metrics.observe('spaceeye_upstream_duration_seconds', 0.02, endpoint='apod')
+        metrics.observe('spaceeye_upstream_duration_seconds', 3, endpoint='apod')
+
+        text = metrics.render()
+
+        self.assertIn('spaceeye_cache_lookups_total{outcome="hit",type="apod"} 2', text)
+        self.assertIn('spaceeye_upstream_duration_seconds_bucket{endpoint="apod",le="0.01"} 0', text)
+        self.assertIn('spaceeye_upstream_duration_seconds_bucket{endpoint="apod",le="0.025"} 1', text)
+        self.assertIn('spaceeye_upstream_duration_seconds_bucket{endpoint="apod",le="+Inf"} 2', text)
+        self.assertIn('spaceeye_upstream_duration_seconds_count{endpoint="apod"} 2', text)
+        self.assertIn('# TYPE spaceeye_request_db_queries histogram', text)
+
+    def test_flushes_from_workers_add_up(self):
+        metrics.inc('spaceeye_upstream_responses_total', endpoint='apod', status='200')
+        metrics.flush()
+        metrics.inc('spaceeye_upstream_responses_total', endpoint='apod', status='200')
+        metrics.flush()
+
+        totals = cache.get(metrics.TOTALS_KEY)
+        self.assertEqual(totals[('spaceeye_upstream_responses_total', (('endpoint', 'apod'), ('status', '200')))], 2)
+
+    def test_increments_wait_while_another_worker_merges(self):
+        cache.add(f'{metrics.TOTALS_KEY}_lock', 'other', 10)
+        metrics.observe('spaceeye_request_db_queries', 2, view='main:index')
+
+        self.assertFalse(metrics.flush())
+        self.assertEqual(len(metrics._pending), 1)
+
+    def test_upstream_endpoint_names(self):
+        self.assertEqual(metrics.upstream_endpoint('https://api.nasa.gov/planetary/apod'), 'apod')
+        self.assertEqual(
+            metrics.upstream_endpoint('https://api.nasa.gov/mars-photos/api/v1/rovers/curiosity/photos'), 'mars_photos'
+        )
+        self.assertEqual(
+            metrics.upstream_endpoint('https://api.nasa.gov/mars-photos/api/v1/manifests/curiosity'), 'mars_manifest'
+        )
+        self.assertEqual(metrics.upstream_endpoint('https://mars.nasa.gov/img.jpg'), 'image')
+
+
+@patch('main.metrics.FLUSH_INTERVAL', 3600)
+class MetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics._pending.clear()
+        self.user = User.objects.create_user(username='metrics', password='metrics')
+
+    def test_records_latency_and_queries_per_view(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('main:favorites'))
+        metrics.flush()
+
+        totals = cache.get(metrics.TOTALS_KEY)
+        latency = totals[(
+            'spaceeye_request_duration_seconds',
+            (('method', 'GET'), ('status', '200'), ('view', 'main:favorites'))
+        )]
+        queries = totals[('spaceeye_request_db_queries', (('view', 'main:favorites'),))]
+        self.assertEqual(latency['count'], 1)
+        self.assertEqual(queries['count'], 1)
+        self.assertGreater(queries['sum'], 0)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_requires_token_when_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'# TYPE spaceeye_request_duration_seconds histogram', response.content)
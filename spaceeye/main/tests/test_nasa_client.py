@@ -0,0 +1,169 @@
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import skipIf
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache
+from .. import metrics, nasa_client, quota
+from ..circuit import CircuitOpenError
+from ..nasa_client import NasaClient, AsyncNasaClient, httpx
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    statuses = []
+
+    def do_GET(self):
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Limit', '1000')
+        self.send_header('X-RateLimit-Remaining', '998')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NasaClientTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/planetary/apod'
+        self.client = NasaClient(pool_size=2, max_retries=2, backoff_factor=0)
+
+    def tearDown(self):
+        self.client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_retries_server_errors_and_rate_limits(self):
+        _FlakyHandler.statuses = [503, 429]
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get_stats()['retries'], 2)
+
+    def test_returns_last_response_when_retries_exhausted(self):
+        _FlakyHandler.statuses = [503, 503, 503]
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_connections_are_reused(self):
+        _FlakyHandler.statuses = []
+
+        for _ in range(5):
+            self.client.get(self.url)
+
+        stats = self.client.get_stats()
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['pools'][0]['connections_opened'], 1)
+        self.assertEqual(stats['pools'][0]['requests'], 5)
+
+    def test_metered_calls_track_remaining_quota(self):
+        _FlakyHandler.statuses = []
+
+        self.client.get(self.url)
+        self.assertIsNone(quota.describe()['reported_remaining'])
+
+        self.client.get(self.url, params={'api_key': 'key'})
+        self.assertEqual(quota.describe()['reported_remaining'], 998)
+
+    @patch('main.metrics.FLUSH_INTERVAL', 3600)
+    def test_records_upstream_status_and_latency(self):
+        _FlakyHandler.statuses = [404]
+        metrics._pending.clear()
+
+        self.client.get(self.url)
+
+        self.assertEqual(metrics._pending[
+            ('spaceeye_upstream_responses_total', (('endpoint', 'apod'), ('status', '404')))
+        ], 1)
+        self.assertEqual(metrics._pending[('spaceeye_upstream_duration_seconds', (('endpoint', 'apod'),))]['count'], 1)
+
+    @override_settings(NASA_CIRCUIT_FAILURE_THRESHOLD=2)
+    def test_circuit_opens_on_server_errors(self):
+        _FlakyHandler.statuses = [500, 500, 200]
+        client = NasaClient(pool_size=2, max_retries=0, backoff_factor=0)
+
+        client.get(self.url)
+        client.get(self.url)
+        with self.assertRaises(CircuitOpenError):
+            client.get(self.url)
+
+        stats = client.get_stats()
+        self.assertEqual((stats['requests'], stats['rejected']), (2, 1))
+        self.assertEqual(stats['circuits'][f'127.0.0.1:{self.server.server_port}']['state'], 'open')
+        self.assertEqual(_FlakyHandler.statuses, [200])
+        client.session.close()
+
+    def test_aget_uses_pooled_client_outside_asgi(self):
+        # Under WSGI each async view gets its own event loop; the calls must
+        # still share one pooled connection.
+        _FlakyHandler.statuses = []
+
+        with patch('main.nasa_client.get_client', return_value=self.client), \
+                patch('main.nasa_client.get_async_client') as get_async_client:
+            for _ in range(3):
+                async_to_sync(nasa_client.aget)(self.url)
+
+        get_async_client.assert_not_called()
+        self.assertEqual(self.client.get_stats()['pools'][0]['connections_opened'], 1)
+
+
+@skipIf(httpx is None, 'httpx is not installed')
+class AsyncNasaClientTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/planetary/apod'
+        self.counts = {'requests': 0, 'errors': 0, 'retries': 0, 'rejected': 0}
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, name):
+        self.counts[name] += 1
+
+    async def test_retries_and_returns_requests_response(self):
+        _FlakyHandler.statuses = [503]
+        client = AsyncNasaClient(pool_size=2, max_retries=2, backoff_factor=0, counter=self.count)
+
+        response = await client.get(self.url)
+        await client.client.aclose()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'ok': True})
+        self.assertEqual(self.counts['retries'], 1)
+
+    async def test_http_errors_raise_requests_exceptions(self):
+        _FlakyHandler.statuses = [404]
+        client = AsyncNasaClient(pool_size=2, max_retries=0, backoff_factor=0, counter=self.count)
+
+        response = await client.get(self.url)
+        await client.client.aclose()
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            response.raise_for_status()
+
+    @patch('main.nasa_client._long_lived_loop', True)
+    async def test_aget_uses_async_client_under_asgi(self):
+        _FlakyHandler.statuses = []
+
+        response = await nasa_client.aget(self.url)
+        client = nasa_client.get_async_client()
+        await client.client.aclose()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(client, AsyncNasaClient)
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache
+from ..quota import (
+    BACKGROUND, QuotaExceededError, acquire, aacquire, describe, priority, record_response, release
+)
+
+# The middle of a quota window, so no test straddles two windows.
+NOW = 1_700_000_010.0
+
+
+@override_settings(NASA_API_HOURLY_LIMIT=600, NASA_QUOTA_BURST=1, NASA_QUOTA_BACKGROUND_SHARE=0.5)
+@patch('main.quota.time.time', return_value=NOW)
+class QuotaTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def drain(self):
+        taken = 0
+        while True:
+            try:
+                acquire()
+            except QuotaExceededError as e:
+                return taken, e
+            taken += 1
+
+    def test_interactive_calls_get_the_whole_window_budget(self, _):
+        taken, error = self.drain()
+        self.assertEqual(taken, 10)
+        self.assertEqual(error.retry_after, 30)
+
+    def test_background_calls_yield_to_interactive(self, _):
+        with priority(BACKGROUND):
+            self.assertEqual(self.drain()[0], 5)
+        self.assertEqual(self.drain()[0], 5)
+
+    def test_release_returns_the_token(self, _):
+        ticket = acquire()
+        release(ticket)
+        self.assertEqual(describe()['window_used'], 0)
+
+    def test_evicted_window_starts_afresh(self, _):
+        acquire()
+        incr = cache.incr
+
+        def evicted_incr(key, delta=1):
+            cache.delete(key)
+            return incr(key, delta)
+
+        with patch.object(cache, 'incr', side_effect=evicted_incr):
+            ticket = acquire()
+        self.assertEqual(cache.get(ticket), 1)
+
+    def test_budget_follows_reported_remaining_quota(self, _):
+        record_response({'X-RateLimit-Remaining': '120', 'X-RateLimit-Limit': '600'})
+        self.assertEqual(describe()['window_budget'], 2)
+        self.assertEqual(self.drain()[0], 2)
+
+    def test_background_stops_near_exhaustion(self, _):
+        record_response({'X-RateLimit-Remaining': '50', 'X-RateLimit-Limit': '600'})
+        with priority(BACKGROUND):
+            self.assertEqual(self.drain()[0], 0)
+        self.assertEqual(self.drain()[0], 1)
+
+    async def test_async_acquire_shares_the_bucket(self, _):
+        for _ in range(10):
+            await aacquire()
+        with self.assertRaises(QuotaExceededError):
+            await aacquire()
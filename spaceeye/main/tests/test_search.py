@@ -0,0 +1,102 @@
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.test import TestCase
+from ..models import Favorite
+from ..search import match_expression, search_favorite_ids
+
+
+def mars_favorite(user, i, rover='Curiosity', camera=('FHAZ', 'Front Hazard Avoidance Camera'), earth_date='2015-05-30'):
+    return Favorite(
+        user=user,
+        favorite_type='mars_rover',
+        image_url=f'http://mars/{i}.jpg',
+        title=f'{rover} - {camera[1]}',
+        description=f'Sol: 1000, Earth Date: {earth_date}',
+        api_data={
+            'img_src': f'http://mars/{i}.jpg',
+            'earth_date': earth_date,
+            'rover': {'name': rover},
+            'camera': {'name': camera[0], 'full_name': camera[1]},
+        },
+    )
+
+
+class MatchExpressionTest(TestCase):
+    def test_terms_become_phrases_and_last_is_a_prefix(self):
+        self.assertEqual(match_expression('curiosity 2015-05'), '"curiosity" "2015-05"*')
+
+    def test_fts_syntax_is_not_passed_through(self):
+        self.assertEqual(match_expression('title:"mars" OR (NEAR*'), '"title" "mars" "OR" "NEAR"*')
+        self.assertIsNone(match_expression('"*:()'))
+
+
+class SearchFavoritesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', password='pw')
+
+    def test_indexes_rover_camera_and_date_from_api_data(self):
+        curiosity = mars_favorite(self.user, 1)
+        curiosity.save()
+        mars_favorite(self.user, 2, rover='Perseverance', camera=('NAVCAM_LEFT', 'Navigation Camera'),
+                      earth_date='2021-03-01').save()
+
+        self.assertEqual(search_favorite_ids(self.user.pk, 'fhaz'), [curiosity.pk])
+        self.assertEqual(search_favorite_ids(self.user.pk, 'hazard curio'), [curiosity.pk])
+        self.assertEqual(search_favorite_ids(self.user.pk, '2015-05'), [curiosity.pk])
+        self.assertEqual(len(search_favorite_ids(self.user.pk, 'camera')), 2)
+
+    def test_apod_date_is_indexed(self):
+        apod = Favorite.objects.create(
+            user=self.user, favorite_type='apod', image_url='http://apod.jpg', title='Pillars of Creation',
+            description='Eagle Nebula', api_data={'date': '2024-01-01'},
+        )
+        self.assertEqual(search_favorite_ids(self.user.pk, '2024-01-01'), [apod.pk])
+
+    def test_index_follows_updates_and_bulk_changes(self):
+        Favorite.objects.bulk_create([mars_favorite(self.user, i) for i in range(3)])
+        self.assertEqual(len(search_favorite_ids(self.user.pk, 'curiosity')), 3)
+
+        Favorite.objects.filter(image_url='http://mars/0.jpg').update(title='Renamed', api_data={})
+        Favorite.objects.filter(image_url='http://mars/1.jpg').delete()
+        self.assertEqual(len(search_favorite_ids(self.user.pk, 'curiosity')), 1)
+        self.assertEqual(len(search_favorite_ids(self.user.pk, 'renamed')), 1)
+
+    def test_results_are_limited_to_user_and_type(self):
+        other = User.objects.create_user(username='other', password='pw')
+        mars_favorite(other, 1).save()
+        mars = mars_favorite(self.user, 2)
+        mars.save()
+        apod = Favorite.objects.create(
+            user=self.user, favorite_type='apod', image_url='http://apod.jpg', title='Curiosity at Gale Crater',
+            description='', api_data={},
+        )
+
+        self.assertEqual(set(search_favorite_ids(self.user.pk, 'curiosity')), {mars.pk, apod.pk})
+        self.assertEqual(search_favorite_ids(self.user.pk, 'curiosity', 'apod'), [apod.pk])
+        # The owner and kind columns are not searchable text.
+        self.assertEqual(search_favorite_ids(self.user.pk, 'apod'), [])
+
+    def test_title_matches_rank_first_and_pages_are_stable(self):
+        in_description = Favorite.objects.create(
+            user=self.user, favorite_type='apod', image_url='http://a.jpg', title='Spiral galaxy',
+            description='A long explanation that mentions Andromeda once among many other words', api_data={},
+        )
+        in_title = Favorite.objects.create(
+            user=self.user, favorite_type='apod', image_url='http://b.jpg', title='Andromeda', description='',
+            api_data={},
+        )
+
+        self.assertEqual(search_favorite_ids(self.user.pk, 'andromeda'), [in_title.pk, in_description.pk])
+        self.assertEqual(search_favorite_ids(self.user.pk, 'andromeda', limit=1, offset=1), [in_description.pk])
+
+    @patch('main.search.MAX_RANKED', 2)
+    def test_matches_are_ranked_in_bands_newest_first(self):
+        favorites = Favorite.objects.bulk_create([mars_favorite(self.user, i) for i in range(5)])
+        ids = [f.pk for f in favorites]
+
+        self.assertEqual(sorted(search_favorite_ids(self.user.pk, 'curiosity', limit=2)), sorted(ids[3:]))
+        self.assertEqual(search_favorite_ids(self.user.pk, 'curiosity', limit=2, offset=4), [ids[0]])
+        # A page may span two bands.
+        pages = [search_favorite_ids(self.user.pk, 'curiosity', limit=3, offset=offset) for offset in (0, 3, 6)]
+        self.assertEqual([len(page) for page in pages], [3, 2, 0])
+        self.assertEqual(sorted(pages[0] + pages[1]), sorted(ids))
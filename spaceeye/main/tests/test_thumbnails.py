@@ -0,0 +1,125 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import skipIf
+from unittest.mock import patch, MagicMock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from ..templatetags.image_proxy import thumbnail
+from ..thumbnails import (
+    THUMBNAIL_SIZES, Image, _write, evict, get_thumbnail, is_allowed_url, render_thumbnails, thumbnail_key, thumbnail_path
+)
+
+
+def _jpeg(width=2000, height=1500):
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(output, 'JPEG')
+    return output.getvalue()
+
+
+@skipIf(Image is None, 'Pillow is not installed')
+class ThumbnailTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(THUMBNAIL_CACHE_DIR=self.cache_dir)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_dir)
+
+    def _image_response(self):
+        response = MagicMock()
+        response.content = _jpeg()
+        response.raise_for_status = lambda: None
+        return response
+
+    def test_only_nasa_hosts_are_proxied(self):
+        self.assertTrue(is_allowed_url('https://mars.nasa.gov/msl-raw-images/1.jpg'))
+        self.assertTrue(is_allowed_url('http://mars.jpl.nasa.gov/msl-raw-images/1.jpg'))
+        self.assertFalse(is_allowed_url('https://evil.example.com/nasa.gov.jpg'))
+        self.assertFalse(is_allowed_url('file:///etc/passwd'))
+
+    @patch('main.thumbnails.nasa_client.get')
+    def test_all_sizes_rendered_from_one_download(self, mock_get):
+        mock_get.return_value = self._image_response()
+        url = 'https://mars.nasa.gov/photo.jpg'
+
+        grid_path = get_thumbnail(url, 'grid')
+        modal_path = get_thumbnail(url, 'modal')
+
+        self.assertEqual(mock_get.call_count, 1)
+        with Image.open(grid_path) as grid:
+            self.assertEqual(grid.size, (400, 300))
+        with Image.open(modal_path) as modal:
+            self.assertEqual(modal.size, (1280, 960))
+
+    @patch('main.thumbnails.nasa_client.get')
+    def test_waits_for_another_process_rendering_the_same_image(self, mock_get):
+        url = 'https://mars.nasa.gov/photo.jpg'
+        cache.set(f'thumbnail_{thumbnail_key(url, "all")}_lock', 'other-process')
+        rendered = render_thumbnails(_jpeg(), THUMBNAIL_SIZES)
+
+        def other_process():
+            time.sleep(0.3)
+            for size, content in rendered.items():
+                _write(thumbnail_path(thumbnail_key(url, size)), content)
+
+        thread = threading.Thread(target=other_process)
+        thread.start()
+        started = time.monotonic()
+        path = get_thumbnail(url, 'grid')
+        thread.join()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(path, thumbnail_path(thumbnail_key(url, 'grid')))
+        mock_get.assert_not_called()
+
+    def test_evicts_least_recently_used(self):
+        os.makedirs(os.path.join(self.cache_dir, 'ab'))
+        paths = []
+        for i in range(4):
+            path = os.path.join(self.cache_dir, 'ab', f'{i}.jpg')
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+            paths.append(path)
+
+        with self.settings(THUMBNAIL_CACHE_MAX_BYTES=250):
+            removed = evict()
+
+        self.assertEqual(removed, 2)
+        self.assertEqual([os.path.exists(path) for path in paths], [False, False, True, True])
+
+    @patch('main.thumbnails.nasa_client.get')
+    def test_proxy_serves_thumbnail_with_strong_etag(self, mock_get):
+        mock_get.return_value = self._image_response()
+        url = reverse('main:image_proxy') + '?size=grid&url=https://mars.nasa.gov/photo.jpg'
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertFalse(resp['ETag'].startswith('W/'))
+        b''.join(resp.streaming_content)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_proxy_redirects_foreign_hosts(self):
+        resp = self.client.get(reverse('main:image_proxy') + '?size=modal&url=https://example.com/a.jpg')
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(resp['Location'], 'https://example.com/a.jpg')
+
+    def test_proxy_rejects_non_http_urls(self):
+        resp = self.client.get(reverse('main:image_proxy') + '?size=grid&url=file:///etc/passwd')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_filter_links_foreign_hosts_directly(self):
+        self.assertEqual(thumbnail('https://example.com/a.jpg'), 'https://example.com/a.jpg')
+        self.assertTrue(thumbnail('https://mars.nasa.gov/photo.jpg').startswith(reverse('main:image_proxy')))
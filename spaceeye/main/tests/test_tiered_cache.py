@@ -0,0 +1,89 @@
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import zlib
+from django.conf import settings
+from django.test import SimpleTestCase
+from ..tiered_cache import TieredCache, _MemoryTier
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.worker()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def worker(self, **options):
+        # Every backend gets its own L1, standing in for a separate process.
+        backend = TieredCache(self.path, {'OPTIONS': {'L1_BYPASS_SUFFIXES': ['_lock'], **options}})
+        backend._l1 = _MemoryTier()
+        return backend
+
+    def test_values_are_copies(self):
+        self.cache.set('payload', {'photos': [{'id': 1}]}, 60)
+        self.cache.get('payload')['photos'][0]['is_favorited'] = True
+        self.assertEqual(self.cache.get('payload'), {'photos': [{'id': 1}]})
+
+    def test_writes_are_shared_and_compressed(self):
+        payload = {'photos': [{'img_src': f'http://mars/{i}.jpg', 'camera': 'FHAZ'} for i in range(100)]}
+        self.cache.set('payload', payload, 60)
+
+        self.assertEqual(self.worker().get('payload'), payload)
+        value = sqlite3.connect(self.path).execute('SELECT value FROM cache_entry').fetchone()[0]
+        self.assertEqual(pickle.loads(zlib.decompress(value)), payload)
+        self.assertLess(len(value), len(pickle.dumps(payload)) / 4)
+
+    def test_l1_serves_without_l2(self):
+        self.cache.set('payload', 'value', 60)
+        sqlite3.connect(self.path, isolation_level=None).execute('DELETE FROM cache_entry')
+        self.assertEqual(self.cache.get('payload'), 'value')
+        self.assertIsNone(self.worker().get('payload'))
+
+    def test_add_and_incr_are_shared_between_workers(self):
+        other = self.worker()
+        self.assertTrue(self.cache.add('job_lock', 'a', 60))
+        self.assertFalse(other.add('job_lock', 'b', 60))
+        self.assertEqual(other.get('job_lock'), 'a')
+
+        self.cache.delete('job_lock')
+        self.assertTrue(other.add('job_lock', 'b', 60))
+
+        self.cache.add('counter', 0, None)
+        self.assertEqual(self.cache.incr('counter'), 1)
+        self.assertEqual(other.incr('counter'), 2)
+        with self.assertRaises(ValueError):
+            other.incr('missing')
+
+    def test_lock_keys_bypass_l1(self):
+        self.cache.add('job_lock', 'a', 60)
+        self.worker().delete('job_lock')
+        self.assertIsNone(self.cache.get('job_lock'))
+
+    def test_l1_is_bounded(self):
+        backend = self.worker(L1_MAX_BYTES=1000)
+        for i in range(20):
+            backend.set(f'key_{i}', 'x' * 100, 60)
+        self.assertLessEqual(backend._l1.size, 1000)
+        self.assertEqual(backend.get('key_0'), 'x' * 100)
+
+    def test_get_many_mixes_tiers(self):
+        self.cache.set('a', 1, 60)
+        self.worker().set('b', 2, 60)
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+
+    async def test_async_api(self):
+        await self.cache.aset('payload', {'value': 1}, 60)
+        self.assertEqual(await self.cache.aget('payload'), {'value': 1})
+        self.assertEqual(await self.worker().aget_many(['payload']), {'payload': {'value': 1}})
+        self.assertTrue(await self.cache.aadd('job_lock', 'a', 60))
+        self.assertFalse(await self.worker().aadd('job_lock', 'b', 60))
+
+    def test_suite_does_not_use_the_site_cache(self):
+        location = settings.CACHES['default']['LOCATION']
+        self.assertTrue(location.startswith(tempfile.gettempdir()))
+        self.assertNotIn(str(settings.BASE_DIR), location)
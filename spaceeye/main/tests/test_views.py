@@ -1,11 +1,20 @@
+import asyncio
 import json
+import time
+from datetime import date, timedelta
 from unittest.mock import patch, MagicMock
-from django.test import TestCase, Client
+from asgiref.sync import async_to_sync
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from ..models import Favorite
-from ..views import get_apod_data
+from ..caching import make_entry
+from ..mars_payload import photo_urls
+from ..nasa_data import prefetch_apod_range
+from ..views import aget_apod_entry, aget_mars_rover_entry
 
 
 class MainViewsTests(TestCase):
@@ -16,32 +25,166 @@ class MainViewsTests(TestCase):
         )
         cache.clear()
 
-    def test_index_view_anonymous(self):
+    @patch("main.views.aget_apod_entry")
+    def test_index_view_anonymous(self, mock_apod):
+        mock_apod.return_value = make_entry({"url": "http://image.jpg", "title": "Test"}, 60)
         url = reverse("main:index")
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
         self.assertTemplateUsed(resp, "main/index.html")
         self.assertIn("nasa_data", resp.context)
 
-    @patch("main.views.get_apod_data")
+    @patch("main.views.aget_apod_entry")
     def test_index_view_with_date_and_authenticated(self, mock_apod):
         self.client.login(username="testuser", password="testpass")
-        mock_apod.return_value = {"url": "http://image.jpg", "title": "Test"}
+        mock_apod.return_value = make_entry({"url": "http://image.jpg", "title": "Test"}, 60)
         url = reverse("main:index") + "?date=2024-05-01"
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
         self.assertTrue("is_favorited" in resp.context)
 
-    @patch("main.views.requests.get")
-    def test_get_apod_data_success(self, mock_get):
+    @patch("main.views.nasa_client.get")
+    async def test_aget_apod_entry_success(self, mock_get):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {"media_type": "image", "url": "http://test.jpg"}
         mock_resp.raise_for_status = lambda: None
         mock_get.return_value = mock_resp
 
-        data = get_apod_data("2024-01-01")
-        self.assertIn("url", data)
-        self.assertEqual(data["source"], "apod")
+        entry = await aget_apod_entry("2024-01-01")
+        self.assertIn("url", entry["data"])
+        self.assertEqual(entry["data"]["source"], "apod")
+        self.assertEqual(entry["etag"], (await aget_apod_entry("2024-01-01"))["etag"])
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("main.views.aget_mars_rover_entry")
+    def test_mars_rover_photos_marks_favorites(self, mock_rover):
+        Favorite.objects.create(
+            user=self.user,
+            favorite_type="mars_rover",
+            image_url="http://mars/1.jpg",
+            title="Pic",
+            api_data={},
+        )
+        mock_rover.return_value = make_entry({
+            "photos": [{"img_src": "http://mars/1.jpg"}, {"img_src": "http://mars/2.jpg"}],
+            "source": "mars_rover",
+        }, 60)
+        self.client.login(username="testuser", password="testpass")
+        resp = self.client.get(reverse("main:mars_rover") + "?rover=curiosity&sol=1000")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["favorited_urls"], ["http://mars/1.jpg"])
+        self.assertContains(resp, 'data-image-url="http://mars/2.jpg"')
+
+    @patch("main.views.aget_mars_rover_entry")
+    def test_mars_rover_grid_fragment_is_shared_between_users(self, mock_rover):
+        User.objects.create_user(username="other", password="testpass")
+        mock_rover.return_value = make_entry({
+            "photos": [{"img_src": "http://mars/1.jpg"}],
+            "source": "mars_rover",
+        }, 60)
+        url = reverse("main:mars_rover") + "?rover=curiosity&sol=1000"
+
+        self.client.login(username="testuser", password="testpass")
+        first = self.client.get(url)
+        self.client.login(username="other", password="testpass")
+        second = self.client.get(url)
+
+        self.assertTemplateUsed(first, "main/partials/mars_photo_grid.html")
+        self.assertTemplateNotUsed(second, "main/partials/mars_photo_grid.html")
+        self.assertContains(second, 'data-image-url="http://mars/1.jpg"')
+
+    @patch("main.views.nasa_client.get")
+    def test_prefetch_apod_range_fills_per_date_keys(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = [
+            {"date": "2024-01-01", "media_type": "image", "url": "http://1.jpg"},
+            {"date": "2024-01-02", "media_type": "video", "url": "http://2.mp4"},
+        ]
+        mock_resp.raise_for_status = lambda: None
+        mock_get.return_value = mock_resp
+
+        cached = prefetch_apod_range(date(2024, 1, 1), date(2024, 1, 2))
+
+        self.assertEqual(cached, 2)
+        self.assertEqual(mock_get.call_args.kwargs["params"]["start_date"], "2024-01-01")
+        self.assertEqual(mock_get.call_args.kwargs["params"]["end_date"], "2024-01-02")
+        self.assertEqual(async_to_sync(aget_apod_entry)("2024-01-01")["data"]["url"], "http://1.jpg")
+        self.assertIn("error", async_to_sync(aget_apod_entry)("2024-01-02")["data"])
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("main.views._prefetch_mars_rover_page")
+    @patch("main.views.aget_mission_manifest", return_value=None)
+    @patch("main.views.nasa_client.get")
+    def test_mars_rover_entry_pages_through_sol(self, mock_get, _, mock_prefetch):
+        def page_response(url, params=None, timeout=None):
+            count = 25 if params["page"] == 1 else 3
+            mock_resp = MagicMock()
+            mock_resp.json.return_value = {
+                "photos": [{"id": i, "img_src": f"http://mars/{params['page']}/{i}.jpg"} for i in range(count)]
+            }
+            mock_resp.raise_for_status = lambda: None
+            return mock_resp
+
+        mock_get.side_effect = page_response
+
+        first = async_to_sync(aget_mars_rover_entry)("curiosity", 1000)["data"]
+        self.assertEqual(len(photo_urls(first)), 25)
+        self.assertEqual(first["next_page"], 2)
+        mock_prefetch.assert_called_once_with("curiosity", 1000, 2)
+
+        second = async_to_sync(aget_mars_rover_entry)("curiosity", 1000, page=2)["data"]
+        self.assertEqual(len(photo_urls(second)), 3)
+        self.assertIsNone(second["next_page"])
+        self.assertEqual(second["total_photos"], 28)
+
+    @patch("main.views.aget_mars_rover_entry")
+    def test_api_data_ajax_passes_page(self, mock_rover):
+        mock_rover.return_value = make_entry({"photos": [], "source": "mars_rover", "page": 3}, 60)
+        url = reverse("main:api_data_ajax") + "?type=mars_rover&sol=1000&rover=curiosity&page=3"
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        mock_rover.assert_called_once_with("curiosity", 1000, 3)
+
+    @patch("main.views.aget_apod_entry")
+    def test_api_data_ajax_conditional_get(self, mock_apod):
+        mock_apod.return_value = make_entry({"url": "http://image.jpg", "source": "apod"}, 60 * 60 * 24)
+        url = reverse("main:api_data_ajax") + "?type=apod&date=2024-01-01"
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("max-age=86", resp["Cache-Control"])
+        self.assertIn("Last-Modified", resp)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+    @patch("main.views.aget_mars_rover_entry")
+    def test_mars_rover_photos_etag_varies_with_favorites(self, mock_rover):
+        mock_rover.return_value = make_entry({
+            "photos": [{"img_src": "http://mars/1.jpg"}],
+            "source": "mars_rover",
+        }, 60)
+        self.client.login(username="testuser", password="testpass")
+        url = reverse("main:mars_rover") + "?rover=curiosity&sol=1000"
+
+        first = self.client.get(url)
+        self.assertIn("private", first["Cache-Control"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH="*").status_code, 200)
+
+        self.client.post(
+            reverse("main:add_to_favorites"),
+            data=json.dumps({"type": "mars_rover", "data": {"img_src": "http://mars/1.jpg"}}),
+            content_type="application/json",
+        )
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
 
     def test_api_data_ajax_invalid_type(self):
         url = reverse("main:api_data_ajax") + "?type=unknown"
@@ -49,14 +192,105 @@ class MainViewsTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertJSONEqual(resp.content, {"error": "Invalid API type"})
 
-    @patch("main.views.get_mars_rover_data")
+    @patch("main.views.aget_mars_rover_entry")
     def test_api_data_ajax_mars_rover(self, mock_rover):
-        mock_rover.return_value = {"photos": [], "source": "mars_rover"}
+        mock_rover.return_value = make_entry({"photos": [], "source": "mars_rover"}, 60)
         url = reverse("main:api_data_ajax") + "?type=mars_rover&sol=1000&rover=curiosity"
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
         self.assertIn("mars_rover", resp.json()["source"])
 
+    @patch("main.views.aget_mars_rover_entry")
+    @patch("main.views.aget_apod_entry")
+    def test_api_data_batch_isolates_errors(self, mock_apod, mock_rover):
+        mock_apod.return_value = make_entry({"url": "http://image.jpg", "source": "apod"}, 60)
+
+        async def rover_entry(rover, sol, page):
+            if sol == 13:
+                raise ValueError("bad sol")
+            return make_entry({"photos": [], "source": "mars_rover", "sol": sol}, 60)
+
+        mock_rover.side_effect = rover_entry
+        queries = [
+            {"type": "apod", "date": "2024-01-01"},
+            {"type": "mars_rover", "rover": "Spirit", "sol": 13},
+            {"type": "mars_rover", "rover": "curiosity", "sol": 1000, "page": 2},
+            {"type": "mars_rover", "rover": "pathfinder", "sol": 1},
+            {"type": "apod", "date": "2024-01-01"},
+            {"type": "apod", "date": "yesterday"},
+        ]
+
+        resp = self.client.post(
+            reverse("main:api_data_batch"), data=json.dumps({"queries": queries}), content_type="application/json"
+        )
+
+        results = resp.json()["results"]
+        self.assertEqual([r["query"] for r in results], queries)
+        self.assertEqual(results[0]["data"]["source"], "apod")
+        self.assertEqual(results[1]["error"], "Request failed")
+        self.assertEqual(results[2]["data"]["sol"], 1000)
+        self.assertEqual(results[3]["error"], "Invalid rover")
+        self.assertEqual(results[4], {**results[0], "query": queries[4]})
+        self.assertEqual(results[5]["error"], "Invalid date")
+        mock_apod.assert_called_once_with("2024-01-01")
+        self.assertEqual(sorted(call.args for call in mock_rover.call_args_list), [("curiosity", 1000, 2), ("spirit", 13, 1)])
+
+    @override_settings(API_BATCH_CONCURRENCY=2)
+    @patch("main.views.aget_apod_entry")
+    def test_api_data_batch_bounds_concurrent_misses(self, mock_apod):
+        cache.set("nasa_apod_data_2024-01-01", make_entry({"source": "apod"}, 60))
+        running = []
+        peak = []
+
+        async def apod_entry(date):
+            running.append(date)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(date)
+            return make_entry({"source": "apod", "date": date}, 60)
+
+        mock_apod.side_effect = apod_entry
+        queries = [{"type": "apod", "date": f"2024-01-{day:02d}"} for day in range(1, 8)]
+
+        resp = self.client.post(
+            reverse("main:api_data_batch"), data=json.dumps({"queries": queries}), content_type="application/json"
+        )
+
+        results = resp.json()["results"]
+        self.assertEqual([r["cached"] for r in results], [True] + [False] * 6)
+        # The cached date does not wait for a slot.
+        self.assertEqual(max(peak), 3)
+
+    @override_settings(API_BATCH_CONCURRENCY=4)
+    @patch("main.views.nasa_client.get")
+    def test_api_data_batch_fetches_sync_misses_in_parallel(self, mock_get):
+        def slow_response(url, params=None, timeout=None):
+            time.sleep(0.5)
+            mock_resp = MagicMock()
+            mock_resp.json.return_value = {"media_type": "image", "url": f"http://{params['date']}.jpg"}
+            mock_resp.raise_for_status = lambda: None
+            return mock_resp
+
+        mock_get.side_effect = slow_response
+        queries = [{"type": "apod", "date": f"2024-01-{day:02d}"} for day in range(1, 5)]
+
+        started = time.monotonic()
+        resp = self.client.post(
+            reverse("main:api_data_batch"), data=json.dumps({"queries": queries}), content_type="application/json"
+        )
+
+        # Four 0.5s misses take about one fetch, not four in turn.
+        self.assertLess(time.monotonic() - started, 1.2)
+        self.assertEqual([r["data"]["url"] for r in resp.json()["results"]],
+                         [f"http://2024-01-{day:02d}.jpg" for day in range(1, 5)])
+
+    def test_api_data_batch_rejects_oversized_batch(self):
+        queries = [{"type": "apod"}] * 21
+        resp = self.client.post(
+            reverse("main:api_data_batch"), data=json.dumps({"queries": queries}), content_type="application/json"
+        )
+        self.assertEqual(resp.json(), {"error": "At most 20 queries per batch"})
+
     def test_add_to_favorites_apod(self):
         self.client.login(username="testuser", password="testpass")
         url = reverse("main:add_to_favorites")
@@ -86,6 +320,53 @@ class MainViewsTests(TestCase):
         self.assertJSONEqual(resp.content, {"success": True, "action": "removed"})
         self.assertEqual(Favorite.objects.count(), 0)
 
+    def test_batch_favorites(self):
+        Favorite.objects.create(
+            user=self.user,
+            favorite_type="apod",
+            image_url="http://apod.jpg",
+            title="APOD",
+            api_data={},
+        )
+        self.client.login(username="testuser", password="testpass")
+        operations = [
+            {"op": "add", "type": "mars_rover", "data": {"img_src": "http://mars/1.jpg", "sol": 1}},
+            {"op": "add", "type": "mars_rover", "data": {"img_src": "http://mars/2.jpg", "sol": 1}},
+            {"op": "add", "type": "mars_rover", "data": {"img_src": "http://mars/1.jpg", "sol": 1}},
+            {"op": "remove", "type": "apod", "image_url": "http://apod.jpg"},
+            {"op": "remove", "type": "apod", "image_url": "http://missing.jpg"},
+            {"op": "add", "type": "unknown", "data": {}},
+        ]
+
+        with self.assertNumQueries(7):
+            resp = self.client.post(
+                reverse("main:batch_favorites"),
+                data=json.dumps({"operations": operations}),
+                content_type="application/json",
+            )
+
+        body = resp.json()
+        self.assertTrue(body["success"])
+        self.assertEqual((body["added"], body["removed"]), (2, 1))
+        self.assertEqual(
+            [r.get("action") or r["error"] for r in body["results"]],
+            ["added", "added", "Already in favorites", "removed", "Not found in favorites", "Invalid type"],
+        )
+        self.assertEqual(
+            set(Favorite.objects.values_list("image_url", flat=True)),
+            {"http://mars/1.jpg", "http://mars/2.jpg"},
+        )
+
+    def test_batch_favorites_rejects_oversized_batch(self):
+        self.client.login(username="testuser", password="testpass")
+        operations = [{"op": "remove", "type": "apod", "image_url": f"http://{i}.jpg"} for i in range(101)]
+        resp = self.client.post(
+            reverse("main:batch_favorites"),
+            data=json.dumps({"operations": operations}),
+            content_type="application/json",
+        )
+        self.assertFalse(resp.json()["success"])
+
     def test_favorites_list_filter(self):
         Favorite.objects.create(
             user=self.user,
@@ -102,6 +383,135 @@ class MainViewsTests(TestCase):
         self.assertTemplateUsed(resp, "main/favorites.html")
         self.assertEqual(len(resp.context["favorites"]), 1)
 
+    def test_favorites_list_keyset_pagination(self):
+        created_at = timezone.now()
+        for i in range(30):
+            favorite = Favorite.objects.create(
+                user=self.user,
+                favorite_type="apod",
+                image_url=f"http://img{i}.jpg",
+                title=f"Pic {i}",
+                description="desc " * 100,
+                api_data={"date": "2024-01-01"},
+            )
+            # Ties on created_at must still page by id.
+            Favorite.objects.filter(pk=favorite.pk).update(created_at=created_at - timedelta(minutes=i // 2))
+        self.client.login(username="testuser", password="testpass")
+
+        resp = self.client.get(reverse("main:favorites"))
+        first_page = resp.context["favorites"]
+        self.assertEqual(len(first_page), 24)
+        self.assertIsNotNone(resp.context["next_cursor"])
+        self.assertEqual(first_page[0].get_deferred_fields(), {"api_data", "description"})
+        self.assertEqual(len(first_page[0].summary), 200)
+
+        resp = self.client.get(reverse("main:favorites"), {"after": resp.context["next_cursor"]})
+        second_page = resp.context["favorites"]
+        self.assertEqual(len(second_page), 6)
+        self.assertIsNone(resp.context["next_cursor"])
+        seen = [f.pk for f in first_page] + [f.pk for f in second_page]
+        self.assertEqual(sorted(seen), sorted(Favorite.objects.values_list("pk", flat=True)))
+
+    def test_favorites_list_search(self):
+        for i in range(30):
+            Favorite.objects.create(
+                user=self.user,
+                favorite_type="mars_rover",
+                image_url=f"http://mars/{i}.jpg",
+                title=f"Curiosity - Camera {i}",
+                description="desc " * 100,
+                api_data={"rover": {"name": "Curiosity"}, "earth_date": "2015-05-30"},
+            )
+        Favorite.objects.create(
+            user=self.user, favorite_type="apod", image_url="http://apod.jpg", title="Nebula", api_data={}
+        )
+        self.client.login(username="testuser", password="testpass")
+
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse("main:favorites"), {"q": "curiosity"})
+        first_page = resp.context["favorites"]
+        self.assertEqual(len(first_page), 24)
+        self.assertEqual(resp.context["next_page"], 2)
+        self.assertEqual(first_page[0].get_deferred_fields(), {"api_data", "description"})
+
+        resp = self.client.get(reverse("main:favorites"), {"q": "curiosity", "page": 2})
+        self.assertEqual(len(resp.context["favorites"]), 6)
+        self.assertIsNone(resp.context["next_page"])
+        self.assertEqual(resp.context["previous_page"], 1)
+
+        resp = self.client.get(reverse("main:favorites"), {"q": "curiosity", "type": "apod"})
+        self.assertEqual(resp.context["favorites"], [])
+        self.assertContains(resp, "No Matches")
+
+    def test_favorites_export_streams_ndjson(self):
+        Favorite.objects.create(
+            user=self.user, favorite_type="apod", image_url="http://apod.jpg", title="Nebula", api_data={"a": 1}
+        )
+        self.client.login(username="testuser", password="testpass")
+
+        resp = self.client.get(reverse("main:favorites_export"), {"format": "ndjson"})
+
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        self.assertIn("attachment", resp["Content-Disposition"])
+        rows = [json.loads(line) for line in b"".join(resp.streaming_content).decode().splitlines()]
+        self.assertEqual([(row["title"], row["api_data"]) for row in rows], [("Nebula", {"a": 1})])
+
+        resp = self.client.get(reverse("main:favorites_export"), {"format": "xml"})
+        self.assertEqual(resp.status_code, 400)
+
+    async def test_favorites_export_streams_asynchronously_under_asgi(self):
+        await Favorite.objects.acreate(
+            user=self.user, favorite_type="apod", image_url="http://apod.jpg", title="Nebula", api_data={}
+        )
+        await self.async_client.aforce_login(self.user)
+
+        resp = await self.async_client.get(reverse("main:favorites_export"), {"format": "csv"})
+
+        self.assertTrue(resp.is_async)
+        content = b"".join([chunk async for chunk in resp.streaming_content]).decode()
+        self.assertEqual(content.splitlines()[1].split(",")[:4], ["apod", "Nebula", "", "http://apod.jpg"])
+
+    def test_favorites_import_upload(self):
+        self.client.login(username="testuser", password="testpass")
+        upload = SimpleUploadedFile(
+            "favorites.csv",
+            b"favorite_type,title,description,image_url,api_data\r\n"
+            b'apod,Nebula,,https://apod.nasa.gov/n.jpg,"{""date"": ""2024-01-01""}"\r\n'
+            b"apod,Broken,,not-a-url,{}\r\n",
+        )
+
+        resp = self.client.post(reverse("main:favorites_import"), {"file": upload}, follow=True)
+
+        self.assertRedirects(resp, reverse("main:favorites"))
+        self.assertEqual(Favorite.objects.get(user=self.user).api_data, {"date": "2024-01-01"})
+        self.assertEqual(
+            [str(message) for message in resp.context["messages"]],
+            [
+                "Imported 1 favorites; 0 were already saved.",
+                "Skipped 1 invalid rows (line 3: Invalid image URL).",
+            ],
+        )
+
+    def test_favorite_detail(self):
+        favorite = Favorite.objects.create(
+            user=self.user,
+            favorite_type="apod",
+            image_url="http://img.jpg",
+            title="Pic",
+            description="desc",
+            api_data={"date": "2024-01-01"},
+        )
+        User.objects.create_user(username="other", password="testpass")
+        self.client.login(username="other", password="testpass")
+        resp = self.client.get(reverse("main:favorite_detail", args=[favorite.pk]))
+        self.assertEqual(resp.status_code, 404)
+
+        self.client.login(username="testuser", password="testpass")
+        resp = self.client.get(reverse("main:favorite_detail", args=[favorite.pk]))
+        self.assertEqual(resp.json()["favorite"]["api_data"], {"date": "2024-01-01"})
+        self.assertEqual(resp.json()["favorite"]["description"], "desc")
+
     def test_register_view_success(self):
         url = reverse("main:register")
         data = {
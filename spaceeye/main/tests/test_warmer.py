@@ -0,0 +1,90 @@
+import time
+from datetime import date
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache
+from .. import lookup_stats
+from ..caching import cache_payload, make_entry
+from ..nasa_data import apod_picker_key
+from ..warmer import DAY, ROLLOVER_DELAY, Scheduler, due_at, plan, warm_picker
+
+
+@override_settings(NASA_WARM_LEAD_TIME=300)
+class DueAtTest(SimpleTestCase):
+    def test_missing_entry_is_due_now(self):
+        self.assertEqual(due_at(('apod', '2024-01-01'), None), 0)
+
+    def test_due_lead_time_before_going_stale(self):
+        entry = make_entry({'title': 'x'}, 3600)
+        self.assertEqual(due_at(('apod', '2024-01-01'), entry), entry['fresh_until'] - 300)
+
+    def test_todays_apod_is_due_after_utc_rollover(self):
+        entry = {**make_entry({'title': 'x'}, 7200), 'fetched_at': 10 * DAY - 60}
+        entry['fresh_until'] = entry['fetched_at'] + 7200
+        self.assertEqual(due_at(('apod', None), entry), 10 * DAY + ROLLOVER_DELAY)
+
+
+@patch('main.lookup_stats.FLUSH_INTERVAL', 3600)
+@patch('main.warmer.get_mission_manifest', return_value={'populated_sols': [1, 5, 7, 9]})
+class PlanTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        lookup_stats._pending.clear()
+
+    def test_seeds_recent_sols_and_hot_targets(self, _):
+        lookup_stats.record(('apod', '2024-01-01'), 'miss')
+        lookup_stats.record(('apod', None), 'miss')
+        lookup_stats.flush()
+
+        self.assertEqual(plan(10), [
+            ('apod', None),
+            ('mars_rover', 'curiosity', 1000, 1),
+            ('mars_rover', 'perseverance', 5, 1),
+            ('mars_rover', 'perseverance', 7, 1),
+            ('mars_rover', 'perseverance', 9, 1),
+            ('apod', '2024-01-01'),
+        ])
+
+
+@override_settings(NASA_WARM_LEAD_TIME=300)
+@patch('main.warmer.warm_picker')
+@patch('main.warmer.plan', return_value=[('apod', '2024-01-01'), ('mars_rover', 'curiosity', 1000, 1)])
+class SchedulerTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch('main.warmer.fetch_mars_rover_data')
+    @patch('main.warmer.fetch_apod_data')
+    def test_refreshes_only_targets_near_expiry(self, mock_apod, mock_mars, *_):
+        cache_payload('nasa_apod_data_2024-01-01', {'title': 'x'}, 60)
+        cache_payload('mars_rover_curiosity_1000', {'photos': []}, 3600)
+
+        refreshed, next_due = Scheduler(interval=60).run_once()
+
+        self.assertEqual(refreshed, [('apod', '2024-01-01')])
+        mock_apod.assert_called_once_with('nasa_apod_data_2024-01-01', '2024-01-01')
+        mock_mars.assert_not_called()
+        self.assertLessEqual(next_due, time.time() + 60)
+
+    @patch('main.warmer.fetch_mars_rover_data')
+    @patch('main.warmer.fetch_apod_data')
+    def test_skips_keys_another_worker_is_fetching(self, mock_apod, mock_mars, *_):
+        cache.add('nasa_apod_data_2024-01-01_lock', 'other', 30)
+
+        refreshed, _ = Scheduler(interval=60).run_once()
+
+        self.assertEqual(refreshed, [('mars_rover', 'curiosity', 1000, 1)])
+        mock_apod.assert_not_called()
+
+
+@patch('main.warmer.warm_apod_picker', side_effect=lambda today: cache_payload(apod_picker_key(today), {'cached': 30}, 3600))
+class WarmPickerTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_warms_once_until_the_marker_goes_stale(self, mock_warm):
+        today = date(2024, 1, 30)
+
+        self.assertTrue(warm_picker(today))
+        self.assertFalse(warm_picker(today))
+        mock_warm.assert_called_once_with(today)
@@ -0,0 +1,189 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from . import nasa_client
+from .caching import single_flight
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = {
+    'grid': (400, 400),
+    'modal': (1280, 1280),
+}
+# Bump to invalidate every cached thumbnail (and its ETag) after changing sizes or quality.
+THUMBNAIL_VERSION = 1
+JPEG_QUALITY = 82
+# The cache directory is scanned for eviction once every EVICT_EVERY renders
+# of a process rather than after each one.
+EVICT_EVERY = 20
+
+_executor = None
+_executor_lock = threading.Lock()
+_evict_lock = threading.Lock()
+_renders = 0
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def thumbnails_available():
+    return Image is not None
+
+
+def is_allowed_url(url):
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    return parsed.scheme in ('http', 'https') and any(
+        host == allowed or host.endswith(f'.{allowed}')
+        for allowed in settings.IMAGE_PROXY_ALLOWED_HOSTS
+    )
+
+
+def thumbnail_key(url, size):
+    return hashlib.sha256(f'{THUMBNAIL_VERSION}:{size}:{url}'.encode()).hexdigest()
+
+
+def thumbnail_path(key):
+    return os.path.join(settings.THUMBNAIL_CACHE_DIR, key[:2], f'{key}.jpg')
+
+
+def get_thumbnail(url, size):
+    # Returns the path of the cached thumbnail, rendering every size of the
+    # image from a single download on a miss.
+    key = thumbnail_key(url, size)
+    path = thumbnail_path(key)
+    if _touch(path):
+        return path
+
+    # Nothing is cached under the flight's key; waiters in other processes
+    # are done once the leader's files exist.
+    single_flight(
+        f'thumbnail_{thumbnail_key(url, "all")}',
+        lambda: _render_all_sizes(url),
+        ready=lambda: _all_sizes_exist(url) or None,
+    )
+
+    if not os.path.exists(path):
+        raise ThumbnailError(f'Thumbnail for {url} could not be rendered')
+    return path
+
+
+def _all_sizes_exist(url):
+    return all(os.path.exists(thumbnail_path(thumbnail_key(url, size))) for size in THUMBNAIL_SIZES)
+
+
+def _render_all_sizes(url):
+    if _all_sizes_exist(url):
+        return True
+
+    response = nasa_client.get(url, timeout=30)
+    response.raise_for_status()
+
+    rendered = _get_executor().submit(render_thumbnails, response.content, THUMBNAIL_SIZES).result()
+    for size, content in rendered.items():
+        _write(thumbnail_path(thumbnail_key(url, size)), content)
+
+    _maybe_evict()
+    return True
+
+
+def render_thumbnails(content, sizes):
+    # Runs in the process pool; resizing is CPU bound.
+    results = {}
+    with Image.open(io.BytesIO(content)) as image:
+        image = image.convert('RGB')
+        for size, bounds in sizes.items():
+            thumbnail = image.copy()
+            thumbnail.thumbnail(bounds, Image.LANCZOS)
+            output = io.BytesIO()
+            thumbnail.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+            results[size] = output.getvalue()
+    return results
+
+
+def evict():
+    # Least recently used thumbnails (by mtime, refreshed on every hit) go
+    # first until the cache is back under 90% of its budget.
+    max_bytes = settings.THUMBNAIL_CACHE_MAX_BYTES
+    with _evict_lock:
+        entries = []
+        total = 0
+        for directory in _scandir(settings.THUMBNAIL_CACHE_DIR):
+            if not directory.is_dir():
+                continue
+            for entry in _scandir(directory.path):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+
+        logger.info(f"Evicted {removed} thumbnails from the image cache")
+        return removed
+
+
+def _maybe_evict():
+    global _renders
+
+    with _evict_lock:
+        _renders += 1
+        if _renders % EVICT_EVERY:
+            return
+    evict()
+
+
+def _get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS)
+        return _executor
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _scandir(path):
+    try:
+        return list(os.scandir(path))
+    except FileNotFoundError:
+        return []
@@ -0,0 +1,291 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+# Expired rows are purged, and the table culled down to MAX_ENTRIES, once
+# every CULL_EVERY writes of a process.
+CULL_EVERY = 100
+
+_memory_tiers = {}
+_memory_tiers_lock = threading.Lock()
+
+
+class _MemoryTier:
+    # Byte-bounded LRU of pickled values, each with its own expiry.
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                self._pop(key)
+                return None
+            self.entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, pickled, expires, max_bytes):
+        with self.lock:
+            self._pop(key)
+            self.entries[key] = (expires, pickled)
+            self.size += len(pickled)
+            while self.size > max_bytes:
+                self._pop(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        item = self.entries.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+class TieredCache(BaseCache):
+    # L1 is a small per-process LRU of pickled values; L2 is a SQLite file
+    # shared by every worker on the host, holding zlib-compressed pickles.
+    # Writes go through both tiers. L1 entries live at most L1_TIMEOUT
+    # seconds, which bounds how long another worker's write can go unseen;
+    # keys ending in one of L1_BYPASS_SUFFIXES are always read from L2.
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._l1_max_bytes = options.get('L1_MAX_BYTES', 16 * 1024 * 1024)
+        self._l1_timeout = options.get('L1_TIMEOUT', 5)
+        self._l1_bypass_suffixes = tuple(options.get('L1_BYPASS_SUFFIXES', ()))
+        self._compress_level = options.get('COMPRESS_LEVEL', 6)
+
+        # Django builds a backend per thread; L1 is shared by every thread of
+        # the process, like LocMemCache's storage.
+        with _memory_tiers_lock:
+            self._l1 = _memory_tiers.setdefault(location, _MemoryTier())
+        self._local = threading.local()
+        self._writes = 0
+
+    # L2
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _compress(self, pickled):
+        return zlib.compress(pickled, self._compress_level)
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % CULL_EVERY:
+            return
+
+        connection = self._connection()
+        connection.execute('DELETE FROM cache_entry WHERE expires <= ?', (time.time(),))
+        count = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count > self._max_entries:
+            # Entries closest to expiry go first; entries without a timeout last.
+            connection.execute(
+                'DELETE FROM cache_entry WHERE key IN ('
+                'SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count - self._max_entries + self._max_entries // self._cull_frequency,)
+            )
+
+    # L1
+
+    def _l1_get(self, key):
+        if key.endswith(self._l1_bypass_suffixes):
+            return None
+        return self._l1.get(key)
+
+    def _l1_set(self, key, pickled, expires):
+        if key.endswith(self._l1_bypass_suffixes) or len(pickled) > self._l1_max_bytes:
+            return
+        l1_expires = time.time() + self._l1_timeout
+        if expires is not None:
+            l1_expires = min(l1_expires, expires)
+        self._l1.set(key, pickled, l1_expires, self._l1_max_bytes)
+
+    def _l1_delete(self, key):
+        self._l1.delete(key)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = self._l1_get(key)
+        if pickled is not None:
+            return pickle.loads(pickled)
+
+        row = self._connection().execute(
+            'SELECT value, expires FROM cache_entry WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or _expired(row[1]):
+            return default
+
+        pickled = zlib.decompress(row[0])
+        self._l1_set(key, pickled, row[1])
+        return pickle.loads(pickled)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        results = {}
+        missing = []
+        for cache_key, key in keys.items():
+            pickled = self._l1_get(cache_key)
+            if pickled is None:
+                missing.append(cache_key)
+            else:
+                results[key] = pickle.loads(pickled)
+
+        if missing:
+            rows = self._connection().execute(
+                f'SELECT key, value, expires FROM cache_entry WHERE key IN ({",".join("?" * len(missing))})',
+                missing
+            ).fetchall()
+            for cache_key, value, expires in rows:
+                if _expired(expires):
+                    continue
+                pickled = zlib.decompress(value)
+                self._l1_set(cache_key, pickled, expires)
+                results[keys[cache_key]] = pickle.loads(pickled)
+
+        return results
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._compress(pickled), expires)
+        )
+        self._l1_set(key, pickled, expires)
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # A single upsert that only overwrites an expired row, so concurrent
+        # workers racing for the same key get exactly one winner.
+        key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        cursor = self._connection().execute(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?',
+            (key, self._compress(pickled), expires, time.time())
+        )
+        if cursor.rowcount != 1:
+            self._l1_delete(key)
+            return False
+
+        self._l1_set(key, pickled, expires)
+        self._maybe_cull()
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT value, expires FROM cache_entry WHERE key = ?', (key,)).fetchone()
+            if row is None or _expired(row[1]):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(zlib.decompress(row[0])) + delta
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute('UPDATE cache_entry SET value = ? WHERE key = ?', (self._compress(pickled), key))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            self._l1_delete(key)
+            raise
+
+        self._l1_set(key, pickled, row[1])
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+        self._l1_delete(key)
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+        self._l1_delete(key)
+        return cursor.rowcount == 1
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+        self._l1.clear()
+
+    # BaseCache runs the async API on the single thread-sensitive executor.
+    # L1 hits are answered on the event loop; everything else goes to a
+    # worker thread with its own SQLite connection.
+
+    async def aget(self, key, default=None, version=None):
+        pickled = self._l1_get(self.make_and_validate_key(key, version=version))
+        if pickled is not None:
+            return pickle.loads(pickled)
+        return await sync_to_async(self.get, thread_sensitive=False)(key, default, version)
+
+    async def aget_many(self, keys, version=None):
+        results = {}
+        for key in keys:
+            pickled = self._l1_get(self.make_and_validate_key(key, version=version))
+            if pickled is None:
+                return await sync_to_async(self.get_many, thread_sensitive=False)(keys, version)
+            results[key] = pickle.loads(pickled)
+        return results
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.set, thread_sensitive=False)(key, value, timeout, version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.add, thread_sensitive=False)(key, value, timeout, version)
+
+    async def aincr(self, key, delta=1, version=None):
+        return await sync_to_async(self.incr, thread_sensitive=False)(key, delta, version)
+
+    async def atouch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.touch, thread_sensitive=False)(key, timeout, version)
+
+    async def adelete(self, key, version=None):
+        return await sync_to_async(self.delete, thread_sensitive=False)(key, version)
+
+    async def aclear(self):
+        return await sync_to_async(self.clear, thread_sensitive=False)()
+
+
+def _expired(expires):
+    return expires is not None and expires <= time.time()
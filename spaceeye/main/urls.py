@@ -8,6 +8,10 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('mars-rover/', views.mars_rover_photos, name='mars_rover'),
     path('api/data/', views.api_data_ajax, name='api_data_ajax'),
+    path('api/data/batch/', views.api_data_batch, name='api_data_batch'),
+    path('images/thumbnail/', views.image_proxy, name='image_proxy'),
+    path('api/nasa/stats/', views.nasa_client_stats, name='nasa_client_stats'),
+    path('metrics', views.metrics_view, name='metrics'),
 
     path('login/', auth_views.LoginView.as_view(template_name='main/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='index'), name='logout'),
@@ -16,5 +20,9 @@ urlpatterns = [
     path('favorites/', views.favorites_list, name='favorites'),
     path('favorites/add/', views.add_to_favorites, name='add_to_favorites'),
     path('favorites/remove/', views.remove_from_favorites, name='remove_from_favorites'),
+    path('favorites/batch/', views.batch_favorites, name='batch_favorites'),
+    path('favorites/export/', views.favorites_export, name='favorites_export'),
+    path('favorites/import/', views.favorites_import, name='favorites_import'),
     path('favorites/delete/<int:favorite_id>/', views.delete_favorite, name='delete_favorite'),
+    path('favorites/<int:favorite_id>/', views.favorite_detail, name='favorite_detail'),
 ]
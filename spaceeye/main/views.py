@@ -1,22 +1,61 @@
+import asyncio
 from datetime import timedelta, datetime
+from functools import lru_cache
+from urllib.parse import urlparse
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    JsonResponse, FileResponse, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotModified,
+    StreamingHttpResponse
+)
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Substr
+from django.utils.http import parse_etags
 from django.conf import settings
-import requests
 import logging
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
 from django.contrib import messages
 from .forms import CustomUserCreationForm
 from .models import Favorite
+from .caching import aget_or_fetch_entry, aget_cached, refresh_in_background, make_entry, derive_entry, content_hash
+from .conditional import aconditional_response, freshness
+from .manifest import MANIFEST_TTL, aget_mission_manifest, empty_sol_payload, apply_manifest, refresh_mission_manifest
+from .mars_payload import inflate_payload, photo_urls
+from .favorite_cache import aget_favorite_hashes, record_favorite_changes, url_hash
+from .favorite_io import EXPORT_FORMATS, aiterate, export_chunks, import_favorites, import_format
+from .fragments import arender_fragment
+from .nasa_data import (
+    APOD_PICKER_DAYS, MARS_PAGE_SIZE, MARS_ROVERS, afetch_apod_data, afetch_mars_rover_data, apod_cache_key,
+    fetch_apod_data, fetch_mars_rover_data, mars_rover_cache_key, target_key
+)
+from .search import search_favorite_ids
+from .thumbnails import THUMBNAIL_SIZES, get_thumbnail, is_allowed_url, thumbnail_key, thumbnails_available
+from . import metrics, nasa_client
+import csv
 import json
 
 logger = logging.getLogger(__name__)
 
+FAVORITES_PAGE_SIZE = 24
+FAVORITES_SUMMARY_LENGTH = 200
+FAVORITES_BATCH_LIMIT = 100
+# Every miss in a data batch can cost an upstream call, so batches stay small.
+API_BATCH_LIMIT = 20
+FAVORITES_QUERY_MAX_LENGTH = 200
+# Larger imports belong to manage.py import_favorites.
+FAVORITES_IMPORT_MAX_ROWS = 50000
 
-def index(request):
+# Template rendering touches the session and request.user synchronously.
+arender = sync_to_async(render)
+
+
+async def index(request):
     selected_date = request.GET.get('date')
 
     if selected_date:
@@ -25,77 +64,67 @@ def index(request):
         except ValueError:
             selected_date = None
 
-    nasa_data = get_apod_data(selected_date)
+    entry = await aget_apod_entry(selected_date)
+    nasa_data = entry['data']
+
+    today = datetime.now().date()
 
     is_favorited = False
-    if request.user.is_authenticated and nasa_data.get('url'):
-        is_favorited = Favorite.objects.filter(
-            user=request.user,
-            favorite_type='apod',
-            image_url=nasa_data['url']
-        ).exists()
+    user = await request.auser()
+    if user.is_authenticated and nasa_data.get('url'):
+        is_favorited = url_hash(nasa_data['url']) in await aget_favorite_hashes(user.pk, 'apod')
+
+    async def build():
+        # The APOD card is the same for every user; the star is set by
+        # favorites.js from favorited_urls.
+        apod_html = await arender_fragment(
+            'main/partials/apod_content.html',
+            (entry['etag'], user.is_authenticated),
+            lambda: {'nasa_data': nasa_data, 'show_favorite': user.is_authenticated}
+        )
+        context = {
+            'nasa_data': nasa_data,
+            'apod_html': apod_html,
+            'selected_date': selected_date,
+            'date_options': _apod_date_options(today),
+            'is_favorited': is_favorited,
+            'favorited_urls': [nasa_data['url']] if is_favorited else [],
+        }
+        return await arender(request, 'main/index.html', context)
+
+    return await aconditional_response(
+        request,
+        etag=content_hash(entry['etag'], today, user.pk, is_favorited),
+        last_modified=entry['fetched_at'],
+        build=build,
+        per_user=True
+    )
 
+
+@lru_cache(maxsize=2)
+def _apod_date_options(today):
     date_options = []
-    today = datetime.now().date()
-    for i in range(30):
+    for i in range(APOD_PICKER_DAYS):
         date = today - timedelta(days=i)
         date_options.append({
             'value': date.strftime('%Y-%m-%d'),
             'display': date.strftime('%B %d, %Y')
         })
+    return date_options
 
-    context = {
-        'nasa_data': nasa_data,
-        'selected_date': selected_date,
-        'date_options': date_options,
-        'is_favorited': is_favorited
-    }
-
-    return render(request, 'main/index.html', context)
-
-
-def get_apod_data(date=None):
-    cache_key = f'nasa_apod_data_{date or "today"}'
-    cached_data = cache.get(cache_key)
-
-    if cached_data:
-        return cached_data
-
-    api_key = settings.NASA_API_KEY
-    url = 'https://api.nasa.gov/planetary/apod'
-    params = {'api_key': api_key}
-
-    if date:
-        params['date'] = date
 
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        data['source'] = 'apod'
-
-        if data.get('media_type') != 'image':
-            data['error'] = 'Video available for this date instead of image'
-            cache.set(cache_key, data, 60 * 60)
-        else:
-            cache_time = 60 * 60 * 24 if date else 60 * 60 * 2
-            cache.set(cache_key, data, cache_time)
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"NASA APOD API request failed: {str(e)}")
-        data = {'error': 'Failed to load APOD data', 'source': 'apod'}
-        cache.set(cache_key, data, 60 * 5)
-    except Exception as e:
-        logger.error(f"Unexpected error in APOD: {str(e)}")
-        data = {'error': 'Internal server error', 'source': 'apod'}
-        cache.set(cache_key, data, 60 * 5)
-
-    return data
+async def aget_apod_entry(date=None):
+    cache_key = apod_cache_key(date)
+    return await aget_or_fetch_entry(
+        cache_key,
+        lambda: fetch_apod_data(cache_key, date),
+        lambda: afetch_apod_data(cache_key, date),
+        target=('apod', date)
+    )
 
 
 @login_required
-def mars_rover_photos(request):
+async def mars_rover_photos(request):
     sol = request.GET.get('sol', '1000')
     rover = request.GET.get('rover', 'curiosity')
 
@@ -104,98 +133,249 @@ def mars_rover_photos(request):
     except ValueError:
         sol = 1000
 
-    photos_data = get_mars_rover_data(rover, sol)
-
-    if request.user.is_authenticated and photos_data.get('photos'):
-        favorited_urls = set(
-            Favorite.objects.filter(
-                user=request.user,
-                favorite_type='mars_rover'
-            ).values_list('image_url', flat=True)
+    page = _parse_page(request.GET.get('page'))
+    entry = await aget_mars_rover_entry(rover, sol, page)
+
+    # The cached page stays compact unless the response is actually rendered.
+    favorite_state = []
+    user = await request.auser()
+    urls = photo_urls(entry['data'])
+    if user.is_authenticated and urls:
+        favorited = await aget_favorite_hashes(user.pk, 'mars_rover')
+        favorite_state = [url_hash(url) in favorited for url in urls]
+
+    async def build():
+        # The grid is the same for every user and is inflated and rendered
+        # only when its fragment is not cached; stars come from favorited_urls.
+        gallery_html = await arender_fragment(
+            'main/partials/mars_photo_grid.html',
+            (entry['etag'], rover, sol, page),
+            lambda: {
+                'photos_data': inflate_payload(entry['data']),
+                'selected_rover': rover,
+                'selected_sol': sol,
+                'selected_page': page,
+            }
         )
+        context = {
+            'photos_data': entry['data'],
+            'gallery_html': gallery_html,
+            'favorited_urls': [url for url, is_favorited in zip(urls, favorite_state) if is_favorited],
+            'selected_rover': rover,
+            'selected_sol': sol,
+            'selected_page': page,
+            'rover_options': [
+                {'value': 'curiosity', 'name': 'Curiosity'},
+                {'value': 'opportunity', 'name': 'Opportunity'},
+                {'value': 'spirit', 'name': 'Spirit'},
+                {'value': 'perseverance', 'name': 'Perseverance'}
+            ]
+        }
+        return await arender(request, 'main/mars_rover.html', context)
 
-        for photo in photos_data['photos']:
-            photo['is_favorited'] = photo['img_src'] in favorited_urls
+    return await aconditional_response(
+        request,
+        etag=content_hash(entry['etag'], user.pk, favorite_state),
+        last_modified=entry['fetched_at'],
+        build=build,
+        per_user=True
+    )
 
-    context = {
-        'photos_data': photos_data,
-        'selected_rover': rover,
-        'selected_sol': sol,
-        'rover_options': [
-            {'value': 'curiosity', 'name': 'Curiosity'},
-            {'value': 'opportunity', 'name': 'Opportunity'},
-            {'value': 'spirit', 'name': 'Spirit'},
-            {'value': 'perseverance', 'name': 'Perseverance'}
-        ]
-    }
 
-    return render(request, 'main/mars_rover.html', context)
+def _parse_page(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
 
 
-def get_mars_rover_data(rover, sol):
-    cache_key = f'mars_rover_{rover}_{sol}'
-    cached_data = cache.get(cache_key)
+async def aget_mars_rover_entry(rover, sol, page=1):
+    # The entry holds the compact payload; inflate_payload() it before rendering.
+    manifest = await aget_mission_manifest(rover)
+    empty = empty_sol_payload(manifest, rover, sol, page)
+    if empty is not None:
+        return make_entry(empty, MANIFEST_TTL)
 
-    if cached_data:
-        return cached_data
+    cache_key = mars_rover_cache_key(rover, sol, page)
+    entry = await aget_or_fetch_entry(
+        cache_key,
+        lambda: fetch_mars_rover_data(cache_key, rover, sol, page),
+        lambda: afetch_mars_rover_data(cache_key, rover, sol, page),
+        target=('mars_rover', rover, sol, page)
+    )
+    if manifest is not None and sol > manifest['max_sol'] and entry['data'].get('total_photos'):
+        # Photos past the manifest's last sol: it is out of date.
+        refresh_mission_manifest(rover)
 
-    api_key = settings.NASA_API_KEY
-    url = f'https://api.nasa.gov/mars-photos/api/v1/rovers/{rover}/photos'
-    params = {
-        'api_key': api_key,
-        'sol': sol,
-        'page': 1
-    }
+    data = apply_manifest(manifest, entry['data'], page, MARS_PAGE_SIZE)
+    if data is not entry['data']:
+        entry = derive_entry(entry, data, data['total_photos'], data['next_page'], data.get('max_sol'))
 
-    try:
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-
-        if data.get('photos'):
-            data['photos'] = data['photos'][:12]
-            data['total_photos'] = len(data['photos'])
-
-        data['source'] = 'mars_rover'
-        data['rover_name'] = rover.title()
-        data['sol'] = sol
-
-        cache.set(cache_key, data, 60 * 60 * 24 * 7)
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Mars Rover API request failed: {str(e)}")
-        data = {
-            'error': f'Failed to load {rover} photos for sol {sol}',
-            'source': 'mars_rover',
-            'photos': []
-        }
-        cache.set(cache_key, data, 60 * 5)
-    except Exception as e:
-        logger.error(f"Unexpected error in Mars Rover: {str(e)}")
-        data = {
-            'error': 'Internal server error',
-            'source': 'mars_rover',
-            'photos': []
-        }
-        cache.set(cache_key, data, 60 * 5)
+    if data.get('next_page'):
+        next_key = mars_rover_cache_key(rover, sol, data['next_page'])
+        if (await aget_cached(next_key))[0] is None:
+            _prefetch_mars_rover_page(rover, sol, data['next_page'])
+
+    return entry
 
-    return data
 
+def _prefetch_mars_rover_page(rover, sol, page):
+    cache_key = mars_rover_cache_key(rover, sol, page)
+    refresh_in_background(cache_key, lambda: fetch_mars_rover_data(cache_key, rover, sol, page))
 
-def api_data_ajax(request):
+
+async def api_data_ajax(request):
     api_type = request.GET.get('type')
 
     if api_type == 'apod':
         date = request.GET.get('date')
-        data = get_apod_data(date)
+        entry = await aget_apod_entry(date)
     elif api_type == 'mars_rover':
         rover = request.GET.get('rover', 'curiosity')
         sol = int(request.GET.get('sol', 1000))
-        data = get_mars_rover_data(rover, sol)
+        page = _parse_page(request.GET.get('page'))
+        entry = await aget_mars_rover_entry(rover, sol, page)
     else:
-        data = {'error': 'Invalid API type'}
+        return JsonResponse({'error': 'Invalid API type'})
+
+    async def build():
+        return JsonResponse(inflate_payload(entry['data']))
+
+    return await aconditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['fetched_at'],
+        build=build,
+        max_age=freshness(entry)
+    )
+
+
+async def api_data_batch(request):
+    # Answers several api_data queries in one response. Queries whose page is
+    # cached resolve at once; misses are fetched concurrently, at most
+    # API_BATCH_CONCURRENCY at a time. A failing query gets its own error.
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'})
+
+    try:
+        queries = json.loads(request.body).get('queries')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON'})
+
+    if not isinstance(queries, list) or not queries:
+        return JsonResponse({'error': 'No queries provided'})
+    if len(queries) > API_BATCH_LIMIT:
+        return JsonResponse({'error': f'At most {API_BATCH_LIMIT} queries per batch'})
+
+    # Repeated queries share one lookup.
+    parsed = [_parse_data_query(query) for query in queries]
+    lookups = list(dict.fromkeys(item for item in parsed if isinstance(item, tuple)))
+    cached = await cache.aget_many([target_key(lookup) for lookup in lookups])
+
+    semaphore = asyncio.Semaphore(settings.API_BATCH_CONCURRENCY)
+
+    async def resolve(lookup):
+        if target_key(lookup) in cached:
+            return await _aget_data_query_entry(lookup)
+        async with semaphore:
+            return await _aget_data_query_entry(lookup)
+
+    entries = await asyncio.gather(*(resolve(lookup) for lookup in lookups), return_exceptions=True)
+    results_by_lookup = {}
+    for lookup, entry in zip(lookups, entries):
+        if isinstance(entry, Exception):
+            logger.error(f"Batch query {lookup} failed: {str(entry)}")
+            results_by_lookup[lookup] = {'error': 'Request failed'}
+        else:
+            results_by_lookup[lookup] = {
+                'data': inflate_payload(entry['data']),
+                'etag': entry['etag'],
+                'cached': target_key(lookup) in cached,
+            }
+
+    return JsonResponse({
+        'results': [
+            {'query': query, **(results_by_lookup[item] if isinstance(item, tuple) else item)}
+            for query, item in zip(queries, parsed)
+        ]
+    })
+
+
+def _parse_data_query(query):
+    # Returns a hashable lookup, or an error result for the query.
+    if not isinstance(query, dict):
+        return {'error': 'Invalid query'}
+
+    if query.get('type') == 'apod':
+        date = query.get('date') or None
+        if date is not None:
+            try:
+                date = datetime.strptime(str(date), '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                return {'error': 'Invalid date'}
+        return ('apod', date)
+
+    if query.get('type') == 'mars_rover':
+        rover = str(query.get('rover', 'curiosity')).lower()
+        if rover not in MARS_ROVERS:
+            return {'error': 'Invalid rover'}
+        try:
+            sol = int(query.get('sol', 1000))
+        except (TypeError, ValueError):
+            return {'error': 'Invalid sol'}
+        if sol < 0:
+            return {'error': 'Invalid sol'}
+        return ('mars_rover', rover, sol, _parse_page(query.get('page')))
+
+    return {'error': 'Invalid API type'}
+
+
+async def _aget_data_query_entry(lookup):
+    if lookup[0] == 'apod':
+        return await aget_apod_entry(lookup[1])
+    return await aget_mars_rover_entry(*lookup[1:])
+
 
-    return JsonResponse(data)
+def image_proxy(request):
+    url = request.GET.get('url', '')
+    size = request.GET.get('size', 'grid')
+
+    if size not in THUMBNAIL_SIZES or urlparse(url).scheme not in ('http', 'https'):
+        return HttpResponseBadRequest('Invalid image URL or size')
+    # The modal scripts proxy every photo; hosts we do not fetch from are
+    # loaded by the browser directly.
+    if not is_allowed_url(url) or not thumbnails_available():
+        return redirect(url)
+
+    # Thumbnails never change for a given URL and size, so the key is a strong ETag.
+    etag = f'"{thumbnail_key(url, size)}"'
+    cache_control = f'public, max-age={settings.THUMBNAIL_MAX_AGE}, immutable'
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            path = get_thumbnail(url, size)
+        except Exception as e:
+            logger.error(f"Thumbnail for {url} failed: {str(e)}")
+            return redirect(url)
+        response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+@staff_member_required
+def nasa_client_stats(request):
+    return JsonResponse(nasa_client.get_stats())
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @login_required
@@ -206,21 +386,10 @@ def add_to_favorites(request):
             favorite_type = data.get('type')
             api_data = data.get('data')
 
-            if favorite_type == 'apod':
-                title = api_data.get('title', 'NASA APOD')
-                description = api_data.get('explanation', '')[:500]  # Limit length
-                image_url = api_data.get('url')
-            elif favorite_type == 'mars_rover':
-                camera_name = api_data.get('camera', {}).get('full_name', 'Unknown Camera')
-                rover_name = api_data.get('rover', {}).get('name', 'Unknown Rover')
-                title = f"{rover_name} - {camera_name}"
-                description = f"Sol: {api_data.get('sol', 'Unknown')}, Earth Date: {api_data.get('earth_date', 'Unknown')}"
-                image_url = api_data.get('img_src')
-            else:
-                return JsonResponse({'success': False, 'error': 'Invalid type'})
-
-            if not image_url:
-                return JsonResponse({'success': False, 'error': 'No image URL provided'})
+            try:
+                title, description, image_url = _favorite_fields(favorite_type, api_data)
+            except ValueError as e:
+                return JsonResponse({'success': False, 'error': str(e)})
 
             favorite, created = Favorite.objects.get_or_create(
                 user=request.user,
@@ -234,6 +403,7 @@ def add_to_favorites(request):
             )
 
             if created:
+                record_favorite_changes(request.user.pk, favorite_type, added=[image_url])
                 return JsonResponse({'success': True, 'action': 'added'})
             else:
                 return JsonResponse({'success': False, 'error': 'Already in favorites'})
@@ -245,6 +415,26 @@ def add_to_favorites(request):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 
+def _favorite_fields(favorite_type, api_data):
+    if favorite_type == 'apod':
+        title = api_data.get('title', 'NASA APOD')
+        description = api_data.get('explanation', '')[:500]  # Limit length
+        image_url = api_data.get('url')
+    elif favorite_type == 'mars_rover':
+        camera_name = api_data.get('camera', {}).get('full_name', 'Unknown Camera')
+        rover_name = api_data.get('rover', {}).get('name', 'Unknown Rover')
+        title = f"{rover_name} - {camera_name}"
+        description = f"Sol: {api_data.get('sol', 'Unknown')}, Earth Date: {api_data.get('earth_date', 'Unknown')}"
+        image_url = api_data.get('img_src')
+    else:
+        raise ValueError('Invalid type')
+
+    if not image_url:
+        raise ValueError('No image URL provided')
+
+    return title, description, image_url
+
+
 @login_required
 def remove_from_favorites(request):
     if request.method == 'POST':
@@ -263,6 +453,7 @@ def remove_from_favorites(request):
             ).delete()
 
             if deleted:
+                record_favorite_changes(request.user.pk, favorite_type, removed=[image_url])
                 return JsonResponse({'success': True, 'action': 'removed'})
             else:
                 return JsonResponse({'success': False, 'error': 'Not found in favorites'})
@@ -274,30 +465,302 @@ def remove_from_favorites(request):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 
+@login_required
+def batch_favorites(request):
+    # Applies a list of add/remove operations in one transaction: one query for
+    # the current state, one bulk insert and one delete, whatever the batch size.
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+    try:
+        operations = json.loads(request.body).get('operations')
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'})
+
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({'success': False, 'error': 'No operations provided'})
+    if len(operations) > FAVORITES_BATCH_LIMIT:
+        return JsonResponse({'success': False, 'error': f'At most {FAVORITES_BATCH_LIMIT} operations per batch'})
+
+    parsed = [_parse_batch_operation(operation) for operation in operations]
+
+    try:
+        with transaction.atomic():
+            image_urls = {item['image_url'] for item in parsed if 'error' not in item}
+            existing = set(
+                Favorite.objects
+                .select_for_update()
+                .filter(user=request.user, image_url__in=image_urls)
+                .order_by()
+                .values_list('favorite_type', 'image_url')
+            )
+
+            # Operations apply in order against the evolving state, so the
+            # batch only writes the difference between the start and the end.
+            state = set(existing)
+            added = {}
+            results = []
+            for item in parsed:
+                if 'error' in item:
+                    results.append({'success': False, 'error': item['error']})
+                    continue
+
+                key = (item['type'], item['image_url'])
+                if item['op'] == 'add':
+                    if key in state:
+                        results.append({'success': False, 'error': 'Already in favorites'})
+                        continue
+                    state.add(key)
+                    added[key] = item
+                    results.append({'success': True, 'action': 'added'})
+                else:
+                    if key not in state:
+                        results.append({'success': False, 'error': 'Not found in favorites'})
+                        continue
+                    state.discard(key)
+                    results.append({'success': True, 'action': 'removed'})
+
+            to_create = state - existing
+            to_delete = existing - state
+
+            if to_create:
+                Favorite.objects.bulk_create([
+                    Favorite(
+                        user=request.user,
+                        favorite_type=favorite_type,
+                        image_url=image_url,
+                        title=added[(favorite_type, image_url)]['title'],
+                        description=added[(favorite_type, image_url)]['description'],
+                        api_data=added[(favorite_type, image_url)]['api_data'],
+                    )
+                    for favorite_type, image_url in to_create
+                ], ignore_conflicts=True)
+
+            if to_delete:
+                condition = Q()
+                for favorite_type, image_url in to_delete:
+                    condition |= Q(favorite_type=favorite_type, image_url=image_url)
+                Favorite.objects.filter(condition, user=request.user).delete()
+
+    except Exception as e:
+        logger.error(f"Error applying favorites batch: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'Server error'})
+
+    for favorite_type in {key[0] for key in to_create | to_delete}:
+        record_favorite_changes(
+            request.user.pk,
+            favorite_type,
+            added=[image_url for key_type, image_url in to_create if key_type == favorite_type],
+            removed=[image_url for key_type, image_url in to_delete if key_type == favorite_type],
+        )
+
+    return JsonResponse({
+        'success': True,
+        'added': len(to_create),
+        'removed': len(to_delete),
+        'results': results,
+    })
+
+
+def _parse_batch_operation(operation):
+    if not isinstance(operation, dict):
+        return {'error': 'Invalid operation'}
+
+    op = operation.get('op')
+    favorite_type = operation.get('type')
+
+    if op == 'add':
+        api_data = operation.get('data')
+        if not isinstance(api_data, dict):
+            return {'error': 'No data provided'}
+        try:
+            title, description, image_url = _favorite_fields(favorite_type, api_data)
+        except ValueError as e:
+            return {'error': str(e)}
+        return {
+            'op': op,
+            'type': favorite_type,
+            'image_url': image_url,
+            'title': title,
+            'description': description,
+            'api_data': api_data,
+        }
+
+    if op == 'remove':
+        image_url = operation.get('image_url')
+        if not image_url:
+            return {'error': 'No image URL provided'}
+        return {'op': op, 'type': favorite_type, 'image_url': image_url}
+
+    return {'error': 'Invalid operation'}
+
+
 @login_required
 def favorites_list(request):
-    favorites = Favorite.objects.filter(user=request.user)
+    # Keyset pagination on (created_at, id): each page is an index range scan,
+    # however deep the user goes. The cards only need a summary, so api_data
+    # and the full description stay in the database until the modal asks.
+    favorites = (
+        Favorite.objects
+        .filter(user=request.user)
+        .defer('api_data', 'description')
+        .annotate(summary=Substr('description', 1, FAVORITES_SUMMARY_LENGTH))
+        .order_by('-created_at', '-id')
+    )
 
     filter_type = request.GET.get('type')
-    if filter_type in ['apod', 'mars_rover']:
+    if filter_type not in ['apod', 'mars_rover']:
+        filter_type = None
+
+    query = request.GET.get('q', '').strip()[:FAVORITES_QUERY_MAX_LENGTH]
+    if query:
+        return _search_favorites(request, favorites, filter_type, query)
+
+    if filter_type:
         favorites = favorites.filter(favorite_type=filter_type)
 
+    cursor = _parse_favorites_cursor(request.GET.get('after'))
+    if cursor:
+        created_at, favorite_id = cursor
+        favorites = favorites.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=favorite_id)
+        )
+
+    favorites = list(favorites[:FAVORITES_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(favorites) > FAVORITES_PAGE_SIZE:
+        favorites = favorites[:FAVORITES_PAGE_SIZE]
+        next_cursor = _favorites_cursor(favorites[-1])
+
     context = {
         'favorites': favorites,
-        'filter_type': filter_type
+        'filter_type': filter_type,
+        'next_cursor': next_cursor,
+        'is_first_page': cursor is None,
+    }
+
+    return render(request, 'main/favorites.html', context)
+
+
+def _search_favorites(request, favorites, filter_type, query):
+    # Ranked results can't be walked by a keyset, so search pages are
+    # numbered. The FTS index returns one page of ids; only those rows load.
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    ids = search_favorite_ids(
+        request.user.pk, query, filter_type,
+        limit=FAVORITES_PAGE_SIZE + 1, offset=(page - 1) * FAVORITES_PAGE_SIZE
+    )
+    has_next = len(ids) > FAVORITES_PAGE_SIZE
+    ids = ids[:FAVORITES_PAGE_SIZE]
+    by_id = favorites.in_bulk(ids)
+
+    context = {
+        'favorites': [by_id[favorite_id] for favorite_id in ids if favorite_id in by_id],
+        'filter_type': filter_type,
+        'query': query,
+        'page': page,
+        'next_page': page + 1 if has_next else None,
+        'previous_page': page - 1 if page > 1 else None,
+        'is_first_page': page == 1,
     }
 
     return render(request, 'main/favorites.html', context)
 
 
+def _favorites_cursor(favorite):
+    return f'{favorite.created_at.isoformat()}_{favorite.id}'
+
+
+def _parse_favorites_cursor(value):
+    try:
+        created_at, favorite_id = (value or '').rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(favorite_id)
+    except ValueError:
+        return None
+
+
+@login_required
+def favorite_detail(request, favorite_id):
+    favorite = get_object_or_404(Favorite, id=favorite_id, user=request.user)
+    return JsonResponse({
+        'success': True,
+        'favorite': {
+            'id': favorite.id,
+            'type': favorite.favorite_type,
+            'title': favorite.title,
+            'description': favorite.description,
+            'image_url': favorite.image_url,
+            'api_data': favorite.api_data,
+        }
+    })
+
+
 @login_required
 def delete_favorite(request, favorite_id):
     favorite = get_object_or_404(Favorite, id=favorite_id, user=request.user)
     favorite.delete()
+    record_favorite_changes(request.user.pk, favorite.favorite_type, removed=[favorite.image_url])
     messages.success(request, 'Removed from favorites.')
     return redirect('main:favorites')
 
 
+@login_required
+def favorites_export(request):
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Unknown export format')
+
+    chunks = export_chunks(request.user.pk, export_format)
+    if isinstance(request, ASGIRequest):
+        chunks = aiterate(chunks)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="favorites-{datetime.now().date().isoformat()}.{export_format}"'
+    )
+    return response
+
+
+@login_required
+def favorites_import(request):
+    if request.method != 'POST':
+        return redirect('main:favorites')
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        messages.error(request, 'Choose a file to import.')
+        return redirect('main:favorites')
+
+    try:
+        report = import_favorites(
+            request.user,
+            upload.file,
+            import_format(upload.name, request.POST.get('format')),
+            max_rows=FAVORITES_IMPORT_MAX_ROWS,
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        logger.error(f"Error importing favorites: {str(e)}")
+        messages.error(request, 'The file could not be read. Export files are UTF-8 NDJSON or CSV.')
+        return redirect('main:favorites')
+
+    messages.success(
+        request,
+        f"Imported {report['created']} favorites; {report['skipped']} were already saved."
+    )
+    if report['truncated']:
+        messages.warning(request, f'Stopped after {FAVORITES_IMPORT_MAX_ROWS} rows; the rest was not imported.')
+    if report['errors']:
+        first = report['errors'][0]
+        messages.warning(
+            request,
+            f"Skipped {report['invalid']} invalid rows (line {first['line']}: {first['error']})."
+        )
+    return redirect('main:favorites')
+
+
 def register_view(request):
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from . import lookup_stats
+from .caching import get_cached, lock_timeout
+from .manifest import get_mission_manifest
+from .nasa_data import apod_picker_key, fetch_apod_data, fetch_mars_rover_data, target_key, warm_apod_picker
+from .quota import BACKGROUND, priority
+
+logger = logging.getLogger(__name__)
+
+# Warmed whatever the statistics say: the pages a first visit lands on.
+SEED_TARGETS = [('apod', None), ('mars_rover', 'curiosity', 1000, 1)]
+# Newest populated sols of the active rover, which fill up while it is on Mars.
+RECENT_ROVER = 'perseverance'
+RECENT_SOLS = 3
+# The undated APOD key is refreshed this long after UTC midnight, when a new
+# picture is due, instead of waiting for its TTL.
+ROLLOVER_DELAY = 5 * 60
+DAY = 60 * 60 * 24
+
+
+def plan(top):
+    targets = list(SEED_TARGETS)
+
+    manifest = get_mission_manifest(RECENT_ROVER)
+    if manifest:
+        for sol in manifest['populated_sols'][-RECENT_SOLS:]:
+            targets.append(('mars_rover', RECENT_ROVER, sol, 1))
+
+    for target in lookup_stats.hot_targets(top):
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+def _fetcher(target, cache_key):
+    if target[0] == 'apod':
+        return lambda: fetch_apod_data(cache_key, target[1])
+    return lambda: fetch_mars_rover_data(cache_key, *target[1:])
+
+
+def due_at(target, entry):
+    # When the target should be refreshed: LEAD_TIME before its entry goes
+    # stale, or right away if nothing is cached.
+    if not isinstance(entry, dict) or 'data' not in entry:
+        return 0
+    due = entry['fresh_until'] - settings.NASA_WARM_LEAD_TIME
+    if target == ('apod', None):
+        rollover = (entry['fetched_at'] // DAY + 1) * DAY + ROLLOVER_DELAY
+        due = min(due, rollover)
+    return due
+
+
+def refresh(target):
+    # Takes the same lock as single_flight, so a worker already fetching the
+    # key is left to it. Returns whether this call fetched.
+    cache_key = target_key(target)
+    lock_key = f'{cache_key}_lock'
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, lock_timeout()):
+        return False
+
+    try:
+        with priority(BACKGROUND, wait=True):
+            _fetcher(target, cache_key)()
+        return True
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def warm_picker(today):
+    # The APOD date picker's days come from one range call, repeated once the
+    # marker it leaves goes stale. Returns whether this call fetched.
+    warmed, is_stale = get_cached(apod_picker_key(today))
+    if warmed is not None and not is_stale:
+        return False
+
+    with priority(BACKGROUND, wait=True):
+        warm_apod_picker(today)
+    return True
+
+
+class Scheduler:
+    # Replans every interval seconds and, in between, sleeps until the next
+    # target falls due.
+
+    def __init__(self, top=None, interval=None):
+        self.top = top or settings.NASA_WARM_TOP_KEYS
+        self.interval = interval or settings.NASA_WARM_INTERVAL
+        self.stop = threading.Event()
+
+    def run_once(self):
+        # Returns the refreshed targets and when the next one falls due.
+        now = time.time()
+        refreshed = []
+        next_due = now + self.interval
+
+        try:
+            try:
+                warm_picker(datetime.now().date())
+            except Exception as e:
+                logger.error(f"Warming the APOD picker failed: {str(e)}")
+
+            targets = plan(self.top)
+            entries = cache.get_many([target_key(target) for target in targets])
+            for target in targets:
+                due = due_at(target, entries.get(target_key(target)))
+                if due <= now:
+                    try:
+                        if refresh(target):
+                            refreshed.append(target)
+                    except Exception as e:
+                        logger.error(f"Warming {target_key(target)} failed: {str(e)}")
+                    due = due_at(target, cache.get(target_key(target)))
+                # Failed refreshes are retried on the next pass, not immediately.
+                next_due = min(next_due, max(due, now + 1))
+        finally:
+            close_old_connections()
+
+        return refreshed, next_due
+
+    def run_forever(self, on_pass=None):
+        while not self.stop.is_set():
+            refreshed, next_due = self.run_once()
+            if on_pass:
+                on_pass(refreshed)
+            self.stop.wait(max(next_due - time.time(), 0))
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'spaceeye.settings')
 
 application = get_asgi_application()
+
+from main import nasa_client  # noqa: E402
+
+nasa_client.use_event_loop()
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,13 +78,57 @@ WSGI_APPLICATION = 'spaceeye.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuned for several workers on one host (benchmark: manage.py benchmark_db).
+DATABASE_PATH = os.getenv('DATABASE_PATH', str(BASE_DIR / 'db.sqlite3'))
+# Off by default: under ASGI, the production setup, each request's queries run
+# on a fresh thread, so persistent connections would only pile up. Threaded
+# WSGI servers reuse their threads and can set it (e.g. 600).
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 0))
+SQLITE_CACHE_PRAGMAS = [
+    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    # Negative means KiB rather than pages.
+    f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', 32 * 1024))}",
+    'PRAGMA temp_store=MEMORY',
+]
+SQLITE_OPTIONS = {
+    # WAL lets readers and the writer proceed together; with WAL, NORMAL only
+    # fsyncs at checkpoints and cannot corrupt the database.
+    'init_command': ';'.join(['PRAGMA journal_mode=WAL', 'PRAGMA synchronous=NORMAL', *SQLITE_CACHE_PRAGMAS]),
+    # busy_timeout, in seconds: wait for the write lock instead of failing.
+    'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+    # Take the write lock at BEGIN. A transaction that reads first and then
+    # has to upgrade its lock fails with "database is locked" at once,
+    # whatever the busy timeout.
+    'transaction_mode': 'IMMEDIATE',
+}
+SQLITE_READ_ONLY_OPTIONS = {
+    'init_command': ';'.join([*SQLITE_CACHE_PRAGMAS, 'PRAGMA query_only=1']),
+    'timeout': SQLITE_OPTIONS['timeout'],
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': DATABASE_PATH,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
     }
 }
 
+# Optionally serve favorites reads from a separate read-only connection to the
+# same file (main/db_router.py), so they never hold up a worker's writes.
+if os.getenv('DB_FAVORITES_READ_ONLY', '') == '1':
+    DATABASES['favorites_read'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{DATABASE_PATH}?mode=ro',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_READ_ONLY_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['main.db_router.FavoritesReadRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,14 +172,70 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 NASA_API_KEY = os.getenv('NASA_API_KEY', 'demo-key')
-
+NASA_API_BASE_URL = os.getenv('NASA_API_BASE_URL', 'https://api.nasa.gov')
+
+# Shared keep-alive session used for every api.nasa.gov call (main/nasa_client.py).
+NASA_HTTP_POOL_SIZE = int(os.getenv('NASA_HTTP_POOL_SIZE', 10))
+NASA_HTTP_MAX_RETRIES = int(os.getenv('NASA_HTTP_MAX_RETRIES', 2))
+NASA_HTTP_BACKOFF_FACTOR = float(os.getenv('NASA_HTTP_BACKOFF_FACTOR', 0.5))
+# Cache misses one /api/data/batch/ request may fetch at the same time.
+API_BATCH_CONCURRENCY = int(os.getenv('API_BATCH_CONCURRENCY', 4))
+
+# Shared token bucket for the API key's hourly quota (main/quota.py). Each
+# minute may spend BURST x its even share of the remaining quota, as reported
+# by NASA's X-RateLimit-Remaining; prefetch and refresh jobs only the
+# BACKGROUND_SHARE of it.
+NASA_API_HOURLY_LIMIT = int(os.getenv('NASA_API_HOURLY_LIMIT', 1000))
+NASA_QUOTA_BURST = float(os.getenv('NASA_QUOTA_BURST', 4))
+NASA_QUOTA_BACKGROUND_SHARE = float(os.getenv('NASA_QUOTA_BACKGROUND_SHARE', 0.5))
+
+# Circuit breaker per upstream host (main/circuit.py): after this many failed
+# calls in a row, calls fail fast for RESET_TIMEOUT seconds, then one probe is let through.
+NASA_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('NASA_CIRCUIT_FAILURE_THRESHOLD', 5))
+NASA_CIRCUIT_RESET_TIMEOUT = int(os.getenv('NASA_CIRCUIT_RESET_TIMEOUT', 30))
+
+# Two-tier cache (main/tiered_cache.py): a small in-process LRU in front of a
+# SQLite file shared by every worker on the host, so one worker's NASA fetch
+# warms them all. Lock, circuit breaker, quota and shared stats keys always go
+# to the shared tier.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'main.tiered_cache.TieredCache',
+        'LOCATION': os.getenv('CACHE_PATH', str(BASE_DIR / 'cache' / 'cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 20000)),
+            'L1_MAX_BYTES': int(os.getenv('CACHE_L1_MAX_BYTES', 16 * 1024 * 1024)),
+            'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 5)),
+            'L1_BYPASS_SUFFIXES': ['_lock', '_circuit', '_quota', '_stats'],
+        },
     }
 }
 
+# Tests get their own cache file, see main/test_runner.py.
+TEST_RUNNER = 'main.test_runner.TestRunner'
+
+# NASA payloads stay servable for STALE_FACTOR x their TTL; once past the TTL
+# they are served stale while a background worker refreshes them.
+NASA_CACHE_STALE_FACTOR = int(os.getenv('NASA_CACHE_STALE_FACTOR', 4))
+NASA_REFRESH_WORKERS = int(os.getenv('NASA_REFRESH_WORKERS', 4))
+
+# Cache warmer (manage.py warm_cache): keeps the TOP_KEYS most often cold
+# pages refreshed LEAD_TIME seconds before they go stale.
+NASA_WARM_TOP_KEYS = int(os.getenv('NASA_WARM_TOP_KEYS', 20))
+NASA_WARM_LEAD_TIME = int(os.getenv('NASA_WARM_LEAD_TIME', 5 * 60))
+NASA_WARM_INTERVAL = int(os.getenv('NASA_WARM_INTERVAL', 60))
+
+# /metrics (main/metrics.py) is open unless a token is set; scrapers then send
+# "Authorization: Bearer <token>".
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Image proxy (main/thumbnails.py): resized copies of NASA images in a size-bounded disk cache.
+IMAGE_PROXY_ALLOWED_HOSTS = ['nasa.gov']
+THUMBNAIL_CACHE_DIR = os.getenv('THUMBNAIL_CACHE_DIR', str(BASE_DIR / 'thumbnail_cache'))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
+THUMBNAIL_MAX_AGE = 60 * 60 * 24 * 365
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'